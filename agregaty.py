@@ -0,0 +1,216 @@
+"""
+Agregaty cen TGE RDN utrzymywane przyrostowo obok partycji magazynu.
+
+Przy każdym zapisie siatki partycji (import CSV, dopisanie dnia przez
+demon.py) magazyn.py przelicza agregaty tylko tego miesiąca - koszt zależy
+od liczby wierszy miesiąca, nie od długości historii:
+
+    magazyn/2025/10/agregaty.npy   float64 [dzień miesiąca, 5]
+                                   liczba godzin, suma, min, max, liczba godzin z ceną < 0
+                    profil.npy     float64 [2, 24] suma i liczba cen dla każdej godziny zegarowej
+
+Agregaty liczone są na godzinach zegarowych (powtórzona godzina DST uśredniona,
+jak na heatmapach). Zapytania czytają tylko partycje z zakresu: statystyki
+miesiąca to 31 wierszy, średnia krocząca N dni - N wierszy, niezależnie od tego,
+ile lat danych jest w magazynie. Partycje sprzed agregatów są uzupełniane przy
+pierwszym odczycie.
+
+Użycie:
+    python agregaty.py przelicz
+    python agregaty.py <YYYY-MM>
+    python agregaty.py srednia <dzień> [okno]
+
+Przykłady:
+    python agregaty.py przelicz                 # agregaty wszystkich partycji od nowa
+    python agregaty.py 2025-10                  # statystyki i profil godzinowy miesiąca
+    python agregaty.py srednia 2025-10-31 30    # średnia z 30 dni kończących się 2025-10-31
+
+Użycie jako moduł:
+    from agregaty import month_summary, rolling_mean
+    summary = month_summary(2025, 10)
+    mean_30 = rolling_mean("2025-10-31", 30)
+"""
+import calendar
+import os
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from magazyn import _as_date, list_partitions, partition_dir, read_grid, read_meta, sync_from_csv
+from siatka import HOURS, clock_matrix
+
+# Kolumny agregaty.npy
+COUNT, SUM, MIN, MAX, NEGATIVE = range(5)
+DAY_COLUMNS = 5
+
+
+def day_aggregates(clock: np.ndarray) -> np.ndarray:
+    """Agregaty dni z macierzy [dzień, 24]; dzień bez cen ma liczbę 0, a min/max NaN."""
+    valid = ~np.isnan(clock)
+    out = np.full((len(clock), DAY_COLUMNS), np.nan)
+    out[:, COUNT] = valid.sum(axis=1)
+    out[:, SUM] = np.where(valid, clock, 0).sum(axis=1)
+    out[:, NEGATIVE] = (np.where(valid, clock, 0) < 0).sum(axis=1)
+    has = out[:, COUNT] > 0
+    out[has, MIN] = np.nanmin(clock[has], axis=1)
+    out[has, MAX] = np.nanmax(clock[has], axis=1)
+    return out
+
+
+def hour_profile(clock: np.ndarray) -> np.ndarray:
+    """Suma i liczba cen dla każdej godziny zegarowej: [2, 24]."""
+    valid = ~np.isnan(clock)
+    return np.vstack([np.where(valid, clock, 0).sum(axis=0), valid.sum(axis=0)])
+
+
+def write_aggregates(year: int, month: int, grid: np.ndarray):
+    """Zapisuje agregaty partycji na podstawie jej siatki [dzień miesiąca, SLOTS]."""
+    clock = clock_matrix(np.asarray(grid))
+    out_dir = partition_dir(year, month)
+    for name, array in (("agregaty", day_aggregates(clock)), ("profil", hour_profile(clock))):
+        tmp = os.path.join(out_dir, f"{name}.tmp.npy")
+        np.save(tmp, array)
+        os.replace(tmp, os.path.join(out_dir, f"{name}.npy"))
+
+
+def read_aggregates(year: int, month: int) -> tuple[np.ndarray, np.ndarray]:
+    """(agregaty dni, profil godzinowy) partycji; brakujące są liczone z siatki."""
+    part = partition_dir(year, month)
+    paths = [os.path.join(part, f"{name}.npy") for name in ("agregaty", "profil")]
+    if not all(os.path.exists(p) for p in paths):
+        write_aggregates(year, month, read_grid(year, month))
+    return tuple(np.load(p, mmap_mode="r") for p in paths)
+
+
+def months_between(start: date, end: date) -> list[tuple[int, int]]:
+    """(rok, miesiąc) kolejnych miesięcy od start do end włącznie."""
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def day_stats(start, end, sync: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (dni, agregaty [dzień, 5]) dla każdego dnia kalendarza z zakresu [start, end].
+
+    Dni spoza magazynu mają liczbę godzin 0 - okna kroczące liczą się po dniach
+    kalendarza, a nie po dniach z danymi. sync sprawdza tylko CSV miesięcy
+    z zakresu, więc koszt nie rośnie z długością historii.
+    """
+    start, end = _as_date(start), _as_date(end)
+    months = months_between(start, end)
+    if sync:
+        sync_from_csv(months=months)
+    days = np.datetime64(start, "D") + np.arange((end - start).days + 1)
+    out = np.zeros((len(days), DAY_COLUMNS))
+    out[:, MIN] = out[:, MAX] = np.nan
+    for year, month in months:
+        if read_meta(year, month) is None:
+            continue
+        aggregates, _ = read_aggregates(year, month)
+        first = np.datetime64(f"{year:04d}-{month:02d}-01")
+        month_days = first + np.arange(len(aggregates))
+        keep = (month_days >= days[0]) & (month_days <= days[-1])
+        rows = (month_days[keep] - days[0]).astype(np.intp)
+        out[rows] = aggregates[keep]
+    return days, out
+
+
+def combine(aggregates: np.ndarray) -> dict | None:
+    """Statystyki wielu dni z ich agregatów; None, gdy nie ma żadnej ceny."""
+    has = aggregates[:, COUNT] > 0
+    count = aggregates[has, COUNT].sum()
+    if not count:
+        return None
+    return {
+        "days": int(has.sum()),
+        "hours": int(count),
+        "min": float(aggregates[has, MIN].min()),
+        "max": float(aggregates[has, MAX].max()),
+        "mean": float(aggregates[has, SUM].sum() / count),
+        "negative": int(aggregates[has, NEGATIVE].sum()),
+        "spread": float((aggregates[has, MAX] - aggregates[has, MIN]).mean()),
+    }
+
+
+def range_summary(start, end, sync: bool = True) -> dict | None:
+    """Statystyki zakresu dat z agregatów dni."""
+    return combine(day_stats(start, end, sync)[1])
+
+
+def month_summary(year: int, month: int, sync: bool = True) -> dict | None:
+    """Statystyki miesiąca oraz średnia cena w każdej godzinie zegarowej (hourly_mean)."""
+    if sync:
+        sync_from_csv(months=[(year, month)])
+    if read_meta(year, month) is None:
+        return None
+    aggregates, profile = read_aggregates(year, month)
+    summary = combine(np.asarray(aggregates))
+    if summary is not None:
+        with np.errstate(invalid="ignore"):
+            summary["hourly_mean"] = (profile[0] / profile[1]).tolist()
+    return summary
+
+
+def rolling_mean(day, window: int = 30, sync: bool = True) -> float | None:
+    """Średnia cena z window dni kalendarza kończących się dniem day (włącznie)."""
+    day = _as_date(day)
+    _, aggregates = day_stats(day - timedelta(days=window - 1), day, sync)
+    count = aggregates[:, COUNT].sum()
+    return float(aggregates[:, SUM].sum() / count) if count else None
+
+
+def rolling_means(start, end, window: int = 30, sync: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """(dni, średnie kroczące window dni) dla każdego dnia z [start, end]; NaN bez danych."""
+    start, end = _as_date(start), _as_date(end)
+    days, aggregates = day_stats(start - timedelta(days=window - 1), end, sync)
+    sums = np.concatenate([[0], np.cumsum(aggregates[:, SUM])])
+    counts = np.concatenate([[0], np.cumsum(aggregates[:, COUNT])])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    means = np.full(len(window_sums), np.nan)
+    np.divide(window_sums, window_counts, out=means, where=window_counts > 0)
+    return days[window - 1:], means
+
+
+def rebuild_all() -> int:
+    """Przelicza agregaty wszystkich partycji od nowa; zwraca liczbę partycji."""
+    sync_from_csv()
+    partitions = list_partitions()
+    for year, month in partitions:
+        write_aggregates(year, month, read_grid(year, month))
+    return len(partitions)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == "przelicz":
+        print(f"Przeliczono agregaty {rebuild_all()} partycji")
+    elif sys.argv[1] == "srednia":
+        day = date.fromisoformat(sys.argv[2]) if len(sys.argv) > 2 else date.today()
+        window = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+        mean = rolling_mean(day, window)
+        print(f"Średnia {window} dni do {day}: " + (f"{mean:.2f} PLN/MWh" if mean is not None else "brak danych"))
+    else:
+        year, month = map(int, sys.argv[1].split("-"))
+        summary = month_summary(year, month)
+        if summary is None:
+            print(f"Brak danych dla {year}-{month:02d}")
+            sys.exit(1)
+        last_day = date(year, month, calendar.monthrange(year, month)[1])
+        print(f"{year}-{month:02d}: {summary['days']} dni, {summary['hours']} godzin")
+        print(f"Ceny: min={summary['min']:.2f}, max={summary['max']:.2f}, średnia={summary['mean']:.2f}")
+        print(f"Godzin z ceną ujemną: {summary['negative']}, średnia rozpiętość dnia: {summary['spread']:.2f}")
+        mean_30 = rolling_mean(last_day, 30, sync=False)
+        if mean_30 is not None:
+            print(f"Średnia 30 dni do {last_day}: {mean_30:.2f}")
+        print("Profil godzinowy:")
+        for hour in range(HOURS):
+            print(f"  {hour:2d}-{hour + 1:<2d} {summary['hourly_mean'][hour]:8.2f}")
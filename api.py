@@ -0,0 +1,268 @@
+"""
+Lokalne API HTTP/JSON z cenami TGE RDN dla automatyki domowej.
+
+Przy starcie cały magazyn ładowany jest do pamięci jako indeks:
+  - ceny w kolejnych godzinach UTC (cena w chwili t to jeden odczyt tablicy),
+  - gotowe odpowiedzi JSON dla każdego dnia i miesiąca,
+  - indeks najtańszych okien (okna.py).
+Wątek w tle co --odswiez sekund synchronizuje magazyn z plikami CSV (np.
+po dopisaniu dnia przez demon.py) i przy zmianie podmienia indeks w całości -
+zapytania nigdy nie widzą indeksu w połowie budowy.
+
+Użycie:
+    python api.py [--port=N] [--odswiez=S]
+
+Przykład:
+    python api.py --port=8080
+
+Zapytania (GET, odpowiedzi JSON):
+    /cena?czas=2025-10-26T02:30          cena w chwili (czas lokalny; albo z "Z"/przesunięciem)
+    /dzien/2025-10-26                    wszystkie godziny dnia (23-25), chronologicznie
+    /najtansze?dzien=2025-10-26&godziny=4&okno=3
+                                         K najtańszych godzin i najtańsze okno N godzin
+                                         (domyślnie jutro, K=4, N=3)
+    /miesiac/2025-10                     statystyki miesiąca
+    /stan                                zakres danych i czas zbudowania indeksu
+
+Test obciążenia: python bench_api.py
+"""
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from magazyn import list_partitions, load_grid, partition_dir, sync_from_csv
+from okna import WindowIndex
+from pobierz_dane import get_option
+from siatka import HOURS, REPEAT_SLOT, REPEATED_HOUR, TZ, HourGrid, clock_matrix
+
+DEFAULT_PORT = 8080
+DEFAULT_RELOAD = 5.0
+
+
+def _price(value: float):
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def _json(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def store_signature() -> tuple:
+    """Znacznik stanu magazynu - zmienia się przy każdym imporcie partycji."""
+    signature = []
+    for year, month in list_partitions():
+        path = os.path.join(partition_dir(year, month), "_meta.json")
+        signature.append((year, month, os.stat(path).st_mtime_ns))
+    return tuple(signature)
+
+
+class PriceIndex:
+    """Niezmienny indeks cen w pamięci; przeładowanie tworzy nowy obiekt."""
+
+    def __init__(self, days: np.ndarray, grid_matrix: np.ndarray):
+        self.built = datetime.now(TZ).isoformat(timespec="seconds")
+        self.days = days
+        if not len(days):
+            self.grid = None
+            self.utc_prices = np.empty(0)
+            self.day_responses = {}
+            self.month_responses = {}
+            self.windows = None
+            return
+
+        grid = HourGrid(str(days[0]), str(days[-1]))
+        rows = (days - grid.days[0]).astype(int)
+        full = np.full((len(grid.days), grid.exists.shape[1]), np.nan)
+        full[rows] = grid_matrix
+        self.grid = grid
+
+        # Ceny w kolejnych godzinach UTC od początku siatki
+        utc = grid.utc_hours()
+        self.utc_base = int(grid.utc_start[0])
+        self.utc_prices = np.full(int(grid.utc_start[-1] - grid.utc_start[0]), np.nan)
+        self.utc_prices[utc[grid.exists] - self.utc_base] = full[grid.exists]
+
+        clock = clock_matrix(grid_matrix)
+        self.windows = WindowIndex.from_matrix(days, clock)
+        self.day_responses = {str(d): _json(self._day_payload(grid, full, utc, int(r), str(d)))
+                              for r, d in zip(rows, days)}
+        self.month_responses = self._month_payloads(days, clock)
+
+    @classmethod
+    def build(cls, sync: bool = False) -> "PriceIndex":
+        days, grid_matrix = load_grid(sync=sync)
+        return cls(days, np.asarray(grid_matrix))
+
+    @staticmethod
+    def _day_payload(grid, full, utc, row: int, day: str) -> dict:
+        order = np.argsort(np.where(grid.exists[row], utc[row], np.iinfo(np.int64).max))[:grid.hours[row]]
+        hours = []
+        for slot in order:
+            # Powtórzona godzina (slot 24) to w CSV drugi wiersz z hour_from = REPEATED_HOUR
+            hour_from = REPEATED_HOUR if slot == REPEAT_SLOT else int(slot)
+            hours.append({
+                "hour_from": hour_from,
+                "hour_to": hour_from + 1,
+                "repeated": bool(slot == REPEAT_SLOT),
+                "utc": datetime.fromtimestamp(int(utc[row, slot]) * 3600, timezone.utc).isoformat(),
+                "price": _price(full[row, slot]),
+            })
+        return {"date": day, "hours": hours}
+
+    @staticmethod
+    def _month_payloads(days: np.ndarray, clock: np.ndarray) -> dict:
+        months = days.astype("datetime64[M]")
+        payloads = {}
+        for month in np.unique(months):
+            values = clock[months == month]
+            valid = values[~np.isnan(values)]
+            hourly_mean = np.nanmean(values, axis=0) if len(valid) else np.full(HOURS, np.nan)
+            payloads[str(month)] = _json({
+                "month": str(month),
+                "days": int((months == month).sum()),
+                "min": _price(valid.min()) if len(valid) else None,
+                "max": _price(valid.max()) if len(valid) else None,
+                "mean": _price(valid.mean()) if len(valid) else None,
+                "median": _price(np.median(valid)) if len(valid) else None,
+                "negative_hours": int((valid < 0).sum()),
+                "hourly_mean": [_price(v) for v in hourly_mean],
+            })
+        return payloads
+
+    def price_at(self, moment: datetime) -> float | None:
+        """Cena w chwili moment (datetime ze strefą; bez strefy = czas lokalny)."""
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=TZ)
+        offset = int(moment.timestamp() // 3600) - self.utc_base if self.grid is not None else -1
+        if not 0 <= offset < len(self.utc_prices):
+            return None
+        return _price(self.utc_prices[offset])
+
+    def cheapest(self, day: str, k: int, n: int) -> dict:
+        hours, hours_mean = self.windows.cheapest_hours(day, k)
+        start, window_mean = self.windows.cheapest_window(day, n)
+        return {
+            "date": day,
+            "cheapest_hours": {"hours": hours, "mean": _price(hours_mean)},
+            "cheapest_window": {"start": start if start >= 0 else None, "hours": n, "mean": _price(window_mean)},
+        }
+
+
+class IndexHolder:
+    """Aktualny indeks i wątek przeładowania w tle."""
+
+    def __init__(self, reload_interval: float = DEFAULT_RELOAD):
+        self.reload_interval = reload_interval
+        sync_from_csv()
+        self.signature = store_signature()
+        self.index = PriceIndex.build()
+
+    def reload_if_changed(self) -> bool:
+        sync_from_csv()
+        signature = store_signature()
+        if signature == self.signature:
+            return False
+        index = PriceIndex.build()
+        # Podmiana referencji jest atomowa - trwające zapytania kończą na starym indeksie
+        self.index, self.signature = index, signature
+        return True
+
+    def watch(self):
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                if self.reload_if_changed():
+                    print(f"Przeładowano indeks: {len(self.index.days)} dni")
+            except Exception as e:
+                print(f"Błąd przeładowania indeksu: {e}")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Nagłówki i treść idą osobnymi zapisami - bez TCP_NODELAY keep-alive czeka ~40 ms na ACK
+    disable_nagle_algorithm = True
+    holder: IndexHolder = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        index = self.holder.index
+        parts = url.path.strip("/").split("/")
+        try:
+            if parts[0] == "cena":
+                moment = datetime.fromisoformat(query["czas"].replace("Z", "+00:00"))
+                body = _json({"time": query["czas"], "price": index.price_at(moment)})
+            elif parts[0] == "dzien" and len(parts) == 2:
+                body = index.day_responses.get(parts[1])
+                if body is None:
+                    return self.send_error_json(404, f"Brak dnia {parts[1]}")
+            elif parts[0] == "miesiac" and len(parts) == 2:
+                body = index.month_responses.get(parts[1])
+                if body is None:
+                    return self.send_error_json(404, f"Brak miesiąca {parts[1]}")
+            elif parts[0] == "najtansze":
+                day = query.get("dzien", (datetime.now(TZ).date() + timedelta(days=1)).isoformat())
+                k = int(query.get("godziny", 4))
+                n = int(query.get("okno", 3))
+                if not (1 <= k <= HOURS and 1 <= n <= HOURS):
+                    return self.send_error_json(400, "godziny i okno muszą być w zakresie 1-24")
+                if index.windows is None or day not in index.day_responses:
+                    return self.send_error_json(404, f"Brak dnia {day}")
+                body = _json(index.cheapest(day, k, n))
+            elif parts[0] == "stan":
+                body = _json({
+                    "first_day": str(index.days[0]) if len(index.days) else None,
+                    "last_day": str(index.days[-1]) if len(index.days) else None,
+                    "days": int(len(index.days)),
+                    "built": index.built,
+                })
+            else:
+                return self.send_error_json(404, "Nieznane zapytanie")
+        except (KeyError, ValueError) as e:
+            return self.send_error_json(400, f"Błędne zapytanie: {e}")
+        self.send_body(200, body)
+
+    def send_body(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str):
+        self.send_body(status, _json({"error": message}))
+
+    def log_message(self, format, *args):
+        # Klienci odpytują często - bez logu każdego zapytania
+        pass
+
+
+def serve(port: int = DEFAULT_PORT, reload_interval: float = DEFAULT_RELOAD):
+    t0 = time.perf_counter()
+    holder = IndexHolder(reload_interval)
+    print(f"Indeks: {len(holder.index.days)} dni, zbudowany w {(time.perf_counter() - t0) * 1000:.0f} ms")
+    threading.Thread(target=holder.watch, daemon=True).start()
+    ApiHandler.holder = holder
+    server = ThreadingHTTPServer(("127.0.0.1", port), ApiHandler)
+    server.daemon_threads = True
+    print(f"API: http://127.0.0.1:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Zatrzymano")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    if "--pomoc" in sys.argv or "-h" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    serve(get_option("port", DEFAULT_PORT, int), get_option("odswiez", DEFAULT_RELOAD, float))
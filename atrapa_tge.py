@@ -0,0 +1,329 @@
+"""
+Lokalna atrapa serwisu tge.pl do testów pobierania bez sieci.
+
+Serwuje strony w obu formatach (zbudowane na wzór stron z fixtures/), listę
+raportów archiwum i same raporty:
+
+    /energia-elektryczna-rdn-tge-base?date_start=D&iframe=1    nowy format (URL_NEW)
+    /energia-elektryczna-rdn?date_start=D                       stary format (URL_OLD)
+    /RDN_instrumenty_15                                         lista plików .xlsx z --archiwum
+    /Content/RDN_instrumenty_15/<plik>.xlsx                     raport (ETag, Last-Modified, 304)
+    /_stan                                                      liczniki zapytań (JSON)
+
+Ceny dnia pochodzą z magazynu (magazyn.py), a dla dni spoza magazynu są
+syntetyczne (stałe dla danej daty). Liczba wierszy wynika z siatki godzin
+(siatka.py): 23 przy zmianie czasu na letni, 25 na zimowy (godzina 1-2
+dwukrotnie). Dni po --do (albo bez danych, gdy --tylko-magazyn) mają pustą
+tabelę - jak jutro przed publikacją cen.
+
+Wstrzykiwanie usterek:
+    --opoznienie=MS         opóźnienie przed odpowiedzią (średnia, rozkład wykładniczy)
+    --bledy=P               odsetek odpowiedzi 503 (0-1)
+    --dst=D:23,D:25         wymuszona liczba wierszy wybranych dni
+    --ziarno=N              ziarno losowania opóźnień i błędów
+
+Użycie:
+    python atrapa_tge.py [--port=N] [--archiwum=DIR] [--do=DATA] [--tylko-magazyn] [opcje usterek]
+
+Przykłady:
+    python atrapa_tge.py --port=8811
+    python atrapa_tge.py --opoznienie=200 --bledy=0.05 --dst=2025-12-01:25
+    python demon.py --url="http://127.0.0.1:8811/energia-elektryczna-rdn-tge-base?date_start={d}&iframe=1"
+
+Użycie jako moduł (np. w bench_pobieranie.py):
+    from atrapa_tge import StandIn
+    server = StandIn(latency_ms=50).start()
+    url_new, url_old = server.url_templates()
+"""
+import email.utils
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from pobierz_dane import URL_NEW, URL_OLD, get_option
+
+DEFAULT_PORT = 8811
+FIXTURES_DIR = "fixtures"
+TEMPLATES = {"nowy": "tge_rdn_nowy_2025-12-01.html", "stary": "tge_rdn_stary_2025-03-01.html"}
+PATHS = {urlsplit(URL_NEW).path: "nowy", urlsplit(URL_OLD).path: "stary"}
+TABLE_ID = "footable_kontrakty_godzinowe"
+ARCHIVE_PAGE = "/RDN_instrumenty_15"
+ARCHIVE_FILES = "/Content/RDN_instrumenty_15/"
+
+
+def pl_number(value: float | None) -> str:
+    """1234.5 -> "1 234,50" jak na stronach TGE; None -> "-"."""
+    if value is None:
+        return "-"
+    return f"{value:,.2f}".replace(",", " ").replace(".", ",")
+
+
+def load_template(fmt: str) -> tuple[str, str]:
+    """(początek strony do <tbody> tabeli godzinowej włącznie, reszta od </tbody>)."""
+    with open(os.path.join(FIXTURES_DIR, TEMPLATES[fmt]), encoding="utf-8") as f:
+        page = f.read()
+    # W starym formacie tabela godzinowa jest druga z tym id - pierwsza to indeksy
+    table = page.rindex(f'id="{TABLE_ID}"')
+    body_start = page.index("<tbody>", table) + len("<tbody>")
+    body_end = page.index("</tbody>", body_start)
+    return page[:body_start], page[body_end:]
+
+
+def hour_labels(day: date, forced: int | None = None) -> list[tuple[int, int]]:
+    """(hour_from, hour_to) kolejnych wierszy dnia - wg siatki albo wymuszonej liczby godzin."""
+    from siatka import REPEATED_HOUR, SKIPPED_HOUR, HourGrid
+
+    hours = forced or int(HourGrid(day, day).hours[0])
+    labels = [(h, h + 1) for h in range(24)]
+    if hours == 23:
+        labels.remove((SKIPPED_HOUR, SKIPPED_HOUR + 1))
+    elif hours == 25:
+        labels.insert(REPEATED_HOUR + 1, (REPEATED_HOUR, REPEATED_HOUR + 1))
+    return labels
+
+
+def synthetic_day(day: date, count: int) -> list[tuple[float, float]]:
+    """Stałe dla daty (cena, wolumen) - szczyty rano i wieczorem, dolina w południe."""
+    rng = random.Random(day.toordinal())
+    rows = []
+    for i in range(count):
+        hour = i * 24 / count
+        price = 420 + 180 * (7 <= hour < 9) + 300 * (17 <= hour < 21) - 150 * (11 <= hour < 15)
+        rows.append((round(price + rng.gauss(0, 40), 2), round(rng.uniform(2000, 5000), 1)))
+    return rows
+
+
+class PriceSource:
+    """Ceny dni z magazynu (wczytane raz przy starcie) albo syntetyczne."""
+
+    def __init__(self, store_only: bool = False):
+        self.store_only = store_only
+        self._days = {}
+        try:
+            from magazyn import load_prices
+
+            df = load_prices()
+            for d, part in df.groupby(df["date"].dt.date):
+                self._days[d] = list(zip(part["price_pln_per_mwh"], part["volume_mwh"]))
+        except (ImportError, OSError, ValueError):
+            pass
+
+    def day_rows(self, day: date, forced: int | None = None) -> list[tuple] | None:
+        labels = hour_labels(day, forced)
+        stored = self._days.get(day)
+        if stored is None and self.store_only:
+            return None
+        if stored is None or len(stored) != len(labels):
+            stored = synthetic_day(day, len(labels))
+        clean = [(None if p != p else p, None if v != v else v) for p, v in stored]
+        return [(h_from, h_to, p, v) for (h_from, h_to), (p, v) in zip(labels, clean)]
+
+
+def render_table_rows(rows: list[tuple], fmt: str) -> str:
+    out = []
+    for h_from, h_to, price, volume in rows:
+        cells = [f'<td class="footable-first-column">{h_from}-{h_to}</td>',
+                 f"<td>{pl_number(price)}</td>"]
+        if fmt == "stary":
+            # Fixing I, Fixing II i notowania ciągłe - parser czyta tylko Fixing I
+            other = None if price is None else round(price * 1.01, 2)
+            cells += [f"<td>{pl_number(volume)}</td>", f"<td>{pl_number(other)}</td>", "<td>123,40</td>",
+                      f"<td>{pl_number(other)}</td>", '<td class="footable-last-column">45,60</td>']
+        else:
+            cells.append(f'<td class="footable-last-column">{pl_number(volume)}</td>')
+        out.append("<tr>\n" + "\n".join(cells) + "\n</tr>")
+    return "\n" + "\n".join(out) + "\n"
+
+
+class StandIn:
+    """Serwer atrapy w wątku w tle; wszystkie ustawienia usterek jako atrybuty."""
+
+    def __init__(self, port: int = 0, archive_dir: str = "archiwum", last_day: date | None = None,
+                 store_only: bool = False, latency_ms: float = 0.0, error_rate: float = 0.0,
+                 forced_hours: dict | None = None, seed: int = 0):
+        self.archive_dir = archive_dir
+        self.last_day = last_day
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.forced_hours = forced_hours or {}
+        self.prices = PriceSource(store_only)
+        self.templates = {fmt: load_template(fmt) for fmt in TEMPLATES}
+        self.counters = {"requests": 0, "errors_injected": 0, "not_modified": 0, "bytes_sent": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        handler = type("Handler", (StandInHandler,), {"stand_in": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def url_templates(self) -> tuple[str, str]:
+        """URL_NEW i URL_OLD skierowane na atrapę."""
+        base = f"http://127.0.0.1:{self.port}"
+        return tuple(base + t[len("https://tge.pl"):] for t in (URL_NEW, URL_OLD))
+
+    def start(self) -> "StandIn":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def draw_fault(self) -> tuple[float, bool]:
+        """(opóźnienie w s, czy zwrócić 503) dla kolejnego zapytania."""
+        with self._lock:
+            delay = self._rng.expovariate(1000 / self.latency_ms) if self.latency_ms > 0 else 0.0
+            error = self._rng.random() < self.error_rate
+        return delay, error
+
+    def day_page(self, fmt: str, day: date) -> bytes:
+        head, tail = self.templates[fmt]
+        rows = None
+        if self.last_day is None or day <= self.last_day:
+            rows = self.prices.day_rows(day, self.forced_hours.get(day))
+        head = re.sub(r"dzień dostawy \d{4}-\d{2}-\d{2}", f"dzień dostawy {day}", head)
+        return (head + (render_table_rows(rows, fmt) if rows else "\n") + tail).encode("utf-8")
+
+    def archive_listing(self) -> bytes:
+        names = sorted(f for f in os.listdir(self.archive_dir) if f.endswith(".xlsx")) \
+            if os.path.isdir(self.archive_dir) else []
+        links = "\n".join(f'<li><a href="{ARCHIVE_FILES}{quote(n)}">{n}</a></li>' for n in names)
+        return (f"<!DOCTYPE html>\n<html><body>\n<h1>RDN - instrumenty 15</h1>\n<ul>\n{links}\n</ul>\n"
+                f"</body></html>\n").encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    stand_in: StandIn = None
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            # Klient może zerwać połączenie przed końcem strony (fetch_day przy stronie
+            # dłuższej niż DRAIN_LIMIT) - to nie błąd
+            pass
+
+    def do_GET(self):
+        stand_in = self.stand_in
+        stand_in.count("requests")
+        url = urlsplit(self.path)
+        if url.path == "/_stan":
+            return self.send_body(200, json.dumps(stand_in.counters).encode("utf-8"), "application/json")
+
+        delay, error = stand_in.draw_fault()
+        if delay:
+            time.sleep(delay)
+        if error:
+            stand_in.count("errors_injected")
+            return self.send_body(503, b"Service Unavailable", "text/plain")
+
+        if url.path in PATHS:
+            try:
+                day = date.fromisoformat(parse_qs(url.query)["date_start"][0])
+            except (KeyError, ValueError):
+                return self.send_body(400, b"date_start", "text/plain")
+            return self.send_body(200, stand_in.day_page(PATHS[url.path], day))
+        if url.path == ARCHIVE_PAGE:
+            return self.send_body(200, stand_in.archive_listing())
+        if url.path.startswith(ARCHIVE_FILES):
+            return self.send_file(os.path.basename(unquote(url.path)))
+        self.send_body(404, b"Not Found", "text/plain")
+
+    def send_file(self, name: str):
+        path = os.path.join(self.stand_in.archive_dir, name)
+        if not name.endswith(".xlsx") or not os.path.isfile(path):
+            return self.send_body(404, b"Not Found", "text/plain")
+        st = os.stat(path)
+        etag = '"' + hashlib.sha1(f"{st.st_size}-{st.st_mtime_ns}".encode()).hexdigest()[:16] + '"'
+        last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        since = self.headers.get("If-Modified-Since")
+        if self.headers.get("If-None-Match") == etag or (
+                since and "If-None-Match" not in self.headers
+                and email.utils.parsedate_to_datetime(since).timestamp() >= int(st.st_mtime)):
+            self.stand_in.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        self.send_header("Content-Length", str(st.st_size))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        with open(path, "rb") as f:
+            while chunk := f.read(65536):
+                self.wfile.write(chunk)
+        self.stand_in.count("bytes_sent", st.st_size)
+
+    def send_body(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.stand_in.count("bytes_sent", len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_forced_hours(spec: str | None) -> dict:
+    """"2025-12-01:25,2025-12-02:23" -> {date: liczba godzin}."""
+    forced = {}
+    for item in filter(None, (spec or "").split(",")):
+        day, hours = item.split(":")
+        if int(hours) not in (23, 24, 25):
+            raise ValueError(f"Liczba godzin musi wynosić 23, 24 albo 25: {item}")
+        forced[date.fromisoformat(day)] = int(hours)
+    return forced
+
+
+def main():
+    if "--pomoc" in sys.argv or "-h" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    last_day = get_option("do", None)
+    stand_in = StandIn(
+        port=get_option("port", DEFAULT_PORT, int),
+        archive_dir=get_option("archiwum", "archiwum"),
+        last_day=date.fromisoformat(last_day) if last_day else None,
+        store_only="--tylko-magazyn" in sys.argv,
+        latency_ms=get_option("opoznienie", 0.0, float),
+        error_rate=get_option("bledy", 0.0, float),
+        forced_hours=parse_forced_hours(get_option("dst", None)),
+        seed=get_option("ziarno", 0, int),
+    )
+    url_new, url_old = stand_in.url_templates()
+    print(f"Atrapa TGE: http://127.0.0.1:{stand_in.port}/")
+    print(f"  nowy format:  {url_new}")
+    print(f"  stary format: {url_old}")
+    print(f"  archiwum:     http://127.0.0.1:{stand_in.port}{ARCHIVE_PAGE}")
+    try:
+        stand_in.server.serve_forever()
+    except KeyboardInterrupt:
+        print("Zatrzymano")
+    finally:
+        stand_in.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Test obciążenia API cen (api.py).
+
+Użycie:
+    python bench_api.py [--adres=HOST:PORT] [--klienci=N] [--czas=S]
+
+Przykłady:
+    python bench_api.py                          # uruchamia API w tym procesie na wolnym porcie
+    python bench_api.py --adres=127.0.0.1:8080 --klienci=16 --czas=10
+
+Każdy klient to osobny wątek z jednym połączeniem keep-alive, który w pętli
+wysyła losowe zapytania (cena w chwili, dzień, najtańsze godziny, miesiąc).
+Na końcu wypisywana jest przepustowość oraz percentyle czasu odpowiedzi,
+a także czas samego wyszukiwania w indeksie (bez HTTP).
+"""
+import http.client
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from api import ApiHandler, IndexHolder, PriceIndex
+from pobierz_dane import get_option
+
+DEFAULT_CLIENTS = 8
+DEFAULT_SECONDS = 5.0
+
+
+def sample_queries(index: PriceIndex, count: int = 2000) -> list[str]:
+    """Losowe zapytania z zakresu danych w indeksie (stałe ziarno - wyniki porównywalne)."""
+    rng = random.Random(0)
+    days = [str(d) for d in index.days]
+    months = sorted(index.month_responses)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        day = rng.choice(days)
+        if kind < 0.5:
+            queries.append(f"/cena?czas={day}T{rng.randrange(24):02d}:{rng.randrange(60):02d}")
+        elif kind < 0.75:
+            queries.append(f"/dzien/{day}")
+        elif kind < 0.9:
+            queries.append(f"/najtansze?dzien={day}&godziny={rng.randint(1, 8)}&okno={rng.randint(1, 6)}")
+        else:
+            queries.append(f"/miesiac/{rng.choice(months)}")
+    return queries
+
+
+def client_loop(host: str, port: int, queries: list[str], deadline: float, latencies: list, errors: list):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    i = random.randrange(len(queries))
+    while time.perf_counter() < deadline:
+        path = queries[i % len(queries)]
+        i += 1
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - t0)
+        if response.status != 200:
+            errors.append(f"{response.status} {path}")
+    conn.close()
+
+
+def lookup_latency(index: PriceIndex, count: int = 100_000) -> np.ndarray:
+    """Czasy pojedynczych wyszukiwań price_at w indeksie, bez warstwy HTTP."""
+    rng = random.Random(1)
+    first = datetime.fromisoformat(str(index.days[0]))
+    span = len(index.utc_prices)
+    moments = [first + timedelta(hours=rng.randrange(span), minutes=rng.randrange(60)) for _ in range(count)]
+    times = np.empty(count)
+    for i, moment in enumerate(moments):
+        t0 = time.perf_counter()
+        index.price_at(moment)
+        times[i] = time.perf_counter() - t0
+    return times
+
+
+def start_local_server():
+    from http.server import ThreadingHTTPServer
+
+    ApiHandler.holder = IndexHolder()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ApiHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentiles_ms(values) -> str:
+    p50, p99, p999 = np.percentile(np.asarray(values) * 1000, [50, 99, 99.9])
+    return f"p50 {p50:.3f} ms, p99 {p99:.3f} ms, p99.9 {p999:.3f} ms"
+
+
+if __name__ == "__main__":
+    address = get_option("adres", None)
+    clients = get_option("klienci", DEFAULT_CLIENTS, int)
+    seconds = get_option("czas", DEFAULT_SECONDS, float)
+
+    server = None
+    if address:
+        host, port = address.rsplit(":", 1)
+        port = int(port)
+        index = PriceIndex.build()
+    else:
+        server = start_local_server()
+        host, port = server.server_address
+        index = ApiHandler.holder.index
+    if not len(index.days):
+        raise SystemExit("Brak danych w magazynie (python magazyn.py importuj)")
+
+    times = lookup_latency(index)
+    print(f"Wyszukiwanie w indeksie: {len(times)} zapytań, {percentiles_ms(times)}")
+
+    queries = sample_queries(index)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client_loop, args=(host, port, queries, deadline, latencies, errors))
+               for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    print(f"HTTP {host}:{port}, klienci: {clients}, czas: {elapsed:.1f} s")
+    print(f"Zapytań: {len(latencies)} ({len(latencies) / elapsed:.0f}/s), błędów: {len(errors)}")
+    if latencies:
+        print(f"Czas odpowiedzi: {percentiles_ms(latencies)}")
+    if errors:
+        print(f"Pierwszy błąd: {errors[0]}")
+    if server is not None:
+        server.shutdown()
@@ -0,0 +1,80 @@
+"""
+Benchmark parsera tabeli godzinowej TGE: dotychczasowy kod fetch_day vs parser_tge.
+
+Użycie:
+    python bench_parser.py [liczba_powtórzeń]
+
+Przykład:
+    python bench_parser.py 200
+
+Parsuje zapisane strony z katalogu fixtures/ (nowy i stary format) i wypisuje
+liczbę wierszy na sekundę dla obu implementacji.
+"""
+import os
+import re
+import sys
+import time
+
+from lxml import html
+
+from parser_tge import parse_hourly_table
+
+FIXTURES_DIR = "fixtures"
+
+
+def pl_number_to_float(s: str) -> float | None:
+    s = s.strip()
+    if s == "-" or s == "":
+        return None
+    # "3 759,20" -> 3759.20
+    s = s.replace("\xa0", "").replace(" ", "").replace(",", ".")
+    return float(s)
+
+
+def legacy_parse(content: bytes):
+    """Dotychczasowa ścieżka z fetch_day: drzewo całej strony, XPath i regex na wiersz."""
+    tree = html.fromstring(content)
+    table = tree.xpath('//table[@id="footable_kontrakty_godzinowe"]//tbody//tr')
+    rows = []
+    for tr in table:
+        cells = tr.xpath('.//td')
+        if len(cells) >= 3:
+            time_text = cells[0].text_content().strip()
+            time_match = re.match(r"(\d{1,2})-(\d{1,2})", time_text)
+            if not time_match:
+                continue
+            h_from = int(time_match.group(1))
+            h_to = int(time_match.group(2))
+            price = pl_number_to_float(cells[1].text_content().strip())
+            vol = pl_number_to_float(cells[2].text_content().strip())
+            rows.append((h_from, h_to, price, vol))
+    return rows
+
+
+def measure(parse, content: bytes, repeat: int) -> tuple[float, int]:
+    """Zwraca (wiersze/s, liczba wierszy na stronę)."""
+    n_rows = len(parse(content))
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        parse(content)
+    elapsed = time.perf_counter() - t0
+    return n_rows * repeat / elapsed, n_rows
+
+
+def fixture_files() -> list[str]:
+    return sorted(os.path.join(FIXTURES_DIR, f) for f in os.listdir(FIXTURES_DIR) if f.endswith(".html"))
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"{'plik':<40} {'KB':>6} {'stary [w/s]':>12} {'nowy [w/s]':>12} {'zysk':>6}")
+    for path in fixture_files():
+        with open(path, "rb") as f:
+            content = f.read()
+        if legacy_parse(content) != parse_hourly_table(content):
+            raise RuntimeError(f"{path}: wyniki parserów się różnią")
+        old_rate, _ = measure(legacy_parse, content, repeat)
+        new_rate, _ = measure(parse_hourly_table, content, repeat)
+        print(f"{os.path.basename(path):<40} {len(content) / 1024:>6.0f} "
+              f"{old_rate:>12.0f} {new_rate:>12.0f} {new_rate / old_rate:>5.1f}x")
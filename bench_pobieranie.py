@@ -0,0 +1,98 @@
+"""
+Test obciążenia pobierania dni (pobierz_dane.fetch_day) na atrapie TGE (atrapa_tge.py).
+
+Użycie:
+    python bench_pobieranie.py [--watki=1,2,4,8] [--dni=N] [--format=nowy|stary]
+                               [--opoznienie=MS] [--bledy=P] [--adres=HOST:PORT]
+
+Przykłady:
+    python bench_pobieranie.py                              # atrapa w tym procesie, bez usterek
+    python bench_pobieranie.py --opoznienie=50 --watki=1,4,16
+    python bench_pobieranie.py --format=stary --bledy=0.05
+    python bench_pobieranie.py --adres=127.0.0.1:8811       # atrapa uruchomiona osobno
+
+Dla każdej liczby wątków pobierane jest --dni kolejnych dni (bez cache i bez
+limitu zapytań) jedną sesją keep-alive, jak w fetch_days. Wypisywana jest
+przepustowość (dni/s), percentyle czasu pobrania i sparsowania jednego dnia
+oraz liczba błędów (np. wstrzykniętych 503).
+"""
+import contextlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from atrapa_tge import StandIn
+from pobierz_dane import URL_NEW, URL_OLD, fetch_day, get_option, make_session
+
+DEFAULT_LEVELS = "1,2,4,8"
+DEFAULT_DAYS = 200
+FIRST_DAY = date(2025, 1, 1)
+
+
+def run_level(url_template: str, days: list[date], workers: int) -> dict:
+    """Pobiera dni w `workers` wątkach; zwraca czasy pojedynczych dni i błędy."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def one(d: date):
+        t0 = time.perf_counter()
+        try:
+            fetch_day(d, url_template, session, use_cache=False)
+        except Exception as e:
+            with lock:
+                errors.append(f"{d}: {e}")
+            return
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+
+    with make_session(workers) as session:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(one, days))
+        elapsed = time.perf_counter() - t0
+    return {"workers": workers, "elapsed": elapsed, "latencies": latencies, "errors": errors}
+
+
+def format_result(result: dict) -> str:
+    ok = len(result["latencies"])
+    line = f"wątki {result['workers']:>3}: {ok / result['elapsed']:8.1f} dni/s, błędów: {len(result['errors']):>3}"
+    if ok:
+        p50, p99, p999 = np.percentile(np.asarray(result["latencies"]) * 1000, [50, 99, 99.9])
+        line += f", p50 {p50:7.2f} ms, p99 {p99:7.2f} ms, p99.9 {p999:7.2f} ms"
+    return line
+
+
+if __name__ == "__main__":
+    levels = [int(n) for n in get_option("watki", DEFAULT_LEVELS).split(",")]
+    n_days = get_option("dni", DEFAULT_DAYS, int)
+    fmt = get_option("format", "nowy")
+    address = get_option("adres", None)
+
+    server = None
+    if address:
+        base = f"http://{address}"
+        url_template = base + (URL_OLD if fmt == "stary" else URL_NEW)[len("https://tge.pl"):]
+    else:
+        server = StandIn(latency_ms=get_option("opoznienie", 0.0, float),
+                         error_rate=get_option("bledy", 0.0, float)).start()
+        url_new, url_old = server.url_templates()
+        url_template = url_old if fmt == "stary" else url_new
+
+    days = [FIRST_DAY + timedelta(days=i) for i in range(n_days)]
+    print(f"Atrapa: {url_template}")
+    print(f"Format: {fmt}, dni na poziom: {n_days}")
+    for workers in levels:
+        # fetch_day wypisuje każdy adres - w teście obciążenia tylko przeszkadza
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_level(url_template, days, workers)
+        print(format_result(result))
+        if result["errors"]:
+            print(f"  pierwszy błąd: {result['errors'][0]}")
+    if server is not None:
+        print(f"Liczniki atrapy: {server.counters}")
+        server.stop()
@@ -0,0 +1,96 @@
+"""
+Benchmark rysowania heatmap: etykiety ax.text na komórkę vs jedna kolekcja ścieżek.
+
+Użycie:
+    python bench_render.py [rok] [powtórzenia]
+
+Przykład:
+    python bench_render.py 2025 3
+
+Dla każdego trybu rysuje heatmapę jednego miesiąca (jak generuj_heatmap.py)
+oraz zestawienie 4x3 całego roku (jak all.png.py), zapisuje PNG do katalogu
+tymczasowego i wypisuje najlepszy czas oraz różnicę pikseli między trybami.
+"""
+import os
+import sys
+import time
+import tempfile
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+
+from generuj_heatmap import split_months
+from magazyn import load_day_matrix
+from wykres import LABEL_MODES, VMAX, VMIN, draw_cell_labels, make_cmap
+
+
+def month_matrices(year: int) -> dict:
+    """Zwraca {miesiąc: macierz dni x 24} dla podanego roku."""
+    days, matrix = load_day_matrix(f"{year}-01-01", f"{year}-12-31")
+    return {month: values for month, (_, values) in split_months(days, matrix).items()}
+
+
+def render_month(values, mode: str, out_file: str):
+    fig, ax = plt.subplots(figsize=(14, 10))
+    ax.imshow(values, aspect="auto", cmap=make_cmap(), vmin=VMIN, vmax=VMAX)
+    draw_cell_labels(ax, values, fontsize=6, mode=mode)
+    fig.tight_layout()
+    fig.savefig(out_file, dpi=150)
+    plt.close(fig)
+
+
+def render_year_grid(matrices: dict, mode: str, out_file: str):
+    fig, axes = plt.subplots(4, 3, figsize=(24, 28))
+    cmap = make_cmap()
+    for idx, month in enumerate(sorted(matrices)[:12]):
+        ax = axes[idx // 3, idx % 3]
+        ax.imshow(matrices[month], aspect="auto", cmap=cmap, vmin=VMIN, vmax=VMAX)
+        draw_cell_labels(ax, matrices[month], fontsize=4, mode=mode)
+    fig.savefig(out_file, dpi=150)
+    plt.close(fig)
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def pixel_difference(file_a: str, file_b: str) -> float:
+    """Odsetek pikseli różniących się o więcej niż 20% w którymkolwiek kanale."""
+    a = plt.imread(file_a)
+    b = plt.imread(file_b)
+    return float((np.abs(a - b).max(axis=2) > 0.2).mean())
+
+
+if __name__ == "__main__":
+    year = int(sys.argv[1]) if len(sys.argv) > 1 else 2025
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    matrices = month_matrices(year)
+    first_month = matrices[min(matrices)]
+    out_dir = tempfile.mkdtemp(prefix="bench_render_")
+
+    # Rozgrzewka: wczytanie czcionek i cache ścieżek nie powinny wpływać na wynik
+    for mode in LABEL_MODES:
+        render_month(first_month, mode, os.path.join(out_dir, "warmup.png"))
+
+    print(f"{'wykres':<14} {'tryb':<6} {'etykiet':>8} {'czas [s]':>9}")
+    for name, render, data, n_labels in (
+        ("miesiąc", render_month, first_month, int(np.sum(~np.isnan(first_month)))),
+        ("rok 4x3", render_year_grid, matrices, sum(int(np.sum(~np.isnan(m))) for m in matrices.values())),
+    ):
+        files = {}
+        for mode in LABEL_MODES:
+            files[mode] = os.path.join(out_dir, f"{name.replace(' ', '_')}_{mode}.png")
+            elapsed = best_time(lambda: render(data, mode, files[mode]), repeat)
+            print(f"{name:<14} {mode:<6} {n_labels:>8} {elapsed:>9.2f}")
+        diff = pixel_difference(files["text"], files["batch"])
+        print(f"{name:<14} różnica pikseli text/batch: {diff:.2%}")
+
+    print(f"\nObrazy zapisane w {out_dir}")
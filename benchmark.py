@@ -0,0 +1,315 @@
+"""
+Zestaw benchmarków całego przetwarzania - działa bez sieci, wyniki porównywalne między commitami.
+
+Etapy:
+    parse_nowy / parse_stary   parsowanie tabeli godzinowej (fetch_day) na stronach z fixtures/
+    excel                      konwertuj_excel.parse_excel_file na raportach z archiwum/
+    import                     import CSV miesięcy do magazynu (od zera)
+    load_prices                wczytanie wszystkich cen z magazynu jako DataFrame
+    groupby_pivot              dawna ścieżka heatmap: groupby(dzień, godzina) + pivot
+    day_matrix                 gotowa macierz dni x 24 z magazynu (load_day_matrix)
+    render_month               generate_heatmap jednego miesiąca
+    render_year                generate_year_composite (siatka 4x3)
+
+Zbiory danych: "repo" (pliki tge_rdn_hourly_*.csv z repozytorium) oraz
+syntetyczne "synt_<N>l" - N lat cen godzinowych z poprawną zmianą czasu,
+generowanych ze stałym ziarnem. Każdy zbiór przetwarzany jest w osobnym
+katalogu tymczasowym, więc magazyn i obrazy w repozytorium nie są ruszane.
+
+Użycie:
+    python benchmark.py [--lata=1,4,16] [--powtorzenia=N] [--etapy=a,b] [--wynik=PLIK]
+    python benchmark.py --porownaj=STARY.json [NOWY.json]
+
+Przykłady:
+    python benchmark.py                                   # zapis do bench_wyniki/<commit>.json
+    python benchmark.py --lata=1,10 --etapy=import,day_matrix
+    python benchmark.py --porownaj=bench_wyniki/150c8d1.json
+
+Każdy etap mierzony jest --powtorzenia razy (domyślnie 3); raportowane są
+czas minimalny i mediana. --porownaj zestawia dwa pliki wyników (albo plik
+z bieżącym przebiegiem) i wypisuje stosunek median.
+"""
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from pobierz_dane import get_option
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = {
+    "parse_nowy": os.path.join(REPO_DIR, "fixtures", "tge_rdn_nowy_2025-12-01.html"),
+    "parse_stary": os.path.join(REPO_DIR, "fixtures", "tge_rdn_stary_2025-03-01.html"),
+}
+ARCHIVE_GLOB = os.path.join(REPO_DIR, "archiwum", "Raport_RDN_*.xlsx")
+RESULTS_DIR = "bench_wyniki"
+STAGES = ("parse_nowy", "parse_stary", "excel", "import", "load_prices", "groupby_pivot",
+          "day_matrix", "render_month", "render_year")
+DEFAULT_YEARS = (1, 4, 16)
+DEFAULT_REPEAT = 3
+SYNTHETIC_FIRST_YEAR = 2010
+
+
+def git_commit() -> tuple[str, bool]:
+    """(skrót commita, czy są niezatwierdzone zmiany) - albo ("brak", False) poza gitem."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip() != ""
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "brak", False
+
+
+def measure(func, repeat: int) -> tuple[list[float], object]:
+    """Czasy kolejnych wywołań i wynik ostatniego."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    return times, result
+
+
+def synthetic_prices(first_year: int, years: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Ceny godzinowe w formacie CSV pobierz_dane.py dla `years` lat od first_year.
+
+    Kształt dnia (szczyty rano i wieczorem), sezonowość i szum; doby 23- i
+    25-godzinne zgodnie z siatką (siatka.py), ze stałym ziarnem.
+    """
+    from siatka import REPEAT_SLOT, REPEATED_HOUR, HourGrid
+
+    grid = HourGrid(date(first_year, 1, 1), date(first_year + years - 1, 12, 31))
+    rng = np.random.default_rng(seed)
+    rows, slots = np.nonzero(grid.exists)
+    hour_from = np.where(slots == REPEAT_SLOT, REPEATED_HOUR, slots)
+    day_of_year = (grid.days[rows] - grid.days[rows].astype("datetime64[Y]")).astype(int)
+    daily = 120 * np.exp(-((hour_from - 8) ** 2) / 6) + 200 * np.exp(-((hour_from - 19) ** 2) / 5)
+    solar = -180 * np.exp(-((hour_from - 13) ** 2) / 8) * (1 + np.cos((day_of_year - 172) / 365 * 2 * np.pi)) / 2
+    season = 80 * np.cos(day_of_year / 365 * 2 * np.pi)
+    price = 380 + daily + solar + season + rng.normal(0, 60, len(rows))
+    # Powtórzona godzina po pierwszym wystąpieniu (kolejność jak w plikach TGE)
+    order = np.lexsort((np.where(slots == REPEAT_SLOT, REPEATED_HOUR + 0.5, slots), rows))
+    return pd.DataFrame({
+        "date": grid.days[rows].astype(str),
+        "hour_from": hour_from,
+        "hour_to": hour_from + 1,
+        "price_pln_per_mwh": price.round(2),
+        "volume_mwh": rng.uniform(2000, 6000, len(rows)).round(1),
+    }).iloc[order]
+
+
+def write_month_csvs(df: pd.DataFrame, out_dir: str) -> int:
+    """Zapisuje ceny jako pliki tge_rdn_hourly_YYYY-MM.csv; zwraca liczbę plików."""
+    months = df["date"].str[:7]
+    for month, part in df.groupby(months, sort=True):
+        part.to_csv(os.path.join(out_dir, f"tge_rdn_hourly_{month}.csv"), index=False)
+    return months.nunique()
+
+
+def prepare_dataset(name: str, work_dir: str) -> dict:
+    """Tworzy pliki CSV zbioru w work_dir; zwraca opis zbioru."""
+    if name == "repo":
+        files = sorted(glob.glob(os.path.join(REPO_DIR, "tge_rdn_hourly_????-??.csv")))
+        for path in files:
+            shutil.copy(path, work_dir)
+        rows = sum(len(pd.read_csv(p)) for p in files)
+        return {"name": name, "months": len(files), "rows": rows}
+    years = int(name.removeprefix("synt_").removesuffix("l"))
+    df = synthetic_prices(SYNTHETIC_FIRST_YEAR, years)
+    return {"name": name, "months": write_month_csvs(df, work_dir), "rows": len(df)}
+
+
+def bench_parsers(repeat: int, stages) -> list[dict]:
+    from pobierz_dane import parse_day
+
+    results = []
+    for stage in ("parse_nowy", "parse_stary"):
+        if stage not in stages:
+            continue
+        with open(FIXTURES[stage], "rb") as f:
+            content = f.read()
+        d = date.fromisoformat(FIXTURES[stage][-15:-5])
+        # Jedno parsowanie trwa ułamek milisekundy - mierzymy paczki po 50
+        times, rows = measure(lambda: [parse_day(d, content) for _ in range(50)][-1], repeat)
+        results.append(result_entry(stage, "fixtures", times, len(rows) * 50, "wierszy"))
+    return results
+
+
+def bench_excel(repeat: int) -> list[dict]:
+    from konwertuj_excel import parse_excel_file
+
+    files = sorted(glob.glob(ARCHIVE_GLOB))
+    if not files:
+        print("  excel: brak plików w archiwum/, pomijam")
+        return []
+    times, _ = measure(lambda: [parse_excel_file(f) for f in files], repeat)
+    return [result_entry("excel", "archiwum", times, len(files), "plików")]
+
+
+def bench_dataset(dataset: str, repeat: int, stages) -> list[dict]:
+    """Etapy magazynu i rysowania na jednym zbiorze danych, w katalogu tymczasowym."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import magazyn
+    from generuj_heatmap import generate_heatmap, generate_year_composite
+
+    results = []
+    cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix=f"bench_{dataset}_")
+    try:
+        info = prepare_dataset(dataset, work_dir)
+        # Magazyn i dane używają ścieżek względnych - katalog roboczy izoluje cały zbiór
+        os.chdir(work_dir)
+        print(f"  {dataset}: {info['months']} miesięcy, {info['rows']} wierszy")
+
+        def import_all():
+            shutil.rmtree(magazyn.STORE_DIR, ignore_errors=True)
+            return magazyn.sync_from_csv(".")
+
+        times, _ = measure(import_all, repeat)
+        if "import" in stages:
+            results.append(result_entry("import", dataset, times, info["rows"], "wierszy"))
+
+        if "load_prices" in stages:
+            times, _ = measure(lambda: magazyn.load_prices(sync=False), repeat)
+            results.append(result_entry("load_prices", dataset, times, info["rows"], "wierszy"))
+        if "groupby_pivot" in stages:
+            df = magazyn.load_prices(sync=False)
+
+            def groupby_pivot():
+                df["day"] = df["date"].dt.normalize()
+                grouped = df.groupby(["day", "hour_from"], as_index=False).agg({"price_pln_per_mwh": "mean"})
+                return grouped.pivot(index="day", columns="hour_from", values="price_pln_per_mwh")
+
+            times, _ = measure(groupby_pivot, repeat)
+            results.append(result_entry("groupby_pivot", dataset, times, info["rows"], "wierszy"))
+        if "day_matrix" in stages:
+            times, _ = measure(lambda: magazyn.load_day_matrix(sync=False), repeat)
+            results.append(result_entry("day_matrix", dataset, times, info["rows"], "wierszy"))
+
+        year, month = magazyn.list_partitions()[-1]
+        if "render_month" in stages:
+            times, _ = measure(lambda: generate_heatmap(f"{year}-{month:02d}", sync=False), repeat)
+            results.append(result_entry("render_month", dataset, times, 1, "wykresów"))
+        if "render_year" in stages:
+            times, _ = measure(lambda: generate_year_composite(year, "all", sync=False), repeat)
+            results.append(result_entry("render_year", dataset, times, 1, "wykresów"))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def result_entry(stage: str, dataset: str, times: list[float], items: int, unit: str) -> dict:
+    median = statistics.median(times)
+    entry = {
+        "stage": stage,
+        "dataset": dataset,
+        "seconds_min": min(times),
+        "seconds_median": median,
+        "repeat": len(times),
+        "items": items,
+        "unit": unit,
+        "per_second": items / median if median > 0 else None,
+    }
+    rate = entry["per_second"] or 0
+    print(f"  {stage:<14} {dataset:<10} {median * 1000:>10.1f} ms  ({rate:,.{0 if rate >= 10 else 2}f} {unit}/s)")
+    return entry
+
+
+def run_suite(years=DEFAULT_YEARS, repeat: int = DEFAULT_REPEAT, stages=STAGES) -> dict:
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "repeat": repeat,
+        "results": [],
+    }
+    print(f"Benchmark commita {commit}{' (ze zmianami)' if dirty else ''}, powtórzenia: {repeat}")
+    report["results"] += bench_parsers(repeat, stages)
+    if "excel" in stages:
+        report["results"] += bench_excel(repeat)
+    dataset_stages = set(stages) - {"parse_nowy", "parse_stary", "excel"}
+    if dataset_stages:
+        for dataset in ["repo"] + [f"synt_{n}l" for n in years]:
+            # Rysowanie nie zależy od liczby lat - mierzymy je tylko na danych z repozytorium
+            current = dataset_stages if dataset == "repo" else dataset_stages - {"render_month", "render_year"}
+            if current:
+                report["results"] += bench_dataset(dataset, repeat, current)
+    return report
+
+
+def compare(old: dict, new: dict):
+    """Wypisuje mediany obu przebiegów i ich stosunek dla wspólnych etapów."""
+    old_results = {(r["stage"], r["dataset"]): r for r in old["results"]}
+    print(f"{'etap':<14} {'zbiór':<10} {old['commit']:>10} {new['commit']:>10}   zmiana")
+    for r in new["results"]:
+        key = (r["stage"], r["dataset"])
+        if key not in old_results:
+            continue
+        before = old_results[key]["seconds_median"]
+        after = r["seconds_median"]
+        ratio = after / before if before > 0 else float("nan")
+        marker = "  wolniej" if ratio > 1.1 else ("  szybciej" if ratio < 0.9 else "")
+        print(f"{r['stage']:<14} {r['dataset']:<10} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms   "
+              f"x{ratio:.2f}{marker}")
+
+
+def load_report(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    if "--pomoc" in sys.argv or "-h" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+
+    baseline = get_option("porownaj", None)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if baseline and args:
+        compare(load_report(baseline), load_report(args[0]))
+        sys.exit(0)
+
+    years = tuple(int(y) for y in get_option("lata", ",".join(map(str, DEFAULT_YEARS))).split(",") if y)
+    stages = tuple(get_option("etapy", ",".join(STAGES)).split(","))
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        print(f"Nieznane etapy: {', '.join(sorted(unknown))} (dostępne: {', '.join(STAGES)})")
+        sys.exit(1)
+
+    report = run_suite(years, get_option("powtorzenia", DEFAULT_REPEAT, int), stages)
+    out_path = get_option("wynik", None)
+    if out_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        suffix = "-zmiany" if report["dirty"] else ""
+        out_path = os.path.join(RESULTS_DIR, f"{report['commit']}{suffix}.json")
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, out_path)
+    print(f"\nWyniki zapisane w {out_path}")
+
+    if baseline:
+        print()
+        compare(load_report(baseline), report)
@@ -0,0 +1,216 @@
+"""
+Usługa pobierająca codziennie ceny TGE RDN na następny dzień dostawy.
+
+Ceny na jutro publikowane są raz dziennie (ok. 10:30-13:00). Usługa co
+--co sekund sprawdza, czy są już dostępne, a gdy się pojawią:
+  - dopisuje dzień do tge_rdn_hourly_YYYY-MM.csv i importuje miesiąc do magazynu,
+  - przerysowuje tylko heatmapę tego miesiąca (w osobnym procesie),
+  - zapisuje najnowsze ceny do pliku JSON (atomowo) i rozsyła je
+    podłączonym klientom TCP.
+
+Po znalezieniu cen na jutro usługa czeka do --od następnego dnia.
+
+Użycie:
+    python demon.py [opcje]
+
+Opcje:
+    --url=SZABLON    Szablon URL z {d} (domyślnie nowy format tge.pl) - np. lokalna atrapa
+    --co=S           Odstęp między próbami w sekundach (domyślnie 300)
+    --od=HH:MM       Od której godziny szukać cen na jutro (domyślnie 10:00)
+    --port=N         Port TCP dla klientów na 127.0.0.1 (domyślnie 8765, 0 = bez gniazda)
+    --plik=ŚCIEŻKA   Plik z najnowszymi cenami (domyślnie najnowsze_ceny.json)
+    --dzis=RRRR-MM-DD  Udawana data dzisiejsza (testy na archiwalnych danych)
+    --raz            Jedna próba pobrania i koniec (np. z crona)
+    --bez-wykresu    Nie przerysowuj heatmapy
+
+Przykłady:
+    python demon.py
+    python demon.py --url="http://127.0.0.1:8000/energia-elektryczna-rdn-tge-base?date_start={d}&iframe=1" \\
+                    --dzis=2025-11-30 --co=5
+
+Protokół gniazda: po połączeniu klient dostaje od razu jedną linię JSON
+z najnowszymi cenami, a potem kolejną linię przy każdym nowym dniu:
+    {"date": "2025-12-01", "prices": [[0, 1, 512.3], ...], "published": "..."}
+Klient, który nie odbierze linii w SEND_TIMEOUT sekund, jest rozłączany -
+wolny odbiorca nie wstrzymuje pobierania ani wysyłki do pozostałych.
+
+    nc 127.0.0.1 8765
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import requests
+
+from generuj_wszystko import _init_worker, _render
+from magazyn import import_csv
+from pobierz_dane import URL_NEW, fetch_day, get_option, merge_month_csv, month_csv_path, read_month_csv
+
+DEFAULT_INTERVAL = 300
+DEFAULT_START = "10:00"
+DEFAULT_PORT = 8765
+LATEST_FILE = "najnowsze_ceny.json"
+SEND_TIMEOUT = 5.0
+
+
+def append_day(d: date, rows) -> str:
+    """Dopisuje dzień do CSV jego miesiąca (atomowo) i importuje miesiąc do magazynu."""
+    path = month_csv_path(d.year, d.month)
+    merge_month_csv(path, {d: rows})
+    import_csv(path)
+    return path
+
+
+def day_message(d: date, rows) -> dict:
+    return {
+        "date": d.isoformat(),
+        "prices": [[h_from, h_to, price] for h_from, h_to, price, _ in rows],
+        "published": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write_latest(path: str, message: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(message, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+class PriceDaemon:
+    """Pętla odpytywania i rozgłaszania nowych cen."""
+
+    def __init__(self, url_template: str = URL_NEW, interval: float = DEFAULT_INTERVAL,
+                 start_time: str = DEFAULT_START, latest_file: str = LATEST_FILE,
+                 today: date | None = None, render: bool = True):
+        self.url_template = url_template
+        self.interval = interval
+        self.start_hour, self.start_minute = (int(x) for x in start_time.split(":"))
+        self.latest_file = latest_file
+        # Przesunięcie względem prawdziwej daty, żeby --dzis "płynęło" razem z zegarem
+        self.day_shift = (today - date.today()) if today else timedelta(0)
+        self.render = render
+        self.latest = None
+        self.clients = set()
+        self.session = requests.Session()
+        self.pool = ProcessPoolExecutor(max_workers=1, initializer=_init_worker) if render else None
+        if os.path.exists(latest_file):
+            with open(latest_file, encoding="utf-8") as f:
+                self.latest = json.load(f)
+
+    def today(self) -> date:
+        return date.today() + self.day_shift
+
+    def missing_days(self) -> list[date]:
+        """Dzisiejszy i jutrzejszy dzień, których brakuje w CSV miesiąca."""
+        today = self.today()
+        days = [today, today + timedelta(days=1)]
+        return [d for d in days if d not in read_month_csv(month_csv_path(d.year, d.month))]
+
+    async def poll_once(self) -> list[date]:
+        """Jedna próba pobrania brakujących dni; zwraca dni dopisane do danych."""
+        added = []
+        for d in self.missing_days():
+            try:
+                # requests jest blokujące - pobieranie w wątku nie zatrzymuje gniazda
+                rows = await asyncio.to_thread(fetch_day, d, self.url_template, self.session, None, True)
+            except (requests.RequestException, RuntimeError) as e:
+                print(f"[{datetime.now():%H:%M:%S}] {d}: brak danych ({e})")
+                continue
+            path = await asyncio.to_thread(append_day, d, rows)
+            print(f"[{datetime.now():%H:%M:%S}] {d}: {len(rows)} godzin -> {path}")
+            message = day_message(d, rows)
+            if self.latest is None or message["date"] >= self.latest["date"]:
+                self.latest = message
+                write_latest(self.latest_file, message)
+                await self.broadcast(message)
+            added.append(d)
+        if added and self.render:
+            for month in sorted({f"{d.year}-{d.month:02d}" for d in added}):
+                loop = asyncio.get_running_loop()
+                out_file, elapsed = await loop.run_in_executor(self.pool, _render, ("month", month, "batch"))
+                print(f"[{datetime.now():%H:%M:%S}] {out_file} ({elapsed:.1f} s)")
+        return added
+
+    def seconds_to_next_poll(self) -> float:
+        """Po komplecie danych czekamy do --od jutra, w przeciwnym razie --co sekund."""
+        if self.missing_days():
+            return self.interval
+        now = datetime.now()
+        next_start = (now + timedelta(days=1)).replace(hour=self.start_hour, minute=self.start_minute,
+                                                       second=0, microsecond=0)
+        return max((next_start - now).total_seconds(), self.interval)
+
+    async def send(self, writer: asyncio.StreamWriter, line: bytes):
+        """Wysyła linię jednemu klientowi; rozłącza go po błędzie albo po SEND_TIMEOUT."""
+        try:
+            writer.write(line)
+            await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+        except (ConnectionError, asyncio.TimeoutError):
+            self.clients.discard(writer)
+            writer.transport.abort()
+
+    async def broadcast(self, message: dict):
+        # Wszyscy klienci naraz - czas wysyłki to najwyżej SEND_TIMEOUT, a nie suma po klientach
+        line = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        await asyncio.gather(*(self.send(writer, line) for writer in list(self.clients)))
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.clients.add(writer)
+        try:
+            if self.latest is not None:
+                await self.send(writer, (json.dumps(self.latest, ensure_ascii=False) + "\n").encode("utf-8"))
+            # Klient tylko słucha - czekamy na rozłączenie
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def run(self, port: int = DEFAULT_PORT, once: bool = False):
+        server = None
+        if port and not once:
+            server = await asyncio.start_server(self.handle_client, "127.0.0.1", port)
+            print(f"Gniazdo z najnowszymi cenami: 127.0.0.1:{port}")
+        try:
+            while True:
+                t0 = time.perf_counter()
+                await self.poll_once()
+                if once:
+                    break
+                delay = self.seconds_to_next_poll()
+                print(f"[{datetime.now():%H:%M:%S}] próba trwała {time.perf_counter() - t0:.1f} s, "
+                      f"następna za {delay / 60:.0f} min")
+                await asyncio.sleep(delay)
+        finally:
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+            if self.pool is not None:
+                self.pool.shutdown()
+            self.session.close()
+
+
+if __name__ == "__main__":
+    if "--pomoc" in sys.argv or "-h" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+
+    today = get_option("dzis", None, date.fromisoformat)
+    daemon = PriceDaemon(
+        url_template=get_option("url", URL_NEW),
+        interval=get_option("co", DEFAULT_INTERVAL, float),
+        start_time=get_option("od", DEFAULT_START),
+        latest_file=get_option("plik", LATEST_FILE),
+        today=today,
+        render="--bez-wykresu" not in sys.argv,
+    )
+    try:
+        asyncio.run(daemon.run(get_option("port", DEFAULT_PORT, int), once="--raz" in sys.argv))
+    except KeyboardInterrupt:
+        print("Zatrzymano")
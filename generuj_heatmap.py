@@ -2,68 +2,95 @@
 Skrypt do generowania heatmapy z danych TGE RDN.
 
 Użycie:
-    python generuj_heatmap.py <plik_csv>
+    python generuj_heatmap.py <YYYY-MM | plik_csv> [--etykiety=batch|text] [--rozdzielczosc=60|15]
+    python generuj_heatmap.py <YYYY> [all|column] [--etykiety=batch|text]
+    (dodatkowo --profile[=PLIK] [--cprofile=ETAP] - raport etapów, patrz profil.py)
 
 Przykłady:
-    python generuj_heatmap.py tge_rdn_hourly_2025-03.csv
-    python generuj_heatmap.py tge_rdn_hourly_2025-12.csv
+    python generuj_heatmap.py 2025-03                      # miesiąc z magazynu
+    python generuj_heatmap.py tge_rdn_hourly_2025-12.csv   # plik CSV (importowany do magazynu)
+    python generuj_heatmap.py 2025-10 --rozdzielczosc=15   # natywne ceny 15-minutowe
+    python generuj_heatmap.py 2025 all                     # zestawienie roku 4x3
+    python generuj_heatmap.py 2025 column                  # zestawienie roku 12x1
+    python generuj_heatmap.py 2025 all --profile --cprofile=zapis_png
 
-Plik CSV powinien mieć kolumny:
+Wszystkie miesiące i lata naraz (równolegle): python generuj_wszystko.py
+
+Wartości w komórkach rysowane są domyślnie jedną kolekcją ścieżek (wykres.py);
+--etykiety=text przywraca dawny tryb z osobnym ax.text dla każdej komórki.
+Heatmapa 15-minutowa (96 kolumn) rysowana jest bez wartości w komórkach.
+
+Dane czytane są z magazynu kolumnowego (magazyn.py). Podany plik CSV jest
+najpierw importowany jako partycja swojego miesiąca i powinien mieć kolumny:
     date, hour_from, hour_to, price_pln_per_mwh, volume_mwh
 """
 import sys
 import re
+import warnings
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import calendar
 
+from magazyn import import_csv, load_day_matrix
+from profil import current as profile, finish as finish_profile, start_from_argv
+from wykres import VMAX, VMIN, draw_cell_labels, make_cmap
+
+# Układy zestawień rocznych (dawne all.png.py i all_column.py)
+YEAR_LAYOUTS = {
+    "all": {
+        "grid": (4, 3), "figsize": (24, 28), "suptitle_size": 20, "suptitle_y": None,
+        "tick_size": (6, 6), "axis_label_size": 8, "title_size": 12, "cell_size": 4,
+        "colorbar": {"fraction": 0.02, "pad": 0.04}, "rect": [0, 0.03, 1, 0.97],
+    },
+    "column": {
+        "grid": (12, 1), "figsize": (20, 70), "suptitle_size": 24, "suptitle_y": 0.995,
+        "tick_size": (8, 7), "axis_label_size": 10, "title_size": 14, "cell_size": 5,
+        "colorbar": {"fraction": 0.01, "pad": 0.02, "aspect": 50}, "rect": [0, 0.01, 1, 0.995],
+    },
+}
+
+
+def split_months(days: np.ndarray, matrix: np.ndarray) -> dict:
+    """{miesiąc: (numery dni, macierz dni x 24)} z gotowej macierzy magazynu."""
+    months = days.astype('datetime64[M]').astype(int) % 12 + 1
+    day_numbers = (days - days.astype('datetime64[M]')).astype(int) + 1
+    return {int(m): (day_numbers[months == m], matrix[months == m]) for m in np.unique(months)}
+
 
-def generate_heatmap(csv_file: str):
-    # Wczytaj dane
-    df = pd.read_csv(csv_file)
-    df['date'] = pd.to_datetime(df['date'])
-    df['day'] = df['date'].dt.day
+def generate_heatmap(source: str, label_mode: str = "batch", sync: bool = True, resolution: int = 60):
+    # Wczytaj dane: "YYYY-MM" z magazynu albo plik CSV (import do magazynu)
+    month_match = re.fullmatch(r"(\d{4})-(\d{2})", source)
+    if month_match:
+        year, month = int(month_match.group(1)), int(month_match.group(2))
+    else:
+        year, month = import_csv(source)
+    if resolution == 15:
+        return generate_quarter_heatmap(year, month)
+    last_day = calendar.monthrange(year, month)[1]
+    with profile().stage("wczytanie"):
+        days, values = load_day_matrix(f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day}", sync=sync)
+    if not len(days):
+        raise ValueError(f"Brak danych dla {year}-{month:02d} w magazynie")
     
-    # Wyciągnij rok i miesiąc z nazwy pliku lub danych
-    year = df['date'].dt.year.iloc[0]
-    month = df['date'].dt.month.iloc[0]
     month_name = calendar.month_name[month]
     month_str = f"{year}-{month:02d}"
     
-    # Obsłuż duplikaty (np. zmiana czasu - 25h w październiku) - bierzemy średnią
-    df = df.groupby(['day', 'hour_from'], as_index=False).agg({'price_pln_per_mwh': 'mean'})
-    
-    # Pivot table: days as rows, hours as columns
-    pivot = df.pivot(index='day', columns='hour_from', values='price_pln_per_mwh')
+    # Macierz dni x godziny z siatki magazynu - zmiana czasu jest już uwzględniona
+    day_numbers, values = split_months(days, values)[month]
     
     # Create heatmap
     fig, ax = plt.subplots(figsize=(14, 10))
     
     # Niestandardowa paleta kolorów:
     # fioletowy (ujemne) -> zielony (0-400) -> żółty (400-600) -> czerwony (>600)
-    from matplotlib.colors import LinearSegmentedColormap
-    colors = [
-        (0.5, 0.0, 0.5),    # fioletowy dla ujemnych (-100)
-        (0.0, 0.5, 0.0),    # ciemnozielony (0)
-        (0.0, 0.8, 0.0),    # zielony (200)
-        (0.5, 1.0, 0.0),    # żółtozielony (400)
-        (1.0, 1.0, 0.0),    # żółty (500)
-        (1.0, 0.5, 0.0),    # pomarańczowy (600)
-        (1.0, 0.0, 0.0),    # czerwony (800)
-    ]
-    # Pozycje kolorów w zakresie 0-1 (mapowane na -100 do 800)
-    positions = [0.0, 0.111, 0.333, 0.556, 0.667, 0.778, 1.0]
-    cmap = LinearSegmentedColormap.from_list('custom_rdn', list(zip(positions, colors)))
-    
-    im = ax.imshow(pivot.values, aspect='auto', cmap=cmap, vmin=-100, vmax=800)
+    im = ax.imshow(values, aspect='auto', cmap=make_cmap(), vmin=VMIN, vmax=VMAX)
     
     # Set labels
     ax.set_xticks(np.arange(24))
     ax.set_xticklabels([f'{h}-{h+1}' for h in range(24)])
-    ax.set_yticks(np.arange(len(pivot.index)))
-    ax.set_yticklabels([f'{month_name[:3]} {d}' for d in pivot.index])
+    ax.set_yticks(np.arange(len(day_numbers)))
+    ax.set_yticklabels([f'{month_name[:3]} {d}' for d in day_numbers])
     
     ax.set_xlabel('Hour')
     ax.set_ylabel('Day')
@@ -74,37 +101,144 @@ def generate_heatmap(csv_file: str):
     cbar.set_label('Price (PLN/MWh)')
     
     # Add values in cells
-    for i in range(len(pivot.index)):
-        for j in range(24):
-            val = pivot.values[i, j]
-            if not np.isnan(val):
-                # Fioletowy (ujemne) - biały tekst
-                # Zielony (0-400) - czarny tekst
-                # Żółty (400-600) - czarny tekst
-                # Pomarańczowy/czerwony (>600) - biały tekst
-                if val < 0:
-                    text_color = 'white'
-                elif val > 600:
-                    text_color = 'white'
-                else:
-                    text_color = 'black'
-                ax.text(j, i, f'{val:.0f}', ha='center', va='center', 
-                       fontsize=6, color=text_color)
-    
-    plt.tight_layout()
+    # Fioletowy (ujemne) i pomarańczowy/czerwony (>600) - biały tekst, pozostałe - czarny
+    with profile().stage("etykiety"):
+        draw_cell_labels(ax, values, fontsize=6, mode=label_mode)
+    
+    with profile().stage("uklad"):
+        plt.tight_layout()
     
     heatmap_file = f'tge_rdn_heatmap_{month_str}.png'
-    plt.savefig(heatmap_file, dpi=150)
+    with profile().stage("zapis_png"):
+        plt.savefig(heatmap_file, dpi=150)
     print(f"Saved: {heatmap_file}")
     plt.close()
     
     return heatmap_file
 
 
-if __name__ == "__main__":
+def generate_quarter_heatmap(year: int, month: int):
+    """Heatmapa natywnych cen 15-minutowych: dni x 96 kwadransów."""
+    last_day = calendar.monthrange(year, month)[1]
+    with profile().stage("wczytanie"):
+        days, matrix = load_day_matrix(f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last_day}", resolution=15)
+    if not len(days):
+        raise ValueError(f"Brak cen 15-minutowych dla {year}-{month:02d} w magazynie")
+    
+    month_name = calendar.month_name[month]
+    day_numbers = days.astype(object)
+    
+    fig, ax = plt.subplots(figsize=(20, 10))
+    im = ax.imshow(matrix, aspect='auto', cmap=make_cmap(), vmin=VMIN, vmax=VMAX, interpolation='nearest')
+    
+    # Podziałka co godzinę - kolumna 4h to początek godziny h
+    ax.set_xticks(np.arange(0, 96, 4) - 0.5)
+    ax.set_xticklabels([f'{h}' for h in range(24)])
+    ax.set_yticks(np.arange(len(days)))
+    ax.set_yticklabels([f'{month_name[:3]} {d.day}' for d in day_numbers])
+    
+    ax.set_xlabel('Hour')
+    ax.set_ylabel('Day')
+    ax.set_title(f'TGE RDN 15-min Prices - {month_name} {year} (PLN/MWh)')
+    
+    cbar = plt.colorbar(im, ax=ax)
+    cbar.set_label('Price (PLN/MWh)')
+    
+    with profile().stage("uklad"):
+        plt.tight_layout()
+    
+    heatmap_file = f'tge_rdn_heatmap_{year}-{month:02d}_15min.png'
+    with profile().stage("zapis_png"):
+        plt.savefig(heatmap_file, dpi=150)
+    print(f"Saved: {heatmap_file}")
+    plt.close()
+    
+    return heatmap_file
+
+
+def generate_year_composite(year: int, layout: str = "all", label_mode: str = "batch", sync: bool = True):
+    """Zestawienie wszystkich miesięcy roku: "all" (siatka 4x3) albo "column" (12x1)."""
+    opts = YEAR_LAYOUTS[layout]
+    with profile().stage("wczytanie"):
+        days, matrix = load_day_matrix(f"{year}-01-01", f"{year}-12-31", sync=sync)
+    if not len(days):
+        raise ValueError(f"Brak danych dla roku {year} w magazynie")
+    all_data = split_months(days, matrix)
+    cmap = make_cmap()
+    
+    rows, cols = opts["grid"]
+    fig, axes = plt.subplots(rows, cols, figsize=opts["figsize"], squeeze=False)
+    suptitle_kw = {} if opts["suptitle_y"] is None else {"y": opts["suptitle_y"]}
+    fig.suptitle(f'TGE RDN Hourly Prices - {year} (PLN/MWh)', fontsize=opts["suptitle_size"],
+                 fontweight='bold', **suptitle_kw)
+    
+    x_tick_size, y_tick_size = opts["tick_size"]
+    im = None
+    for idx, month in enumerate(range(1, 13)):
+        ax = axes[idx // cols, idx % cols]
+        month_name = calendar.month_name[month]
+        ax.set_title(f'{month_name} {year}', fontsize=opts["title_size"], fontweight='bold')
+        if month not in all_data:
+            # Miesiąc bez danych (np. bieżący rok) - pusty panel
+            ax.set_axis_off()
+            continue
+        day_numbers, values = all_data[month]
+        
+        im = ax.imshow(values, aspect='auto', cmap=cmap, vmin=VMIN, vmax=VMAX)
+        
+        ax.set_xticks(np.arange(24))
+        ax.set_xticklabels([f'{h}' for h in range(24)], fontsize=x_tick_size)
+        ax.set_yticks(np.arange(len(day_numbers)))
+        ax.set_yticklabels([f'{d}' for d in day_numbers], fontsize=y_tick_size)
+        
+        ax.set_xlabel('Hour', fontsize=opts["axis_label_size"])
+        ax.set_ylabel('Day', fontsize=opts["axis_label_size"])
+        
+        # Wartości w komórkach - jedna kolekcja zamiast ax.text na komórkę
+        with profile().stage("etykiety"):
+            draw_cell_labels(ax, values, fontsize=opts["cell_size"], mode=label_mode)
+    
+    # Colorbar
+    cbar = fig.colorbar(im, ax=axes, orientation='horizontal', **opts["colorbar"])
+    cbar.set_label('Price (PLN/MWh)', fontsize=12)
+    
+    # Colorbar z ax=axes nie współpracuje z tight_layout - ostrzeżenie jest tu spodziewane
+    with warnings.catch_warnings(), profile().stage("uklad"):
+        warnings.simplefilter("ignore", UserWarning)
+        fig.tight_layout(rect=opts["rect"])
+    
+    heatmap_file = f'tge_rdn_heatmap_{year}_{layout}.png'
+    with profile().stage("zapis_png"):
+        fig.savefig(heatmap_file, dpi=150)
+    print(f"Saved: {heatmap_file}")
+    plt.close(fig)
+    
+    return heatmap_file
+
+
+def main():
     if len(sys.argv) < 2:
         print(__doc__)
         sys.exit(1)
     
-    csv_file = sys.argv[1]
-    generate_heatmap(csv_file)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    start_from_argv("generuj_heatmap")
+    label_mode = "batch"
+    resolution = 60
+    for a in sys.argv[1:]:
+        if a.startswith("--etykiety="):
+            label_mode = a.split("=", 1)[1]
+        elif a.startswith("--rozdzielczosc="):
+            resolution = int(a.split("=", 1)[1])
+    
+    source = args[0]
+    if re.fullmatch(r"\d{4}", source):
+        layout = args[1] if len(args) > 1 else "all"
+        generate_year_composite(int(source), layout, label_mode)
+    else:
+        generate_heatmap(source, label_mode, resolution=resolution)
+    finish_profile()
+
+
+if __name__ == "__main__":
+    main()
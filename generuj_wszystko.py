@@ -0,0 +1,91 @@
+"""
+Generuje wszystkie heatmapy naraz: każdy miesiąc z magazynu oraz zestawienia
+roczne 4x3 (tge_rdn_heatmap_YYYY_all.png) i 12x1 (tge_rdn_heatmap_YYYY_column.png).
+
+Użycie:
+    python generuj_wszystko.py [rok ...] [--procesy=N] [--etykiety=batch|text]
+
+Przykłady:
+    python generuj_wszystko.py                # wszystkie lata i miesiące w magazynie
+    python generuj_wszystko.py 2025 --procesy=4
+
+Wykresy rysowane są w puli procesów (domyślnie tyle procesów, ile rdzeni).
+Każdy proces raz na starcie ustawia backend Agg, buduje paletę custom_rdn
+i wczytuje czcionki, więc kolejne wykresy korzystają z gotowych obiektów.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from magazyn import list_partitions, sync_from_csv
+
+
+def _init_worker():
+    """Przygotowanie procesu: backend, paleta i czcionki - raz na proces."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import wykres
+    wykres.make_cmap()
+    for digit in "-0123456789":
+        wykres._label_path(digit, 6)
+
+
+def _render(task):
+    from generuj_heatmap import generate_heatmap, generate_year_composite
+
+    kind, key, label_mode = task
+    t0 = time.perf_counter()
+    # Magazyn jest synchronizowany raz w procesie głównym, nie w każdym procesie roboczym
+    if kind == "month":
+        out_file = generate_heatmap(key, label_mode, sync=False)
+    else:
+        year, layout = key
+        out_file = generate_year_composite(year, layout, label_mode, sync=False)
+    return out_file, time.perf_counter() - t0
+
+
+def build_tasks(years=None, label_mode: str = "batch") -> list[tuple]:
+    """Lista zadań: najpierw (najdłuższe) zestawienia roczne, potem miesiące."""
+    partitions = [(y, m) for y, m in list_partitions() if not years or y in years]
+    tasks = []
+    for year in sorted({y for y, _ in partitions}):
+        for layout in ("column", "all"):
+            tasks.append(("year", (year, layout), label_mode))
+    for year, month in partitions:
+        tasks.append(("month", f"{year}-{month:02d}", label_mode))
+    return tasks
+
+
+def render_all(tasks, processes=None) -> list[str]:
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        futures = {pool.submit(_render, task): task for task in tasks}
+        done = []
+        for future in as_completed(futures):
+            out_file, elapsed = future.result()
+            print(f"  {out_file} ({elapsed:.1f} s)")
+            done.append(out_file)
+    return sorted(done)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    processes = None
+    label_mode = "batch"
+    for a in sys.argv[1:]:
+        if a.startswith("--procesy="):
+            processes = int(a.split("=", 1)[1])
+        elif a.startswith("--etykiety="):
+            label_mode = a.split("=", 1)[1]
+    years = {int(a) for a in args}
+
+    sync_from_csv()
+    tasks = build_tasks(years, label_mode)
+    if not tasks:
+        print("Brak danych w magazynie (python magazyn.py importuj)")
+        sys.exit(1)
+
+    print(f"Wykresów do wygenerowania: {len(tasks)}, procesy: {processes or os.cpu_count()}")
+    t0 = time.perf_counter()
+    files = render_all(tasks, processes)
+    print(f"\nWygenerowano {len(files)} plików w {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,417 @@
+"""
+Piramida kafelków (deep zoom) heatmapy cen TGE RDN z przeglądarką HTML.
+
+Zamiast jednej ogromnej bitmapy (tge_rdn_heatmap_YYYY_column.png) cały
+magazyn rysowany jest jako raster dni x godziny pocięty na kafelki 256x256
+na kolejnych poziomach powiększenia:
+
+    kafelki/index.html         przeglądarka (otwierana wprost z dysku)
+    kafelki/info.js            wymiary rastra i poziomów dla przeglądarki
+    kafelki/<poziom>/<wiersz>_<kolumna>.png
+    kafelki/wartosci.npy       ceny, z których narysowano kafelki (do porównań)
+
+Poziom 0 to największe powiększenie (komórka CELL_WIDTH x CELL_HEIGHT pikseli,
+z ceną wpisaną w komórkę), każdy kolejny jest dwa razy mniejszy, aż cały raster
+zmieści się w jednym kafelku. Na mniejszych poziomach piksel to średnia
+z kilku dni (i godzin). Ceny wpisywane są tylko na poziomach, na których
+komórka ma co najmniej LABEL_MIN_HEIGHT pikseli wysokości.
+
+Kafelki rysowane są w puli procesów bez matplotlib.pyplot (paleta custom_rdn
+jako tablica kolorów, tekst przez Pillow). Ponowne uruchomienie porównuje ceny
+z wartosci.npy i rysuje od nowa tylko kafelki obejmujące zmienione lub nowe dni.
+
+Użycie:
+    python kafelki.py [--katalog=DIR] [--procesy=N] [--od-nowa] [--profile[=PLIK]]
+
+Przykłady:
+    python kafelki.py                  # dorysuj kafelki zmienionych dni
+    python kafelki.py --od-nowa        # cała piramida od nowa
+    python -m http.server -d kafelki   # albo po prostu otwórz kafelki/index.html
+"""
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from magazyn import load_day_matrix
+from pobierz_dane import get_option
+from profil import current as profile, finish as finish_profile, start_from_argv
+from siatka import HOURS
+
+TILE_DIR = "kafelki"
+TILE = 256
+CELL_WIDTH = 64
+CELL_HEIGHT = 32
+LABEL_MIN_HEIGHT = 16
+# Pliki piramidy - tylko je usuwa przebudowa od nowa (--katalog może wskazywać cokolwiek)
+VIEWER_FILES = ("info.js", "index.html", "wartosci.npy", "wartosci.tmp.npy")
+TILE_NAME_RE = re.compile(r"\d+_\d+\.png$")
+# Komórki bez ceny (np. pominięta godzina przy zmianie czasu) są przezroczyste
+EMPTY = (0, 0, 0, 0)
+
+
+def dense_matrix(sync: bool = True) -> tuple[np.datetime64 | None, np.ndarray]:
+    """(pierwszy dzień, ceny [dzień, 24]) dla każdego dnia kalendarza od pierwszego do ostatniego w magazynie."""
+    days, matrix = load_day_matrix(sync=sync)
+    if not len(days):
+        return None, np.empty((0, HOURS))
+    dense = np.full(((days[-1] - days[0]).astype(int) + 1, HOURS), np.nan)
+    dense[(days - days[0]).astype(int)] = matrix
+    return days[0], dense
+
+
+def level_sizes(n_days: int) -> list[tuple[int, int]]:
+    """(szerokość, wysokość) rastra w pikselach na każdym poziomie, od największego powiększenia."""
+    sizes = []
+    level = 0
+    while True:
+        scale = 2 ** level
+        size = (math.ceil(HOURS * CELL_WIDTH / scale), math.ceil(n_days * CELL_HEIGHT / scale))
+        sizes.append(size)
+        if max(size) <= TILE:
+            return sizes
+        level += 1
+
+
+def color_table() -> np.ndarray:
+    """Paleta custom_rdn jako 256 kolorów RGBA uint8 (bez importu pyplot)."""
+    from wykres import make_cmap
+
+    return (make_cmap()(np.linspace(0, 1, 256)) * 255).round().astype(np.uint8)
+
+
+def _source_ranges(first_pixel: int, count: int, cell: float, n_source: int) -> tuple[np.ndarray, np.ndarray]:
+    """Zakresy komórek źródła [lo, hi) pokryte przez kolejne piksele (komórka ma `cell` pikseli)."""
+    pixels = np.arange(first_pixel, first_pixel + count)
+    lo = np.minimum(np.floor(pixels / cell).astype(np.intp), n_source - 1)
+    hi = np.minimum(np.maximum(lo + 1, np.floor((pixels + 1) / cell).astype(np.intp)), n_source)
+    return lo, hi
+
+
+def _block_means(values: np.ndarray, rows: tuple, cols: tuple) -> np.ndarray:
+    """Średnie cen w blokach wierszy x kolumn przez sumy skumulowane (NaN pomijane)."""
+    valid = ~np.isnan(values)
+    sums = np.zeros((values.shape[0] + 1, values.shape[1] + 1))
+    counts = np.zeros_like(sums)
+    sums[1:, 1:] = np.where(valid, values, 0).cumsum(0).cumsum(1)
+    counts[1:, 1:] = valid.cumsum(0).cumsum(1)
+
+    def block(table):
+        (r0, r1), (c0, c1) = rows, cols
+        return (table[r1][:, c1] - table[r0][:, c1] - table[r1][:, c0] + table[r0][:, c0])
+
+    total, count = block(sums), block(counts)
+    out = np.full(total.shape, np.nan)
+    np.divide(total, count, out=out, where=count > 0)
+    return out
+
+
+def render_tile(matrix: np.ndarray, colors: np.ndarray, level: int, tile_row: int, tile_col: int):
+    """Obraz RGBA kafelka (Pillow) z macierzy cen [dzień, 24]."""
+    from PIL import Image
+
+    from wykres import VMAX, VMIN
+
+    scale = 2 ** level
+    width, height = level_sizes(len(matrix))[level]
+    x0, y0 = tile_col * TILE, tile_row * TILE
+    w, h = min(TILE, width - x0), min(TILE, height - y0)
+    cell_w, cell_h = CELL_WIDTH / scale, CELL_HEIGHT / scale
+    lo, hi = _source_ranges(y0, h, cell_h, len(matrix))
+    cols = _source_ranges(x0, w, cell_w, HOURS)
+    # Sumy skumulowane tylko z dni tego kafelka - koszt nie zależy od długości historii
+    values = _block_means(matrix[lo[0]:hi[-1]], (lo - lo[0], hi - lo[0]), cols)
+
+    index = np.clip((values - VMIN) / (VMAX - VMIN) * 255, 0, 255)
+    pixels = colors[np.nan_to_num(index).astype(np.uint8)]
+    pixels[np.isnan(values)] = EMPTY
+    image = Image.fromarray(pixels, "RGBA")
+    if cell_h >= LABEL_MIN_HEIGHT:
+        draw_labels(image, matrix, level, x0, y0)
+    return image
+
+
+def draw_labels(image, matrix: np.ndarray, level: int, x0: int, y0: int):
+    """Wpisuje ceny w komórki widoczne na kafelku (tylko duże powiększenia)."""
+    from wykres import label_colors
+
+    scale = 2 ** level
+    cell_w, cell_h = CELL_WIDTH / scale, CELL_HEIGHT / scale
+    font_size = cell_h * 0.45
+    first_row, last_row = int(y0 // cell_h), min(len(matrix), math.ceil((y0 + image.height) / cell_h))
+    first_col, last_col = int(x0 // cell_w), min(HOURS, math.ceil((x0 + image.width) / cell_w))
+    visible = matrix[first_row:last_row, first_col:last_col]
+    fills = label_colors(visible)
+    for day in range(first_row, last_row):
+        for hour in range(first_col, last_col):
+            value = visible[day - first_row, hour - first_col]
+            if np.isnan(value):
+                continue
+            fill = str(fills[day - first_row, hour - first_col])
+            label = _label_image(f"{value:.0f}", fill, font_size)
+            left = round((hour + 0.5) * cell_w - x0 - label.width / 2)
+            top = round((day + 0.5) * cell_h - y0 - label.height / 2)
+            image.alpha_composite(label, (max(left, 0), max(top, 0)))
+
+
+@lru_cache(maxsize=None)
+def _font(size: float):
+    from PIL import ImageFont
+
+    return ImageFont.load_default(size=size)
+
+
+@lru_cache(maxsize=8192)
+def _label_image(text: str, fill: str, font_size: float):
+    """Napis jako mały obraz RGBA - każdy napis rasteryzowany raz na proces, potem tylko wklejany."""
+    from PIL import Image, ImageDraw
+
+    font = _font(font_size)
+    left, top, right, bottom = font.getbbox(text)
+    label = Image.new("RGBA", (right - left, bottom - top), EMPTY)
+    ImageDraw.Draw(label).text((-left, -top), text, fill=fill, font=font)
+    return label
+
+
+def changed_days(old: np.ndarray | None, new: np.ndarray) -> np.ndarray:
+    """Indeksy dni, których ceny różnią się od poprzedniego rysowania (albo są nowe)."""
+    if old is None:
+        return np.arange(len(new))
+    common = min(len(old), len(new))
+    same = ((old[:common] == new[:common]) | (np.isnan(old[:common]) & np.isnan(new[:common]))).all(axis=1)
+    return np.concatenate([np.flatnonzero(~same), np.arange(common, max(len(old), len(new)))])
+
+
+def tiles_for_days(days: np.ndarray, n_days: int) -> list[tuple[int, int, int]]:
+    """(poziom, wiersz, kolumna) kafelków, które pokrywają podane dni - na każdym poziomie."""
+    days = np.asarray(days, dtype=np.int64)
+    tasks = []
+    for level, (width, height) in enumerate(level_sizes(n_days)):
+        # Wysokość komórki dzieli TILE, więc dzień nigdy nie leży na dwóch wierszach kafelków
+        pixel_rows = np.floor(days * CELL_HEIGHT / 2 ** level).astype(np.int64)
+        for tile_row in np.unique(pixel_rows[pixel_rows < height] // TILE):
+            tasks.extend((level, int(tile_row), col) for col in range(math.ceil(width / TILE)))
+    return tasks
+
+
+_worker = {}
+
+
+def _init_worker(matrix: np.ndarray, out_dir: str):
+    _worker["matrix"] = matrix
+    _worker["colors"] = color_table()
+    _worker["out_dir"] = out_dir
+
+
+def _render_batch(batch: list[tuple[int, int, int]]) -> int:
+    for level, tile_row, tile_col in batch:
+        image = render_tile(_worker["matrix"], _worker["colors"], level, tile_row, tile_col)
+        level_dir = os.path.join(_worker["out_dir"], str(level))
+        os.makedirs(level_dir, exist_ok=True)
+        path = os.path.join(level_dir, f"{tile_row}_{tile_col}.png")
+        tmp = f"{path}.tmp.png"
+        # Szybka kompresja - kafelki to duże jednolite plamy, pliki i tak są małe
+        image.save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, path)
+    return len(batch)
+
+
+def render_tiles(matrix: np.ndarray, tasks: list, out_dir: str, processes: int | None = None) -> int:
+    """Rysuje kafelki w puli procesów; zadania grupowane po kilkanaście na proces."""
+    if not tasks:
+        return 0
+    processes = processes or os.cpu_count() or 1
+    batch_size = max(1, min(32, len(tasks) // (processes * 4)))
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+    if processes == 1:
+        _init_worker(matrix, out_dir)
+        return sum(_render_batch(batch) for batch in batches)
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(matrix, out_dir)) as pool:
+        return sum(pool.map(_render_batch, batches))
+
+
+def write_viewer(out_dir: str, first_day: np.datetime64, n_days: int):
+    info = {
+        "first_day": str(first_day),
+        "days": n_days,
+        "hours": HOURS,
+        "tile": TILE,
+        "cell": [CELL_WIDTH, CELL_HEIGHT],
+        "levels": [list(size) for size in level_sizes(n_days)],
+        "built": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    # info.js zamiast JSON - przeglądarka otwarta z file:// nie może wczytać pliku przez fetch
+    with open(os.path.join(out_dir, "info.js"), "w", encoding="utf-8") as f:
+        f.write(f"var KAFELKI = {json.dumps(info)};\n")
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(VIEWER_HTML)
+
+
+def clear_pyramid(out_dir: str):
+    """
+    Usuwa z katalogu kafelki (<poziom>/<wiersz>_<kolumna>.png) i pliki przeglądarki.
+
+    Inne pliki zostają, a katalog poziomu usuwany jest tylko wtedy, gdy po
+    kafelkach nic w nim nie zostało.
+    """
+    if not os.path.isdir(out_dir):
+        return
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if name in VIEWER_FILES and os.path.isfile(path):
+            os.remove(path)
+        elif name.isdigit() and os.path.isdir(path):
+            for tile in os.listdir(path):
+                if TILE_NAME_RE.match(tile):
+                    os.remove(os.path.join(path, tile))
+            if not os.listdir(path):
+                os.rmdir(path)
+
+
+def build_pyramid(out_dir: str = TILE_DIR, processes: int | None = None, full: bool = False) -> int:
+    """Rysuje brakujące lub nieaktualne kafelki; zwraca liczbę narysowanych kafelków."""
+    with profile().stage("wczytanie"):
+        first_day, matrix = dense_matrix()
+    if first_day is None:
+        raise ValueError("Brak danych w magazynie (python magazyn.py importuj)")
+
+    values_path = os.path.join(out_dir, "wartosci.npy")
+    info_path = os.path.join(out_dir, "info.js")
+    old = None
+    if not full and os.path.exists(values_path) and os.path.exists(info_path):
+        with open(info_path, encoding="utf-8") as f:
+            old_info = json.loads(f.read().split("=", 1)[1].rstrip().rstrip(";"))
+        # Inny pierwszy dzień albo wymiary komórek przesuwają cały raster - rysujemy od nowa
+        if old_info["first_day"] == str(first_day) and old_info["cell"] == [CELL_WIDTH, CELL_HEIGHT]:
+            old = np.load(values_path)
+    if old is None:
+        clear_pyramid(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    days = changed_days(old, matrix)
+    if old is not None and len(level_sizes(len(old))) != len(level_sizes(len(matrix))):
+        # Nowy najmniejszy poziom - rysujemy go w całości
+        days = np.union1d(days, [0, len(matrix) - 1])
+    tasks = tiles_for_days(days, len(matrix))
+    with profile().stage("kafelki"):
+        drawn = render_tiles(matrix, tasks, out_dir, processes)
+    profile().count("tiles", drawn)
+
+    write_viewer(out_dir, first_day, len(matrix))
+    tmp = os.path.join(out_dir, "wartosci.tmp.npy")
+    np.save(tmp, matrix)
+    os.replace(tmp, values_path)
+    print(f"Dni: {len(matrix)} ({first_day} - {first_day + len(matrix) - 1}), zmienionych: {len(days)}, "
+          f"kafelków narysowanych: {drawn}, poziomów: {len(level_sizes(len(matrix)))}")
+    return drawn
+
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html lang="pl">
+<head>
+<meta charset="utf-8">
+<title>TGE RDN - ceny godzinowe</title>
+<style>
+  body { margin: 0; font: 13px sans-serif; display: flex; flex-direction: column; height: 100vh; }
+  #pasek { padding: 6px 10px; background: #eee; display: flex; gap: 12px; align-items: center; }
+  #widok { flex: 1; overflow: auto; position: relative; background: #fff; }
+  #raster { position: relative; }
+  #raster img { position: absolute; image-rendering: pixelated; }
+</style>
+<script src="info.js"></script>
+</head>
+<body>
+<div id="pasek">
+  <button id="blizej">+</button><button id="dalej">-</button>
+  <span id="poziom"></span><span id="pozycja"></span>
+</div>
+<div id="widok"><div id="raster"></div></div>
+<script>
+(function () {
+  var info = KAFELKI, level = Math.max(0, info.levels.length - 3);
+  var view = document.getElementById("widok"), raster = document.getElementById("raster");
+  var loaded = {};
+  var first = new Date(info.first_day + "T00:00:00Z");
+
+  function cell() { var s = Math.pow(2, level); return [info.cell[0] / s, info.cell[1] / s]; }
+
+  function show() {
+    var size = info.levels[level], t = info.tile;
+    var c0 = Math.floor(view.scrollLeft / t), c1 = Math.floor((view.scrollLeft + view.clientWidth) / t);
+    var r0 = Math.floor(view.scrollTop / t), r1 = Math.floor((view.scrollTop + view.clientHeight) / t);
+    for (var r = r0; r <= r1 && r * t < size[1]; r++) {
+      for (var c = c0; c <= c1 && c * t < size[0]; c++) {
+        var key = level + "/" + r + "_" + c;
+        if (loaded[key]) continue;
+        var img = document.createElement("img");
+        img.src = key + ".png?" + info.built;
+        img.style.left = c * t + "px";
+        img.style.top = r * t + "px";
+        raster.appendChild(img);
+        loaded[key] = img;
+      }
+    }
+  }
+
+  function zoom(newLevel, fx, fy) {
+    if (newLevel < 0 || newLevel >= info.levels.length || newLevel === level) return;
+    // Punkt pod kursorem (albo środek widoku) zostaje na miejscu
+    fx = fx === undefined ? view.clientWidth / 2 : fx;
+    fy = fy === undefined ? view.clientHeight / 2 : fy;
+    var factor = Math.pow(2, level - newLevel);
+    var x = (view.scrollLeft + fx) * factor - fx, y = (view.scrollTop + fy) * factor - fy;
+    level = newLevel;
+    raster.innerHTML = "";
+    loaded = {};
+    var size = info.levels[level];
+    raster.style.width = size[0] + "px";
+    raster.style.height = size[1] + "px";
+    view.scrollLeft = x;
+    view.scrollTop = y;
+    document.getElementById("poziom").textContent = "poziom " + level + " / " + (info.levels.length - 1);
+    show();
+  }
+
+  view.addEventListener("scroll", show);
+  view.addEventListener("wheel", function (e) {
+    if (!e.ctrlKey) return;
+    e.preventDefault();
+    var box = view.getBoundingClientRect();
+    zoom(level + (e.deltaY > 0 ? 1 : -1), e.clientX - box.left, e.clientY - box.top);
+  }, { passive: false });
+  view.addEventListener("mousemove", function (e) {
+    var box = raster.getBoundingClientRect(), c = cell();
+    var day = Math.floor((e.clientY - box.top) / c[1]), hour = Math.floor((e.clientX - box.left) / c[0]);
+    if (day < 0 || day >= info.days || hour < 0 || hour >= info.hours) return;
+    var d = new Date(first.getTime() + day * 86400000).toISOString().slice(0, 10);
+    document.getElementById("pozycja").textContent = d + ", godz. " + hour + "-" + (hour + 1);
+  });
+  document.getElementById("blizej").onclick = function () { zoom(level - 1); };
+  document.getElementById("dalej").onclick = function () { zoom(level + 1); };
+  var start = level;
+  level = -1;
+  zoom(start);
+})();
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    start_from_argv("kafelki")
+    out_dir = get_option("katalog", TILE_DIR)
+    t0 = time.perf_counter()
+    build_pyramid(out_dir, get_option("procesy", None, int), full="--od-nowa" in sys.argv)
+    print(f"Czas: {time.perf_counter() - t0:.1f} s, przeglądarka: {os.path.join(out_dir, 'index.html')}")
+    finish_profile()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,141 @@
 #!/usr/bin/env python3
 """
 Konwertuje pliki Excel z archiwum TGE na format CSV zgodny z pobierz_dane.py
-Użycie: python konwertuj_excel.py <miesiac> [rok]
+Użycie: python konwertuj_excel.py <miesiac> [rok] [--procesy=N] [--profile[=PLIK]]
 Przykład: python konwertuj_excel.py 10 2025
+Przykład: python konwertuj_excel.py 10 2025 --procesy=4
+Przykład: python konwertuj_excel.py 10 2025 --profile --cprofile=excel --procesy=1
+
+Arkusz WYNIKI czytany jest strumieniowo bezpośrednio z XML (xlsx_tge.py).
+Pliki miesiąca przetwarzane są równolegle w puli procesów (domyślnie tyle
+procesów, ile rdzeni), a wyniki łączone w kolejności plików.
+
+Oprócz cen godzinowych zapisywane są natywne ceny 15-minutowe (fixing
+jednolity, kolumna O arkusza) do tge_rdn_15min_<rok>-<miesiąc>.xlsx.csv
+i do magazynu (magazyn.py) jako liczby całkowite w groszach.
+
+--profile zapisuje raport etapów (profil.py); czas CPU etapu "excel" obejmuje
+procesy puli, a cProfile tego etapu ma sens tylko z --procesy=1.
 """
 
 import sys
 import os
+import time
 import re
 import csv
+from concurrent.futures import ProcessPoolExecutor
+import zipfile
 from datetime import datetime
-import pandas as pd
+
+from magazyn import quarter_position, write_quarter_partition
+from profil import current as profile, finish as finish_profile, start_from_argv
+from xlsx_tge import read_sheet_columns
+
+# Nazwa instrumentu godzinowego, np. "26-10-25_H02" (także "26-10-25_H02a" przy zmianie czasu)
+INSTRUMENT_RE = r'^(\d{2})-(\d{2})-(\d{2})_H(\d{2})'
+INSTRUMENT_PATTERN = re.compile(INSTRUMENT_RE)
+# Kwadrans oznaczony końcem okresu, np. "26-10-25_Q00:15" (powtórzona godzina: "_Q01a:15")
+QUARTER_RE = r'^(\d{2})-(\d{2})-(\d{2})_Q(\d{2}a?:\d{2})$'
+QUARTER_PATTERN = re.compile(QUARTER_RE)
 
 def parse_excel_file(filepath):
     """Parsuje plik Excel i zwraca listę (data, godzina, cena)"""
-    df = pd.read_excel(filepath, sheet_name='WYNIKI', header=None)
+    return parse_excel_report(filepath)[0]
+
+def parse_excel_report(filepath):
+    """
+    Parsuje plik Excel w jednym przejściu i zwraca (godziny, kwadranse):
+    godziny - lista (data, godzina, cena), kwadranse - lista (data, etykieta końca, cena)
+    w kolejności arkusza (chronologicznej, także przy zmianie czasu).
+    """
+    # Stary format .xls nie jest archiwum zip - wtedy czytamy przez pandas
+    if not zipfile.is_zipfile(filepath):
+        return parse_excel_file_pandas(filepath), []
     
     results = []
-    for i in range(df.shape[0]):
-        row = df.iloc[i]
-        instrument = row[1]
-        granulacja = row[2]
-        cena = row[3]
-        
+    quarters = []
+    # Kolumny arkusza WYNIKI: B - instrument, C - granulacja, D - cena,
+    # I - instrument 15-minutowy, J - granulacja, O - fixing jednolity w PLN/MWh
+    columns = ('B', 'C', 'D', 'I', 'J', 'O')
+    for instrument, granulacja, cena, q_instrument, q_granulacja, q_cena in read_sheet_columns(filepath, 'WYNIKI', columns):
         # Szukamy wierszy godzinowych (granulacja 60, nazwa z _H)
-        if pd.notna(instrument) and pd.notna(granulacja) and granulacja == 60:
-            match = re.match(r'(\d{2})-(\d{2})-(\d{2})_H(\d{2})', str(instrument))
+        if instrument is not None and granulacja == 60:
+            match = INSTRUMENT_PATTERN.match(str(instrument))
             if match:
                 day, month, year_short, hour = match.groups()
-                year = f"20{year_short}"
-                date_str = f"{year}-{month}-{day}"
-                hour_int = int(hour)
-                
-                # Cena może być liczbą lub NaN
-                price = float(cena) if pd.notna(cena) else None
-                results.append((date_str, hour_int, price))
-    
-    return results
+                # Cena może być liczbą lub pustą komórką
+                price = float(cena) if cena is not None else None
+                results.append((f"20{year_short}-{month}-{day}", int(hour), price))
+        if q_instrument is not None and q_granulacja == 15:
+            match = QUARTER_PATTERN.match(str(q_instrument))
+            if match:
+                day, month, year_short, label = match.groups()
+                price = float(q_cena) if isinstance(q_cena, float) else None
+                quarters.append((f"20{year_short}-{month}-{day}", label, price))
+    
+    return results, quarters
+
+def parse_excel_file_pandas(filepath):
+    """Parsuje plik Excel przez pandas (dla formatów innych niż .xlsx)"""
+    import pandas as pd
+    
+    # Kolumny: 1 - instrument, 2 - granulacja, 3 - cena
+    df = pd.read_excel(filepath, sheet_name='WYNIKI', header=None, usecols=[1, 2, 3])
+    
+    # Szukamy wierszy godzinowych (granulacja 60, nazwa z _H) - maską, bez pętli po wierszach
+    hourly = df[(df[2] == 60) & df[1].notna()]
+    parts = hourly[1].astype(str).str.extract(INSTRUMENT_RE)
+    matched = parts[0].notna()
+    parts = parts[matched]
+    prices = hourly.loc[matched, 3]
+    
+    dates = "20" + parts[2] + "-" + parts[1] + "-" + parts[0]
+    hours = parts[3].astype(int)
+    # Cena może być liczbą lub NaN
+    prices = [float(p) if pd.notna(p) else None for p in prices]
+    
+    return list(zip(dates, hours.tolist(), prices))
+
+def _parse_excel_file_safe(filepath):
+    """Wersja dla puli procesów: zwraca (dane, błąd) zamiast rzucać wyjątek."""
+    try:
+        return parse_excel_report(filepath), None
+    except Exception as e:
+        return None, str(e)
+
+def parse_excel_files(filepaths, processes=None):
+    """Parsuje wiele plików w puli procesów; wyniki w kolejności wejścia jako (dane, błąd)."""
+    if processes == 1 or len(filepaths) <= 1:
+        return [_parse_excel_file_safe(f) for f in filepaths]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_parse_excel_file_safe, filepaths))
+
+def write_quarter_csv(output_file, quarters):
+    """Zapisuje kwadranse do CSV: date, time_from, time_to, price_pln_per_mwh."""
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'time_from', 'time_to', 'price_pln_per_mwh'])
+        for date, label, price in quarters:
+            pos = quarter_position(label)
+            repeat = "a" if "a" in label else ""
+            time_from = f"{pos // 4:02d}{repeat}:{pos % 4 * 15:02d}"
+            price_str = f"{price:.2f}" if price is not None else ""
+            writer.writerow([date, time_from, label, price_str])
 
 def main():
-    if len(sys.argv) < 2:
-        print("Użycie: python konwertuj_excel.py <miesiac> [rok]")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) < 1:
+        print("Użycie: python konwertuj_excel.py <miesiac> [rok] [--procesy=N] [--profile[=PLIK]]")
         print("Przykład: python konwertuj_excel.py 10 2025")
         sys.exit(1)
     
-    month = int(sys.argv[1])
-    year = int(sys.argv[2]) if len(sys.argv) > 2 else 2025
+    month = int(args[0])
+    year = int(args[1]) if len(args) > 1 else 2025
+    processes = None
+    start_from_argv("konwertuj_excel")
+    for a in sys.argv[1:]:
+        if a.startswith("--procesy="):
+            processes = int(a.split("=", 1)[1])
     
     archiwum_dir = "archiwum"
     month_str = f"{month:02d}"
@@ -60,24 +150,34 @@ def main():
     
     print(f"Znaleziono {len(files)} plików dla {month_str}/{year}")
     
-    # Zbierz wszystkie dane
+    # Zbierz wszystkie dane (równolegle, wyniki w kolejności plików)
     all_data = []
-    for filename in files:
-        filepath = os.path.join(archiwum_dir, filename)
-        print(f"  Przetwarzam: {filename}...", end=" ")
-        try:
-            data = parse_excel_file(filepath)
-            print(f"{len(data)} godzin")
-            all_data.extend(data)
-        except Exception as e:
-            print(f"BŁĄD: {e}")
+    all_quarters = []
+    t0 = time.perf_counter()
+    paths = [os.path.join(archiwum_dir, f) for f in files]
+    profile().count("bytes_read", sum(os.path.getsize(p) for p in paths))
+    with profile().stage("excel"):
+        results = parse_excel_files(paths, processes)
+    for filename, (report, error) in zip(files, results):
+        print(f"  Przetworzono: {filename}...", end=" ")
+        if error is not None:
+            print(f"BŁĄD: {error}")
+            continue
+        data, quarters = report
+        print(f"{len(data)} godzin, {len(quarters)} kwadransów")
+        all_data.extend(data)
+        all_quarters.extend(quarters)
+        profile().count("rows_parsed", len(data) + len(quarters))
+    print(f"Czas przetwarzania: {time.perf_counter() - t0:.2f} s")
     
     # Sortuj po dacie i godzinie
     all_data.sort(key=lambda x: (x[0], x[1]))
+    # Kwadranse tylko po dacie - sortowanie stabilne zachowuje kolejność z arkusza
+    all_quarters.sort(key=lambda x: x[0])
     
     # Zapisz do CSV (format zgodny z pobierz_dane.py)
     output_file = f"tge_rdn_hourly_{year}-{month_str}.xlsx.csv"
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+    with profile().stage("zapis_csv"), open(output_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         writer.writerow(['date', 'hour_from', 'hour_to', 'price_pln_per_mwh', 'volume_mwh'])
         for date, hour, price in all_data:
@@ -92,6 +192,18 @@ def main():
     prices = [p for _, _, p in all_data if p is not None]
     if prices:
         print(f"Ceny: min={min(prices):.2f}, max={max(prices):.2f}, średnia={sum(prices)/len(prices):.2f}")
+    
+    if all_quarters:
+        quarter_file = f"tge_rdn_15min_{year}-{month_str}.xlsx.csv"
+        with profile().stage("zapis_csv"):
+            write_quarter_csv(quarter_file, all_quarters)
+        with profile().stage("zapis_magazynu"):
+            write_quarter_partition(year, month,
+                                    [(d, quarter_position(label), p) for d, label, p in all_quarters],
+                                    source=quarter_file)
+        print(f"Zapisano {len(all_quarters)} kwadransów do {quarter_file} i do magazynu")
+    
+    finish_profile()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,474 @@
+"""
+Kolumnowy magazyn cen TGE RDN partycjonowany po roku i miesiącu.
+
+Zamiast czytać za każdym razem tekstowe pliki tge_rdn_hourly_YYYY-MM.csv
+i parsować daty, dane trzymane są jako tablice NumPy (.npy), wczytywane
+przez mmap - bez żadnego parsowania tekstu.
+
+Układ na dysku:
+    magazyn/2025/10/date.npy        datetime64[D]
+                   hour_from.npy   int8
+                   hour_to.npy     int8
+                   price.npy       float64 (NaN = brak ceny)
+                   volume.npy      float64 (NaN = brak wolumenu)
+                   _meta.json      plik źródłowy i liczba wierszy
+                   siatka.npy      float64 [dzień miesiąca, 25] - ceny w slotach siatki (siatka.py)
+                   agregaty.npy    float64 [dzień miesiąca, 5] - agregaty dni (agregaty.py)
+                   profil.npy      float64 [2, 24] - suma i liczba cen każdej godziny zegarowej
+                   q_day.npy       uint8  dzień miesiąca kwadransa
+                   q_pos.npy       uint8  pozycja na zegarze 0-95 (00:00-00:15 = 0)
+                   q_grosze.npy    int32  cena w groszach/MWh (QUARTER_MISSING = brak)
+                   _meta_15.json   jak _meta.json, dla kwadransów
+
+siatka.npy to gotowa macierz dni x sloty liczona raz przy imporcie:
+sloty 0-23 to godziny zegarowe, slot 24 - powtórzona godzina przy zmianie
+czasu na zimowy. load_day_matrix i load_grid tylko wycinają z niej wiersze.
+
+Kwadranse zapisane są w kolejności chronologicznej, więc dzień ma 96 wpisów,
+92 przy zmianie czasu na letni i 100 przy zmianie na zimowy (powtórzona
+godzina ma te same pozycje na zegarze). Liczby całkowite w groszach zajmują
+6 bajtów na kwadrans - kilka lat danych 15-minutowych to ułamek megabajta.
+
+Użycie:
+    python magazyn.py importuj [plik.csv ...]
+    python magazyn.py pokaz [od] [do]
+
+Przykłady:
+    python magazyn.py importuj                                  # wszystkie tge_rdn_hourly_YYYY-MM.csv
+    python magazyn.py importuj tge_rdn_hourly_2025-10.xlsx.csv  # wybrane źródło dla miesiąca
+    python magazyn.py importuj tge_rdn_15min_2025-10.xlsx.csv   # ceny 15-minutowe
+    python magazyn.py pokaz 2025-03-01 2025-03-31
+
+Użycie jako moduł:
+    from magazyn import load_prices, load_month
+    df = load_prices("2025-01-01", "2025-12-31")
+"""
+import os
+import re
+import sys
+import json
+import time
+import calendar
+from datetime import date
+
+import numpy as np
+
+# pandas (~0,5 s importu) ładowany jest tylko przez funkcje, które go używają:
+# import CSV i wyniki w postaci DataFrame. Odczyt siatki wystarcza numpy.
+from siatka import REPEAT_SLOT, REPEATED_HOUR, SLOTS, clock_matrix, slot_matrix, slots_from_hours
+
+STORE_DIR = "magazyn"
+DATA_DIR = "."
+
+# Kolumny magazynu -> nazwy kolumn w CSV (format pobierz_dane.py)
+COLUMNS = {
+    "date": "date",
+    "hour_from": "hour_from",
+    "hour_to": "hour_to",
+    "price": "price_pln_per_mwh",
+    "volume": "volume_mwh",
+}
+DTYPES = {
+    "date": "datetime64[D]",
+    "hour_from": np.int8,
+    "hour_to": np.int8,
+    "price": np.float64,
+    "volume": np.float64,
+}
+
+MONTH_CSV_RE = re.compile(r"tge_rdn_hourly_(\d{4})-(\d{2})\.csv$")
+QUARTER_CSV_RE = re.compile(r"tge_rdn_15min_\d{4}-\d{2}.*\.csv$")
+
+QUARTER_COLUMNS = {"q_day": np.uint8, "q_pos": np.uint8, "q_grosze": np.int32}
+QUARTER_MISSING = np.iinfo(np.int32).min
+QUARTERS_PER_DAY = 96
+
+
+def partition_dir(year: int, month: int) -> str:
+    return os.path.join(STORE_DIR, f"{year:04d}", f"{month:02d}")
+
+
+def _as_date(value) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def import_csv(csv_file: str) -> tuple[int, int]:
+    """
+    Wczytuje plik CSV miesiąca i zapisuje go jako partycję magazynu.
+
+    Jedyne miejsce, w którym parsowany jest tekst. Zwraca (rok, miesiąc).
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_file)
+    dates = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+    if len(dates) == 0:
+        raise ValueError(f"{csv_file}: brak danych")
+
+    first = pd.Timestamp(dates[0])
+    year, month = first.year, first.month
+    arrays = {"date": dates}
+    for col, csv_col in COLUMNS.items():
+        if col != "date":
+            arrays[col] = pd.to_numeric(df[csv_col], errors="coerce").to_numpy(dtype=DTYPES[col])
+
+    # Wiersze posortowane po dacie (stabilnie, żeby powtórzona godzina DST zachowała kolejność)
+    order = np.argsort(arrays["date"], kind="stable")
+    arrays = {k: v[order] for k, v in arrays.items()}
+    write_partition(year, month, arrays, source=csv_file)
+    write_grid(year, month, arrays)
+    return year, month
+
+
+def write_grid(year: int, month: int, arrays: dict):
+    """Zapisuje macierz [dzień miesiąca, SLOTS] cen partycji (siatka.npy)."""
+    first = np.datetime64(f"{year:04d}-{month:02d}-01")
+    day_index = (arrays["date"] - first).astype(np.intp)
+    slots = slots_from_hours(arrays["date"], arrays["hour_from"])
+    matrix = slot_matrix(day_index, slots, arrays["price"], calendar.monthrange(year, month)[1])
+    out_dir = partition_dir(year, month)
+    tmp = os.path.join(out_dir, "siatka.tmp.npy")
+    np.save(tmp, matrix)
+    os.replace(tmp, os.path.join(out_dir, "siatka.npy"))
+    # Agregaty miesiąca (agregaty.py) liczone są razem z siatką - import modułu
+    # tutaj, bo agregaty.py sam korzysta z magazynu
+    from agregaty import write_aggregates
+
+    write_aggregates(year, month, matrix)
+    return matrix
+
+
+def read_grid(year: int, month: int) -> np.ndarray:
+    """Macierz siatki partycji; partycje sprzed siatki są uzupełniane przy pierwszym odczycie."""
+    path = os.path.join(partition_dir(year, month), "siatka.npy")
+    if not os.path.exists(path):
+        part = partition_dir(year, month)
+        arrays = {col: np.load(os.path.join(part, f"{col}.npy")) for col in ("date", "hour_from", "price")}
+        return write_grid(year, month, arrays)
+    return np.load(path, mmap_mode="r")
+
+
+def write_partition(year: int, month: int, arrays: dict, source: str = "",
+                    dtypes: dict = DTYPES, meta_name: str = "_meta.json"):
+    out_dir = partition_dir(year, month)
+    os.makedirs(out_dir, exist_ok=True)
+    # Każdy plik zapisywany przez plik tymczasowy, plik meta na końcu
+    for col, dtype in dtypes.items():
+        tmp = os.path.join(out_dir, f"{col}.tmp.npy")
+        np.save(tmp, np.ascontiguousarray(arrays[col], dtype=dtype))
+        os.replace(tmp, os.path.join(out_dir, f"{col}.npy"))
+    rows = len(next(iter(arrays.values())))
+    meta = {"source": source, "rows": int(rows), "imported": time.time()}
+    tmp = os.path.join(out_dir, f"{meta_name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(out_dir, meta_name))
+
+
+def quarter_position(label: str) -> int:
+    """Pozycja kwadransa na zegarze z etykiety końca okresu TGE: "00:15" -> 0, "02a:00" -> 7."""
+    hh, mm = label.replace("a", "").split(":")
+    return (int(hh) * 60 + int(mm)) // 15 - 1
+
+
+def write_quarter_partition(year: int, month: int, rows, source: str = ""):
+    """
+    Zapisuje kwadranse miesiąca: rows to (data, pozycja 0-95, cena PLN/MWh lub None)
+    w kolejności chronologicznej.
+    """
+    rows = list(rows)
+    days = np.array([date.fromisoformat(d).day if isinstance(d, str) else d.day for d, _, _ in rows])
+    positions = np.array([pos for _, pos, _ in rows])
+    grosze = np.array([QUARTER_MISSING if p is None else round(p * 100) for _, _, p in rows], dtype=np.int64)
+    arrays = {"q_day": days, "q_pos": positions, "q_grosze": grosze}
+    write_partition(year, month, arrays, source, dtypes=QUARTER_COLUMNS, meta_name="_meta_15.json")
+
+
+def import_quarter_csv(csv_file: str) -> tuple[int, int]:
+    """Importuje plik tge_rdn_15min_*.csv (date, time_from, time_to, price_pln_per_mwh)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_file, dtype={"time_to": str})
+    if df.empty:
+        raise ValueError(f"{csv_file}: brak danych")
+    first = date.fromisoformat(df["date"].iloc[0])
+    prices = pd.to_numeric(df["price_pln_per_mwh"], errors="coerce")
+    rows = [
+        (d, quarter_position(t), None if np.isnan(p) else float(p))
+        for d, t, p in zip(df["date"], df["time_to"], prices)
+    ]
+    write_quarter_partition(first.year, first.month, rows, source=csv_file)
+    return first.year, first.month
+
+
+def read_meta(year: int, month: int, meta_name: str = "_meta.json") -> dict | None:
+    path = os.path.join(partition_dir(year, month), meta_name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def sync_from_csv(data_dir: str = DATA_DIR, months=None) -> list[tuple[int, int]]:
+    """
+    Importuje pliki tge_rdn_hourly_YYYY-MM.csv nowsze niż ich partycje.
+
+    Sprawdza tylko czasy modyfikacji, więc gdy nic się nie zmieniło, kosztuje
+    jedno os.stat na plik. months=[(rok, miesiąc), ...] ogranicza sprawdzanie
+    do tych miesięcy (bez listowania katalogu). Zwraca listę zaimportowanych
+    (rok, miesiąc).
+    """
+    if months is None:
+        names = sorted(os.listdir(data_dir))
+    else:
+        names = [f"tge_rdn_hourly_{y:04d}-{m:02d}.csv" for y, m in months]
+        names = [n for n in names if os.path.exists(os.path.join(data_dir, n))]
+    imported = []
+    for name in names:
+        match = MONTH_CSV_RE.match(name)
+        if not match:
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        path = os.path.join(data_dir, name)
+        meta = read_meta(year, month)
+        if meta is None or os.path.getmtime(path) > meta["imported"]:
+            imported.append(import_csv(path))
+    return imported
+
+
+def list_partitions(meta_name: str = "_meta.json") -> list[tuple[int, int]]:
+    """Zwraca posortowaną listę (rok, miesiąc) dostępnych w magazynie."""
+    parts = []
+    if not os.path.isdir(STORE_DIR):
+        return parts
+    for y in os.listdir(STORE_DIR):
+        if not y.isdigit():
+            continue
+        for m in os.listdir(os.path.join(STORE_DIR, y)):
+            if m.isdigit() and os.path.exists(os.path.join(STORE_DIR, y, m, meta_name)):
+                parts.append((int(y), int(m)))
+    return sorted(parts)
+
+
+def load_arrays(start=None, end=None, columns=None, sync: bool = True) -> dict:
+    """
+    Wczytuje kolumny z zakresu dat [start, end] jako tablice NumPy.
+
+    Odczytywane są wyłącznie partycje (miesiące) nachodzące na zakres, a w
+    partycjach brzegowych wiersze wycinane są przez wyszukiwanie binarne po dacie.
+    """
+    if sync:
+        sync_from_csv()
+    start, end = _as_date(start), _as_date(end)
+    columns = list(columns or COLUMNS)
+    if "date" not in columns:
+        columns = ["date"] + columns
+
+    lo_key = (start.year, start.month) if start else None
+    hi_key = (end.year, end.month) if end else None
+    lo = np.datetime64(start, "D") if start else None
+    hi = np.datetime64(end, "D") if end else None
+
+    chunks = {col: [] for col in columns}
+    for year, month in list_partitions():
+        if (lo_key and (year, month) < lo_key) or (hi_key and (year, month) > hi_key):
+            continue
+        part = partition_dir(year, month)
+        dates = np.load(os.path.join(part, "date.npy"), mmap_mode="r")
+        i = np.searchsorted(dates, lo, side="left") if lo is not None else 0
+        j = np.searchsorted(dates, hi, side="right") if hi is not None else len(dates)
+        if i >= j:
+            continue
+        for col in columns:
+            arr = dates if col == "date" else np.load(os.path.join(part, f"{col}.npy"), mmap_mode="r")
+            chunks[col].append(arr[i:j])
+
+    return {
+        col: np.concatenate(parts) if parts else np.empty(0, dtype=DTYPES[col])
+        for col, parts in chunks.items()
+    }
+
+
+def load_prices(start=None, end=None, sync: bool = True) -> "pd.DataFrame":
+    """
+    Wczytuje ceny z zakresu dat jako DataFrame w formacie CSV z pobierz_dane.py.
+
+    Kolumna date ma już typ datetime64, nie trzeba wołać pd.to_datetime.
+    """
+    import pandas as pd
+
+    arrays = load_arrays(start, end, sync=sync)
+    return pd.DataFrame({
+        csv_col: arrays[col].astype("datetime64[ns]") if col == "date" else arrays[col]
+        for col, csv_col in COLUMNS.items()
+    })
+
+
+def load_quarters(start=None, end=None) -> dict:
+    """
+    Wczytuje kwadranse z zakresu dat: date (datetime64[D]), q_pos (uint8), q_grosze (int32).
+
+    Tablice są w kolejności chronologicznej; brak ceny to QUARTER_MISSING.
+    """
+    start, end = _as_date(start), _as_date(end)
+    lo = np.datetime64(start, "D") if start else None
+    hi = np.datetime64(end, "D") if end else None
+    chunks = {"date": [], "q_pos": [], "q_grosze": []}
+    for year, month in list_partitions("_meta_15.json"):
+        if (start and (year, month) < (start.year, start.month)) or (end and (year, month) > (end.year, end.month)):
+            continue
+        part = partition_dir(year, month)
+        q_day = np.load(os.path.join(part, "q_day.npy"), mmap_mode="r")
+        dates = np.datetime64(f"{year:04d}-{month:02d}-01") + (q_day.astype(np.int64) - 1)
+        i = np.searchsorted(dates, lo, side="left") if lo is not None else 0
+        j = np.searchsorted(dates, hi, side="right") if hi is not None else len(dates)
+        if i >= j:
+            continue
+        chunks["date"].append(dates[i:j])
+        for col in ("q_pos", "q_grosze"):
+            chunks[col].append(np.load(os.path.join(part, f"{col}.npy"), mmap_mode="r")[i:j])
+    dtypes = {"date": "datetime64[D]", **QUARTER_COLUMNS}
+    return {col: np.concatenate(parts) if parts else np.empty(0, dtype=dtypes[col]) for col, parts in chunks.items()}
+
+
+def quarter_prices(grosze: np.ndarray) -> np.ndarray:
+    """Grosze/MWh (int32) -> PLN/MWh (float, NaN = brak)."""
+    prices = grosze.astype(np.float64) / 100
+    prices[grosze == QUARTER_MISSING] = np.nan
+    return prices
+
+
+def hourly_from_quarters(start=None, end=None) -> "pd.DataFrame":
+    """
+    Godzinowe ceny wyliczone z kwadransów (średnia kwadransów danej godziny)
+    w formacie load_prices. Dzień 92/100-kwadransowy daje 23/25 godzin.
+
+    Kwadranse grupowane są po (dzień, slot siatki), a nie po czwórkach
+    kolejnych wierszy, więc brakujący wiersz kwadransa nie przesuwa godzin.
+    Drugi przebieg powtórzonej godziny (pozycja na zegarze cofa się w obrębie
+    dnia) trafia do slotu REPEAT_SLOT, jak w siatce.
+    """
+    import pandas as pd
+
+    q = load_quarters(start, end)
+    dates = q["date"]
+    hours = (q["q_pos"] // 4).astype(np.int64)
+    same_day = np.zeros(len(dates), dtype=bool)
+    same_day[1:] = dates[1:] == dates[:-1]
+    back = np.zeros(len(dates), dtype=bool)
+    back[1:] = same_day[1:] & (q["q_pos"][1:] < q["q_pos"][:-1])
+    # Liczba cofnięć zegara od początku dnia - > 0 po powrocie do powtórzonej godziny
+    jumps = np.cumsum(back)
+    day_first = np.flatnonzero(~same_day)
+    jumps -= np.repeat(jumps[day_first], np.diff(np.append(day_first, len(dates))))
+    slots = np.where((jumps > 0) & (hours == REPEATED_HOUR), REPEAT_SLOT, hours)
+
+    keys, first, inverse = np.unique(dates.astype(np.int64) * SLOTS + slots, return_index=True, return_inverse=True)
+    prices = quarter_prices(q["q_grosze"])
+    valid = ~np.isnan(prices)
+    sums = np.bincount(inverse, weights=np.where(valid, prices, 0.0), minlength=len(keys))
+    counts = np.bincount(inverse, weights=valid, minlength=len(keys))
+    hourly = np.full(len(keys), np.nan)
+    np.divide(sums, counts, out=hourly, where=counts > 0)
+
+    # Godziny w kolejności chronologicznej (pierwszego kwadransa), powtórzona zaraz po pierwszej
+    order = np.argsort(first, kind="stable")
+    keys, hourly = keys[order], hourly[order]
+    slot = keys % SLOTS
+    hour_from = np.where(slot == REPEAT_SLOT, REPEATED_HOUR, slot).astype(np.int8)
+    return pd.DataFrame({
+        "date": (keys // SLOTS).astype("datetime64[D]").astype("datetime64[ns]"),
+        "hour_from": hour_from,
+        "hour_to": (hour_from + 1).astype(np.int8),
+        "price_pln_per_mwh": hourly,
+        "volume_mwh": np.full(len(hourly), np.nan),
+    })
+
+
+def load_grid(start=None, end=None, sync: bool = True) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Zwraca (dni, macierz [dzień, SLOTS]) z gotowych siatek partycji.
+
+    Pomijane są dni bez żadnej ceny; slot 24 to powtórzona godzina (siatka.py).
+    """
+    if sync:
+        sync_from_csv()
+    start, end = _as_date(start), _as_date(end)
+    days, matrices = [], []
+    for year, month in list_partitions():
+        if (start and (year, month) < (start.year, start.month)) or (end and (year, month) > (end.year, end.month)):
+            continue
+        grid = read_grid(year, month)
+        month_days = np.datetime64(f"{year:04d}-{month:02d}-01") + np.arange(len(grid))
+        keep = ~np.isnan(grid).all(axis=1)
+        if start:
+            keep &= month_days >= np.datetime64(start, "D")
+        if end:
+            keep &= month_days <= np.datetime64(end, "D")
+        days.append(month_days[keep])
+        matrices.append(grid[keep])
+    if not days:
+        return np.empty(0, dtype="datetime64[D]"), np.empty((0, SLOTS))
+    return np.concatenate(days), np.concatenate(matrices)
+
+
+def load_day_matrix(start=None, end=None, sync: bool = True, resolution: int = 60) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Zwraca (dni, macierz) - posortowane daty datetime64[D] i ceny [dzień, slot].
+
+    resolution=60 daje 24 godziny zegarowe, resolution=15 - 96 kwadransów.
+    Brakujące sloty to NaN, powtórzona godzina przy zmianie czasu jest uśredniana.
+    """
+    if resolution == 15:
+        q = load_quarters(start, end)
+        return _average_into_matrix(q["date"], q["q_pos"], quarter_prices(q["q_grosze"]), QUARTERS_PER_DAY)
+    if resolution != 60:
+        raise ValueError("Rozdzielczość musi wynosić 15 albo 60 minut")
+    days, grid = load_grid(start, end, sync=sync)
+    return days, clock_matrix(grid)
+
+
+def _average_into_matrix(dates, slots, prices, width: int) -> tuple[np.ndarray, np.ndarray]:
+    days, day_idx = np.unique(dates, return_inverse=True)
+    slots = slots.astype(np.intp)
+    valid = ~np.isnan(prices)
+    sums = np.zeros((len(days), width))
+    counts = np.zeros((len(days), width))
+    np.add.at(sums, (day_idx[valid], slots[valid]), prices[valid])
+    np.add.at(counts, (day_idx[valid], slots[valid]), 1)
+    matrix = np.full((len(days), width), np.nan)
+    np.divide(sums, counts, out=matrix, where=counts > 0)
+    return days, matrix
+
+
+def load_month(year: int, month: int, sync: bool = True) -> "pd.DataFrame":
+    last_day = calendar.monthrange(year, month)[1]
+    return load_prices(date(year, month, 1), date(year, month, last_day), sync=sync)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("importuj", "pokaz"):
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == "importuj":
+        files = sys.argv[2:]
+        if files:
+            for csv_file in files:
+                importer = import_quarter_csv if QUARTER_CSV_RE.search(csv_file) else import_csv
+                year, month = importer(csv_file)
+                print(f"Zaimportowano {csv_file} -> {partition_dir(year, month)}")
+        else:
+            for year, month in sync_from_csv():
+                print(f"Zaimportowano {year}-{month:02d} -> {partition_dir(year, month)}")
+        print(f"Partycje w magazynie: {len(list_partitions())}")
+    else:
+        start = sys.argv[2] if len(sys.argv) > 2 else None
+        end = sys.argv[3] if len(sys.argv) > 3 else None
+        t0 = time.perf_counter()
+        df = load_prices(start, end)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(df)
+        print(f"Wczytano {len(df)} wierszy w {elapsed:.1f} ms")
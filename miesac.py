@@ -1,142 +1,94 @@
-import csv
-import re
+"""
+Pobiera ceny godzinowe TGE RDN całego miesiąca i rysuje prostą heatmapę.
+
+Użycie: python miesac.py <miesiąc> [rok]
+Przykład: python miesac.py 12
+Przykład: python miesac.py 12 2025
+
+Pobieranie (z cache stron i limitem zapytań) i zapis CSV to kod z
+pobierz_dane.py; ten skrypt dodaje tylko heatmapę w skali RdYlGn.
+Dla miesięcy sprzed listopada 2025 użyj miesac-stary-format.py.
+"""
 import sys
 import calendar
-from datetime import date, timedelta
-
-import requests
-from lxml import html
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-
-URL = "https://tge.pl/energia-elektryczna-rdn-tge-base?date_start={d}&iframe=1"
-
-def pl_number_to_float(s: str) -> float | None:
-    s = s.strip()
-    if s == "-" or s == "":
-        return None
-    # "3 759,20" -> 3759.20
-    s = s.replace("\xa0", "").replace(" ", "").replace(",", ".")
-    return float(s)
-
-def fetch_day(d: date):
-    url = URL.format(d=d.isoformat())
-    print(f"Fetching: {url}")
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    
-    tree = html.fromstring(r.content)
-    
-    # Znajdź tabelę z danymi godzinowymi
-    table = tree.xpath('//table[@id="footable_kontrakty_godzinowe"]//tbody//tr')
-    
-    rows = []
-    for tr in table:
-        cells = tr.xpath('.//td')
-        if len(cells) >= 3:
-            # Pierwsza kolumna: czas (np. "0-1")
-            time_text = cells[0].text_content().strip()
-            time_match = re.match(r"(\d{1,2})-(\d{1,2})", time_text)
-            if not time_match:
-                continue
-            h_from = int(time_match.group(1))
-            h_to = int(time_match.group(2))
-            
-            # Druga kolumna: cena
-            price_text = cells[1].text_content().strip()
-            price = pl_number_to_float(price_text)
-            
-            # Trzecia kolumna: wolumen
-            vol_text = cells[2].text_content().strip()
-            vol = pl_number_to_float(vol_text)
-            
-            rows.append((h_from, h_to, price, vol))
-
-    if len(rows) != 24:
-        raise RuntimeError(f"{d}: expected 24 rows, got {len(rows)} (page format may have changed)")
-
-    return rows
-
-def daterange(d1: date, d2: date):
-    d = d1
-    while d <= d2:
-        yield d
-        d += timedelta(days=1)
+from datetime import date
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Użycie: python miesac.py <miesiąc> [rok]")
-        print("Przykład: python miesac.py 12")
-        print("Przykład: python miesac.py 12 2025")
-        sys.exit(1)
-    
-    month = int(sys.argv[1])
-    year = int(sys.argv[2]) if len(sys.argv) > 2 else 2025
-    
-    if month < 1 or month > 12:
-        print("Miesiąc musi być liczbą od 1 do 12")
-        sys.exit(1)
-    
-    last_day = calendar.monthrange(year, month)[1]
-    start = date(year, month, 1)
-    end = date(year, month, last_day)
-    
-    month_name = calendar.month_name[month]
-    month_str = f"{year}-{month:02d}"
+from pobierz_dane import URL_NEW, daterange, fetch_days, write_month_csv
 
-    out_csv = f"tge_rdn_hourly_{month_str}.csv"
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["date", "hour_from", "hour_to", "price_pln_per_mwh", "volume_mwh"])
 
-        for d in daterange(start, end):
-            day_rows = fetch_day(d)
-            for h_from, h_to, price, vol in day_rows:
-                w.writerow([d.isoformat(), h_from, h_to, price, vol])
+def render_month(by_day: dict, year: int, month: int, out_png: str, vmin=None, vmax=None, label_colors=None):
+    """
+    Heatmapa dni x godziny z wierszy {data: [(hour_from, hour_to, cena, wolumen)]}.
 
-    print(f"Saved: {out_csv}")
+    Powtórzona godzina DST jest uśredniana przez siatkę (siatka.py). label_colors
+    to funkcja macierz -> kolory tekstu; domyślnie biały powyżej średniej.
+    """
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    from siatka import clock_matrix, slot_matrix, slots_from_hours
+    from wykres import draw_cell_labels
+
+    last_day = calendar.monthrange(year, month)[1]
+    rows = [(d.day - 1, h_from, np.nan if price is None else price)
+            for d in sorted(by_day) for h_from, _, price, _ in by_day[d]]
+    day_index, hours, prices = (np.array(col) for col in zip(*rows))
+    slots = slots_from_hours(day_index, hours.astype(int))
+    values = clock_matrix(slot_matrix(day_index, slots, prices.astype(float), last_day))
+    day_numbers = np.arange(1, last_day + 1)
+    month_name = calendar.month_name[month]
 
-    # Generate heatmap
-    df = pd.read_csv(out_csv)
-    df['date'] = pd.to_datetime(df['date'])
-    df['day'] = df['date'].dt.day
-    
-    # Pivot table: days as rows, hours as columns
-    pivot = df.pivot(index='day', columns='hour_from', values='price_pln_per_mwh')
-    
-    # Create heatmap
     fig, ax = plt.subplots(figsize=(14, 10))
-    
-    im = ax.imshow(pivot.values, aspect='auto', cmap='RdYlGn_r')
-    
-    # Set labels
+    im = ax.imshow(values, aspect='auto', cmap='RdYlGn_r', vmin=vmin, vmax=vmax)
+
     ax.set_xticks(np.arange(24))
     ax.set_xticklabels([f'{h}-{h+1}' for h in range(24)])
-    ax.set_yticks(np.arange(len(pivot.index)))
-    ax.set_yticklabels([f'{month_name[:3]} {d}' for d in pivot.index])
-    
+    ax.set_yticks(np.arange(len(day_numbers)))
+    ax.set_yticklabels([f'{month_name[:3]} {d}' for d in day_numbers])
+
     ax.set_xlabel('Hour')
     ax.set_ylabel('Day')
     ax.set_title(f'TGE RDN Hourly Prices - {month_name} {year} (PLN/MWh)')
-    
-    # Add colorbar
+
     cbar = plt.colorbar(im, ax=ax)
     cbar.set_label('Price (PLN/MWh)')
-    
-    # Add values in cells
-    for i in range(len(pivot.index)):
-        for j in range(24):
-            val = pivot.values[i, j]
-            if not np.isnan(val):
-                text_color = 'white' if val > pivot.values.mean() else 'black'
-                ax.text(j, i, f'{val:.0f}', ha='center', va='center', 
-                       fontsize=6, color=text_color)
-    
+
+    if label_colors is None:
+        text_colors = np.where(values > np.nanmean(values), 'white', 'black')
+    else:
+        text_colors = label_colors(values)
+    draw_cell_labels(ax, values, fontsize=6, colors=text_colors)
+
     plt.tight_layout()
-    
+    plt.savefig(out_png, dpi=150)
+    plt.close(fig)
+
+
+def main(url_template: str = URL_NEW, **render_options):
+    if len(sys.argv) < 2:
+        print(sys.modules["__main__"].__doc__ or __doc__)
+        sys.exit(1)
+
+    month = int(sys.argv[1])
+    year = int(sys.argv[2]) if len(sys.argv) > 2 else 2025
+
+    if month < 1 or month > 12:
+        print("Miesiąc musi być liczbą od 1 do 12")
+        sys.exit(1)
+
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    month_str = f"{year}-{month:02d}"
+
+    by_day = dict(fetch_days(daterange(start, end), url_template))
+    out_csv = f"tge_rdn_hourly_{month_str}.csv"
+    write_month_csv(out_csv, by_day)
+    print(f"Saved: {out_csv}")
+
     heatmap_file = f'tge_rdn_heatmap_{month_str}.png'
-    plt.savefig(heatmap_file, dpi=150)
+    render_month(by_day, year, month, heatmap_file, **render_options)
     print(f"Saved: {heatmap_file}")
-    plt.close()
 
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Indeks najtańszych okien cenowych do planowania elastycznych odbiorników
+(ładowanie auta, pompa ciepła, bojler).
+
+Dla każdego dnia dostawy i każdego N/K od 1 do 24 indeks przechowuje:
+  - najtańsze ciągłe okno N godzin (godzina startu i średnia cena),
+  - najtańsze K godzin, niekoniecznie kolejnych (maska godzin i średnia cena).
+Indeks budowany jest wektorowo na macierzy dni x 24 (sumy kroczące przez
+cumsum, sortowanie cen w wierszach), a zapytania to odczyt jednej komórki.
+
+Użycie:
+    python okna.py zbuduj [od] [do]
+    python okna.py <data> <N> [K]
+
+Przykłady:
+    python okna.py zbuduj 2025-01-01 2025-12-31    # zapisuje okna.npz
+    python okna.py 2025-03-15 4                     # najtańsze 4 kolejne godziny
+    python okna.py 2025-03-15 4 6                   # ... oraz najtańsze 6 dowolnych godzin
+
+Użycie jako moduł:
+    from okna import WindowIndex
+    index = WindowIndex.build("2025-01-01", "2025-12-31")
+    start_hour, mean_price = index.cheapest_window("2025-03-15", 4)
+    hours, mean_price = index.cheapest_hours("2025-03-15", 6)
+"""
+import os
+import sys
+import zipfile
+from datetime import date
+
+import numpy as np
+
+from magazyn import load_day_matrix
+
+INDEX_FILE = "okna.npz"
+HOURS = 24
+INDEX_ARRAYS = ("days", "window_start", "window_mean", "hours_mask", "hours_mean")
+
+
+def check_hours(value: int, name: str = "N") -> int:
+    """Liczba godzin okna lub K; ValueError poza zakresem 1-24."""
+    if not 1 <= value <= HOURS:
+        raise ValueError(f"{name} musi być w zakresie 1-{HOURS} (podano {value})")
+    return value
+
+
+def window_tables(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Najtańsze ciągłe okna dla wszystkich N naraz.
+
+    Zwraca (start, średnia) o kształcie [dzień, N-1]. Okna zawierające brakującą
+    cenę są pomijane; gdy żadne okno nie jest pełne, start = -1 i średnia = NaN.
+    """
+    days = matrix.shape[0]
+    missing = np.isnan(matrix)
+    prices = np.where(missing, 0.0, matrix)
+    # Sumy prefiksowe: suma okna [s, s+N) = cs[s+N] - cs[s]
+    cs = np.zeros((days, HOURS + 1))
+    np.cumsum(prices, axis=1, out=cs[:, 1:])
+    gaps = np.zeros((days, HOURS + 1), dtype=np.int32)
+    np.cumsum(missing, axis=1, out=gaps[:, 1:])
+
+    starts = np.full((days, HOURS), -1, dtype=np.int8)
+    means = np.full((days, HOURS), np.nan)
+    for n in range(1, HOURS + 1):
+        sums = cs[:, n:] - cs[:, :-n]
+        has_gap = (gaps[:, n:] - gaps[:, :-n]) > 0
+        sums = np.where(has_gap, np.inf, sums)
+        best = np.argmin(sums, axis=1)
+        best_sum = sums[np.arange(days), best]
+        ok = np.isfinite(best_sum)
+        starts[ok, n - 1] = best[ok]
+        means[ok, n - 1] = best_sum[ok] / n
+    return starts, means
+
+
+def cheapest_hours_tables(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Najtańsze K godzin (dowolnych) dla wszystkich K naraz.
+
+    Zwraca (maska, średnia) o kształcie [dzień, K-1]; maska to bity godzin
+    (bit h oznacza godzinę od h do h+1). Brakujące ceny nigdy nie są wybierane:
+    gdy dzień ma mniej niż K cen, maska = 0 i średnia = NaN.
+    """
+    days = matrix.shape[0]
+    # NaN sortuje się na koniec, więc brakujące godziny mają najwyższą rangę
+    order = np.argsort(matrix, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(HOURS)[None, :].repeat(days, axis=0), axis=1)
+
+    sorted_prices = np.take_along_axis(matrix, order, axis=1)
+    means = np.cumsum(sorted_prices, axis=1) / np.arange(1, HOURS + 1)
+
+    # Maska dla K: godziny o randze < K, zakodowane jako bity
+    k = np.arange(1, HOURS + 1)[None, :, None]
+    bits = (1 << np.arange(HOURS, dtype=np.int64))[None, None, :]
+    masks = ((ranks[:, None, :] < k) * bits).sum(axis=2)
+    too_few = k[:, :, 0] > (~np.isnan(matrix)).sum(axis=1)[:, None]
+    masks[too_few] = 0
+    means[too_few] = np.nan
+    return masks, means
+
+
+class WindowIndex:
+    """Gotowe odpowiedzi dla każdego dnia i N/K od 1 do 24 - zapytanie to odczyt komórki."""
+
+    def __init__(self, days: np.ndarray, window_start, window_mean, hours_mask, hours_mean):
+        self.days = days
+        self.window_start = window_start
+        self.window_mean = window_mean
+        self.hours_mask = hours_mask
+        self.hours_mean = hours_mean
+        self._row = {d: i for i, d in enumerate(days.astype("datetime64[D]").tolist())}
+
+    @classmethod
+    def from_matrix(cls, days: np.ndarray, matrix: np.ndarray) -> "WindowIndex":
+        window_start, window_mean = window_tables(matrix)
+        hours_mask, hours_mean = cheapest_hours_tables(matrix)
+        return cls(days, window_start, window_mean, hours_mask, hours_mean)
+
+    @classmethod
+    def build(cls, start=None, end=None) -> "WindowIndex":
+        days, matrix = load_day_matrix(start, end)
+        return cls.from_matrix(days, matrix)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> "WindowIndex":
+        """Wczytuje indeks; ValueError, gdy plik jest uszkodzony albo z innej wersji."""
+        try:
+            with np.load(path) as data:
+                arrays = [data[name] for name in INDEX_ARRAYS]
+        except (KeyError, ValueError, OSError, zipfile.BadZipFile) as e:
+            raise ValueError(f"{path}: nieczytelny albo nieaktualny indeks ({e})") from None
+        days, tables = arrays[0], arrays[1:]
+        if any(table.shape != (len(days), HOURS) for table in tables):
+            raise ValueError(f"{path}: nieaktualny indeks (wymiary tablic niezgodne z {len(days)} x {HOURS})")
+        return cls(*arrays)
+
+    def save(self, path: str = INDEX_FILE):
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, days=self.days, window_start=self.window_start, window_mean=self.window_mean,
+                 hours_mask=self.hours_mask, hours_mean=self.hours_mean)
+        os.replace(tmp, path)
+
+    def _row_of(self, day) -> int:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        try:
+            return self._row[day]
+        except KeyError:
+            raise KeyError(f"Brak dnia {day} w indeksie") from None
+
+    def __contains__(self, day) -> bool:
+        return (date.fromisoformat(day) if isinstance(day, str) else day) in self._row
+
+    def cheapest_window(self, day, n: int) -> tuple[int, float]:
+        """(godzina startu, średnia cena) najtańszego ciągłego okna N godzin; (-1, nan) gdy brak."""
+        check_hours(n, "N")
+        row = self._row_of(day)
+        return int(self.window_start[row, n - 1]), float(self.window_mean[row, n - 1])
+
+    def cheapest_hours(self, day, k: int) -> tuple[list[int], float]:
+        """(lista godzin, średnia cena) K najtańszych godzin dnia; ([], nan) gdy brak K cen."""
+        check_hours(k, "K")
+        row = self._row_of(day)
+        mask = int(self.hours_mask[row, k - 1])
+        return [h for h in range(HOURS) if mask >> h & 1], float(self.hours_mean[row, k - 1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    if sys.argv[1] == "zbuduj":
+        start = sys.argv[2] if len(sys.argv) > 2 else None
+        end = sys.argv[3] if len(sys.argv) > 3 else None
+        index = WindowIndex.build(start, end)
+        index.save()
+        print(f"Zapisano indeks {len(index.days)} dni do {INDEX_FILE}")
+        sys.exit(0)
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    day = sys.argv[1]
+    try:
+        day = date.fromisoformat(day)
+        n = check_hours(int(sys.argv[2]), "N")
+        k = check_hours(int(sys.argv[3]), "K") if len(sys.argv) > 3 else None
+    except ValueError as e:
+        print(f"Błąd: {e}")
+        sys.exit(1)
+
+    index = None
+    if os.path.exists(INDEX_FILE):
+        try:
+            index = WindowIndex.load()
+        except ValueError as e:
+            print(f"{e} - przebudowuję z magazynu")
+    if index is not None and day not in index:
+        print(f"Brak dnia {day} w {INDEX_FILE} - przebudowuję z magazynu")
+        index = None
+    if index is None:
+        index = WindowIndex.build()
+        index.save()
+    if day not in index:
+        print(f"Brak dnia {day} w magazynie")
+        sys.exit(1)
+
+    start_hour, mean_price = index.cheapest_window(day, n)
+    if start_hour < 0:
+        print(f"{day}: brak pełnego okna {n} h")
+    else:
+        print(f"{day}: najtańsze {n} h z rzędu: {start_hour}-{start_hour + n}, średnio {mean_price:.2f} PLN/MWh")
+    if k is not None:
+        hours, mean_price = index.cheapest_hours(day, k)
+        if not hours:
+            print(f"{day}: mniej niż {k} godzin z ceną")
+        else:
+            print(f"{day}: najtańsze {k} h: {', '.join(f'{h}-{h + 1}' for h in hours)}, średnio {mean_price:.2f} PLN/MWh")
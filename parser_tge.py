@@ -0,0 +1,96 @@
+"""
+Strumieniowy parser tabeli godzinowej TGE RDN (footable_kontrakty_godzinowe).
+
+Zamiast budować drzewo całej strony, parser karmi lxml kolejnymi kawałkami
+odpowiedzi i kończy pracę, gdy tylko tabela godzinowa zostanie zamknięta -
+reszta strony (komunikaty, stopka, skrypty) nie jest ani czytana, ani parsowana.
+Liczby w formacie polskim ("3 759,20") są konwertowane hurtem dla całej tabeli.
+
+Użycie jako moduł:
+    from parser_tge import parse_hourly_table, stream_hourly_table
+
+    rows = parse_hourly_table(content)                   # całe bajty strony
+    rows, raw = stream_hourly_table(r.iter_content(16384))  # odpowiedź strumieniowa
+
+Każdy wiersz to krotka (hour_from, hour_to, price, volume).
+"""
+import re
+
+from lxml import etree
+
+TABLE_ID = "footable_kontrakty_godzinowe"
+CHUNK_SIZE = 16384
+
+# Wyrażenia kompilowane raz, przy imporcie modułu
+ROWS = etree.XPath(".//tbody//tr")
+CELLS = etree.XPath(".//td")
+TIME_RE = re.compile(r"\s*(\d{1,2})-(\d{1,2})")
+
+# "3 759,20" -> "3759.20" (spacje zwykłe i twarde znikają, przecinek na kropkę)
+_PL_NUMBER = str.maketrans({"\xa0": None, " ": None, ",": "."})
+
+
+def pl_numbers_to_floats(texts) -> list[float | None]:
+    """Konwertuje listę liczb w formacie polskim naraz; "-" i puste dają None."""
+    joined = "\n".join(t.strip() for t in texts).translate(_PL_NUMBER)
+    return [float(s) if s not in ("", "-") else None for s in joined.split("\n")]
+
+
+def cell_text(cell) -> str:
+    # Odpowiednik text_content() z lxml.html; komórka bez dzieci (typowy przypadek)
+    # ma cały tekst w .text, więc omijamy kosztowne itertext()
+    if len(cell) == 0:
+        return cell.text or ""
+    return "".join(cell.itertext())
+
+
+def parse_table_element(table) -> list[tuple]:
+    """Wyciąga wiersze (hour_from, hour_to, price, volume) z elementu <table>."""
+    hours = []
+    price_texts = []
+    vol_texts = []
+    for tr in ROWS(table):
+        cells = CELLS(tr)
+        if len(cells) < 3:
+            continue
+        # Pierwsza kolumna: czas (np. "0-1")
+        time_match = TIME_RE.match(cell_text(cells[0]))
+        if not time_match:
+            continue
+        hours.append((int(time_match.group(1)), int(time_match.group(2))))
+        # Druga i trzecia kolumna: cena i wolumen (w starym formacie - Fixing I)
+        price_texts.append(cell_text(cells[1]))
+        vol_texts.append(cell_text(cells[2]))
+
+    values = pl_numbers_to_floats(price_texts + vol_texts)
+    prices, vols = values[:len(hours)], values[len(hours):]
+    return [(h_from, h_to, price, vol) for (h_from, h_to), price, vol in zip(hours, prices, vols)]
+
+
+def stream_hourly_table(chunks) -> tuple[list[tuple], bytes]:
+    """
+    Parsuje strumień kawałków strony aż do zamknięcia tabeli godzinowej.
+
+    Zwraca (wiersze, przeczytane_bajty). Przeczytany prefiks strony zawiera
+    całą tabelę, więc nadaje się do zapisania w cache i ponownego parsowania.
+    Jeśli tabeli nie ma, zwraca pustą listę wierszy.
+    """
+    parser = etree.HTMLPullParser(events=("end",), tag="table")
+    consumed = []
+    for chunk in chunks:
+        consumed.append(chunk)
+        parser.feed(chunk)
+        for _, table in parser.read_events():
+            if table.get("id") == TABLE_ID:
+                return parse_table_element(table), b"".join(consumed)
+    parser.close()
+    for _, table in parser.read_events():
+        if table.get("id") == TABLE_ID:
+            return parse_table_element(table), b"".join(consumed)
+    return [], b"".join(consumed)
+
+
+def parse_hourly_table(content: bytes) -> list[tuple]:
+    """Parsuje tabelę godzinową z gotowych bajtów strony."""
+    chunks = (content[i:i + CHUNK_SIZE] for i in range(0, len(content), CHUNK_SIZE))
+    return stream_hourly_table(chunks)[0]
@@ -2,78 +2,443 @@
 Skrypt do pobierania danych godzinowych TGE RDN.
 
 Użycie:
-    python pobierz_dane.py <miesiąc> [rok] [--stary]
+    python pobierz_dane.py <miesiąc> [rok] [opcje]
+    python pobierz_dane.py <od> <do> [opcje]      # daty YYYY-MM-DD, dowolny zakres
+
+    opcje: [--stary|--nowy] [--watki=N] [--limit=R] [--proby=N] [--przyrostowo]
+           [--offline] [--bez-cache] [--profile[=PLIK]]
 
 Przykłady:
-    python pobierz_dane.py 12           # grudzień 2025, nowy format
-    python pobierz_dane.py 3 2025 --stary   # marzec 2025, stary format
-    python pobierz_dane.py 1 2026       # styczeń 2026, nowy format
+    python pobierz_dane.py 12           # grudzień 2025
+    python pobierz_dane.py 3 2025       # marzec 2025 (format URL dobierany z daty)
+    python pobierz_dane.py 2024-06-15 2026-01-31 --watki=4   # zakres przez wiele miesięcy
+    python pobierz_dane.py 1 2026 --watki=4 --limit=4   # 4 wątki, max 4 zapytania/s
+    python pobierz_dane.py 1 2026 --przyrostowo         # dociągnij tylko brakujące dni
+    python pobierz_dane.py 3 2025 --offline     # przeparsuj stronę z cache, bez sieci
 
 Opcje:
-    --stary    Użyj starego formatu URL (dla miesięcy przed listopad 2025)
+    --stary      Wymuś stary format URL dla wszystkich dni (domyślnie: przed 2025-11-01)
+    --nowy       Wymuś nowy format URL dla wszystkich dni (domyślnie: od 2025-11-01)
+    --watki=N    Liczba równoległych wątków pobierających (domyślnie 1)
+    --limit=R    Maksymalna liczba zapytań na sekundę do jednego hosta (domyślnie 2)
+    --proby=N    Liczba ponowień dnia po błędzie sieci/5xx, z wykładniczym odstępem (domyślnie 4)
+    --przyrostowo  Pobierz tylko dni, których brakuje w istniejącym CSV
+    --offline    Nie łącz się z siecią - parsuj wyłącznie strony zapisane w cache
+    --bez-cache  Nie czytaj ani nie zapisuj surowych stron w katalogu cache
+    --profile    Zmierz etapy (sieć, parsowanie, zapis) i zapisz raport JSON (profil.py)
+
+Surowe strony HTML każdego dnia są zapisywane w cache_html/<format>/<data>.html,
+więc ponowne uruchomienie (albo zmiana parsera) nie wymaga ponownego pobierania.
+
+Zakres pobierany jest miesiąc po miesiącu. Każdy pobrany dzień trafia od razu
+do dziennika dziennik_pobierania/<od>_<do>.jsonl, a CSV miesiąca zapisywany
+jest atomowo (plik tymczasowy + rename) i łączony z dniami, które już w nim
+były - błąd w połowie nie ucina pliku. Dni, których nie udało się pobrać mimo
+ponowień, są wypisywane na końcu (kod wyjścia 1); ponowne uruchomienie z tym
+samym zakresem wznawia pracę od dziennika i pyta tylko o brakujące dni.
 """
 import csv
-import re
+import json
+import os
+import random
 import sys
+import time
+import hashlib
 import calendar
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
+from urllib.parse import urlsplit
 
-import requests
-from lxml import html
+# requests i lxml (parser_tge) importowane są dopiero przy pobieraniu/parsowaniu -
+# moduł importują też skrypty, którym wystarcza get_option czy zapis CSV
+from profil import current as profile, finish as finish_profile, start_from_argv
 
 # URL dla nowego formatu (od listopada 2025)
 URL_NEW = "https://tge.pl/energia-elektryczna-rdn-tge-base?date_start={d}&iframe=1"
 # URL dla starego formatu (przed listopad 2025)
 URL_OLD = "https://tge.pl/energia-elektryczna-rdn?date_start={d}"
+# Pierwszy dzień, dla którego tge.pl udostępnia nowy format
+NEW_FORMAT_FROM = date(2025, 11, 1)
+
+# Domyślnie pobieramy sekwencyjnie i nie częściej niż 2 zapytania/s na host
+DEFAULT_WORKERS = 1
+DEFAULT_RATE_LIMIT = 2.0
+
+# Resztę strony po tabeli godzinowej doczytujemy (do tego limitu), żeby połączenie
+# wróciło do puli sesji - przerwana odpowiedź zamyka połączenie i każdy dzień
+# płaciłby za nowe połączenie TCP/TLS (strona starego formatu ma ok. 80 kB)
+DRAIN_LIMIT = 256 * 1024
+
+# Ponowienia po błędzie sieci albo 5xx: odstępy 1, 2, 4, 8 s (+ losowy rozrzut)
+DEFAULT_RETRIES = 4
+RETRY_BACKOFF = 1.0
+RETRY_BACKOFF_MAX = 60.0
+
+# Dzienniki wznawiania pobierania zakresów (jeden plik JSONL na zakres)
+JOURNAL_DIR = "dziennik_pobierania"
+
+# Katalog z surowymi stronami HTML (jeden plik na dzień i format URL)
+CACHE_DIR = "cache_html"
+CACHE_FORMATS = {URL_NEW: "nowy", URL_OLD: "stary"}
+
+CSV_HEADER = ["date", "hour_from", "hour_to", "price_pln_per_mwh", "volume_mwh"]
+
+
+class HostRateLimiter:
+    """Ogranicza liczbę zapytań na sekundę osobno dla każdego hosta (bezpieczne dla wątków)."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url: str):
+        if self.interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        # Rezerwujemy kolejny wolny termin pod blokadą, czekamy już poza nią
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
 
 
-def pl_number_to_float(s: str) -> float | None:
-    s = s.strip()
-    if s == "-" or s == "":
+def url_for_day(d: date) -> str:
+    """Szablon URL, pod którym tge.pl publikuje dany dzień."""
+    return URL_NEW if d >= NEW_FORMAT_FROM else URL_OLD
+
+
+def make_session(workers: int = DEFAULT_WORKERS):
+    """Sesja keep-alive (requests.Session) z pulą połączeń dopasowaną do liczby wątków."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def cache_path(d: date, url_template: str) -> str:
+    """Ścieżka pliku cache dla dnia - osobny podkatalog dla każdego szablonu URL."""
+    fmt = CACHE_FORMATS.get(url_template)
+    if fmt is None:
+        fmt = hashlib.sha1(url_template.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, fmt, f"{d.isoformat()}.html")
+
+
+def read_cached_day(d: date, url_template: str) -> bytes | None:
+    path = cache_path(d, url_template)
+    if not os.path.exists(path):
         return None
-    # "3 759,20" -> 3759.20
-    s = s.replace("\xa0", "").replace(" ", "").replace(",", ".")
-    return float(s)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_cached_day(d: date, url_template: str, content: bytes):
+    path = cache_path(d, url_template)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Zapis przez plik tymczasowy, żeby przerwany proces nie zostawił uciętej strony
+    tmp = f"{path}.tmp{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
 
 
-def fetch_day(d: date, url_template: str):
+def fetch_day(d: date, url_template: str, session=None,
+              limiter: HostRateLimiter | None = None, use_cache: bool = True):
+    if use_cache:
+        content = read_cached_day(d, url_template)
+        if content is not None:
+            profile().count("cache_hits")
+            return parse_day(d, content)
+
+    import requests
+    from parser_tge import CHUNK_SIZE, stream_hourly_table
+
     url = url_template.format(d=d.isoformat())
+    if limiter is not None:
+        limiter.wait(url)
     print(f"Fetching: {url}")
-    r = requests.get(url, timeout=30)
-    r.raise_for_status()
-    
-    tree = html.fromstring(r.content)
-    
-    # Znajdź tabelę z danymi godzinowymi
-    table = tree.xpath('//table[@id="footable_kontrakty_godzinowe"]//tbody//tr')
-    
-    rows = []
-    for tr in table:
-        cells = tr.xpath('.//td')
-        if len(cells) >= 3:
-            # Pierwsza kolumna: czas (np. "0-1")
-            time_text = cells[0].text_content().strip()
-            time_match = re.match(r"(\d{1,2})-(\d{1,2})", time_text)
-            if not time_match:
-                continue
-            h_from = int(time_match.group(1))
-            h_to = int(time_match.group(2))
-            
-            # Druga kolumna: cena
-            price_text = cells[1].text_content().strip()
-            price = pl_number_to_float(price_text)
-            
-            # Trzecia kolumna: wolumen
-            vol_text = cells[2].text_content().strip()
-            vol = pl_number_to_float(vol_text)
-            
-            rows.append((h_from, h_to, price, vol))
+    # Czytamy odpowiedź strumieniowo i przerywamy zaraz po zamknięciu tabeli godzinowej
+    with profile().stage("siec"):
+        r = (session or requests).get(url, timeout=30, stream=True)
+    with r:
+        r.raise_for_status()
+        # Czas oczekiwania na kolejne kawałki to sieć, czas między nimi - parsowanie
+        chunks = profile().timed_iter(r.iter_content(CHUNK_SIZE), "siec", "parsowanie")
+        rows, raw = stream_hourly_table(chunks)
+        drain_response(r)
+    profile().count("bytes_downloaded", len(raw))
+    profile().count("rows_parsed", len(rows))
+    check_day_rows(d, rows)
 
+    # Do cache trafiają tylko strony z poprawną tabelą (nie np. dzień jeszcze nieopublikowany)
+    if use_cache:
+        write_cached_day(d, url_template, raw)
+    return rows
+
+
+def is_retryable(error: Exception) -> bool:
+    """Błędy sieci, 429 i 5xx warto ponowić; pozostałe 4xx nie zmienią się po czasie."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True
+    return response.status_code == 429 or response.status_code >= 500
+
+
+def with_retries(call, label: str, retries: int = DEFAULT_RETRIES):
+    """Wywołuje call() i ponawia po błędzie sieci/429/5xx z wykładniczym odstępem."""
+    import requests
+
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except requests.RequestException as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            # Losowy rozrzut, żeby równoległe wątki nie wracały do serwera w tej samej chwili
+            delay = min(RETRY_BACKOFF * 2 ** attempt, RETRY_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+            print(f"  {label}: {e} - ponawiam za {delay:.1f} s ({attempt + 1}/{retries})")
+            profile().count("retries")
+            time.sleep(delay)
+
+
+def fetch_day_retrying(d: date, url_template: str | None = None, session=None,
+                       limiter: HostRateLimiter | None = None, use_cache: bool = True,
+                       retries: int = DEFAULT_RETRIES):
+    """fetch_day z ponowieniami i wykładniczym odstępem; url_template=None - format z daty."""
+    url_template = url_template or url_for_day(d)
+    return with_retries(lambda: fetch_day(d, url_template, session, limiter, use_cache), str(d), retries)
+
+
+def drain_response(r, limit: int = DRAIN_LIMIT):
+    """Doczytuje i odrzuca resztę odpowiedzi; dłuższą niż limit przerywa (połączenie przepada)."""
+    with profile().stage("siec"):
+        drained = 0
+        while drained <= limit:
+            chunk = r.raw.read(64 * 1024)
+            if not chunk:
+                return
+            drained += len(chunk)
+    profile().count("connections_dropped")
+
+
+def parse_day(d: date, content: bytes):
+    from parser_tge import parse_hourly_table
+
+    with profile().stage("parsowanie"):
+        rows = parse_hourly_table(content)
+    profile().count("rows_parsed", len(rows))
+    check_day_rows(d, rows)
+    return rows
+
+
+def check_day_rows(d: date, rows):
     # Akceptuj 23, 24 lub 25 godzin (zmiana czasu letni/zimowy)
     if len(rows) not in (23, 24, 25):
         raise RuntimeError(f"{d}: expected 23-25 rows, got {len(rows)} (page format may have changed)")
 
-    return rows
+
+def fetch_days(days, url_template: str | None = None, workers: int = DEFAULT_WORKERS,
+               rate_limit: float = DEFAULT_RATE_LIMIT, use_cache: bool = True,
+               retries: int = DEFAULT_RETRIES):
+    """
+    Pobiera wiele dni równolegle jedną współdzieloną sesją keep-alive.
+
+    Zwraca listę (data, wiersze) posortowaną po dacie, niezależnie od
+    kolejności, w jakiej odpowiedzi wróciły z serwera. Pierwszy dzień, którego
+    nie udało się pobrać mimo ponowień, przerywa całość wyjątkiem.
+    """
+    days = sorted(days)
+    limiter = HostRateLimiter(rate_limit)
+
+    def one(d, session):
+        return fetch_day_retrying(d, url_template, session, limiter, use_cache, retries)
+
+    with make_session(workers) as session:
+        if workers <= 1:
+            return [(d, one(d, session)) for d in days]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map zachowuje kolejność wejścia, więc wynik jest już w kolejności dat
+            results = pool.map(lambda d: one(d, session), days)
+            return list(zip(days, results))
+
+
+class DownloadJournal:
+    """
+    Dziennik pobranych dni zakresu (JSONL, jeden dzień na linię).
+
+    Każdy wpis jest dopisywany i synchronizowany na dysk od razu po pobraniu
+    dnia, więc po przerwaniu procesu ponowne uruchomienie zna wszystkie dni
+    pobrane wcześniej. Ucięta ostatnia linia (przerwa w trakcie zapisu) jest
+    pomijana.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.days = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self.days[date.fromisoformat(entry["date"])] = [tuple(r) for r in entry["rows"]]
+
+    def append(self, d: date, rows):
+        line = json.dumps({"date": d.isoformat(), "rows": [list(r) for r in rows]}, ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.days[d] = rows
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def journal_path(start: date, end: date) -> str:
+    return os.path.join(JOURNAL_DIR, f"{start.isoformat()}_{end.isoformat()}.jsonl")
+
+
+def month_csv_path(year: int, month: int) -> str:
+    return f"tge_rdn_hourly_{year}-{month:02d}.csv"
+
+
+def month_spans(start: date, end: date):
+    """(rok, miesiąc, pierwszy, ostatni dzień) kolejnych miesięcy przecinających [start, end]."""
+    first = start
+    while first <= end:
+        last = date(first.year, first.month, calendar.monthrange(first.year, first.month)[1])
+        yield first.year, first.month, first, min(last, end)
+        first = last + timedelta(days=1)
+
+
+def download_range(start: date, end: date, url_template: str | None = None,
+                   workers: int = DEFAULT_WORKERS, rate_limit: float = DEFAULT_RATE_LIMIT,
+                   use_cache: bool = True, incremental: bool = False,
+                   retries: int = DEFAULT_RETRIES) -> dict:
+    """
+    Pobiera zakres dat miesiąc po miesiącu z dziennikiem wznawiania.
+
+    Dni z dziennika i (w trybie przyrostowym) dni już zapisane w CSV nie są
+    pobierane ponownie. CSV każdego miesiąca jest zapisywany atomowo zaraz po
+    jego dniach, razem z dniami, które były w nim wcześniej. Dni w przyszłości
+    (ceny jeszcze nieopublikowane) są pomijane bez błędu. Zwraca
+    {data: błąd} dni, których nie udało się pobrać; przy pustym wyniku
+    dziennik jest usuwany.
+    """
+    import requests
+
+    journal = DownloadJournal(journal_path(start, end))
+    if journal.days:
+        print(f"Wznawiam z {journal.path}: {len(journal.days)} dni już pobranych")
+    limiter = HostRateLimiter(rate_limit)
+    tomorrow = date.today() + timedelta(days=1)
+    failed = {}
+    fetched_count = 0
+    t0 = time.monotonic()
+    with make_session(workers) as session, ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for year, month, first, last in month_spans(start, end):
+            out_csv = month_csv_path(year, month)
+            with profile().stage("odczyt_csv"):
+                by_day = read_month_csv(out_csv)
+            days = [d for d in daterange(first, last)
+                    if d not in journal.days and d <= tomorrow and not (incremental and d in by_day)]
+            if incremental:
+                print(f"Tryb przyrostowy: {len(by_day)} dni w {out_csv}, do uzupełnienia: {len(days)}")
+            futures = {pool.submit(fetch_day_retrying, d, url_template, session, limiter, use_cache, retries): d
+                       for d in days}
+            with profile().stage("pobieranie"):
+                for future in as_completed(futures):
+                    d = futures[future]
+                    try:
+                        rows = future.result()
+                    except (requests.RequestException, RuntimeError) as e:
+                        # Jutrzejsze ceny mogą jeszcze nie być opublikowane - to nie jest błąd
+                        if d > date.today():
+                            print(f"  {d}: brak danych ({e}), pomijam")
+                        else:
+                            failed[d] = e
+                        continue
+                    journal.append(d, rows)
+                    fetched_count += 1
+
+            month_days = {d: rows for d, rows in journal.days.items() if first <= d <= last}
+            if not month_days:
+                continue
+            with profile().stage("zapis_csv"):
+                by_day = merge_month_csv(out_csv, month_days)
+            print(f"Saved: {out_csv} ({len(by_day)} dni)")
+
+    elapsed = max(time.monotonic() - t0, 1e-9)
+    print(f"Pobrano {fetched_count} dni w {elapsed:.1f} s ({fetched_count / elapsed:.2f} dni/s, wątki: {workers})")
+    if not failed:
+        journal.remove()
+    return failed
+
+
+def parse_cached_days(days, url_template: str | None = None):
+    """Parsuje zapisane w cache strony bez dostępu do sieci; pomija dni bez cache."""
+    parsed = []
+    for d in sorted(days):
+        content = read_cached_day(d, url_template or url_for_day(d))
+        if content is None:
+            print(f"  {d}: brak w cache, pomijam")
+            continue
+        parsed.append((d, parse_day(d, content)))
+    return parsed
+
+
+def read_month_csv(path: str) -> dict:
+    """Wczytuje istniejący CSV miesiąca jako {data: [wiersze]} (tylko pełne dni)."""
+    by_day = {}
+    if not os.path.exists(path):
+        return by_day
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if not row:
+                continue
+            by_day.setdefault(date.fromisoformat(row[0]), []).append(tuple(row[1:5]))
+    # Dzień z niepełną liczbą godzin traktujemy jak brakujący
+    return {d: rows for d, rows in by_day.items() if len(rows) in (23, 24, 25)}
+
+
+def write_month_csv(path: str, by_day: dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(CSV_HEADER)
+        for d in sorted(by_day):
+            for h_from, h_to, price, vol in by_day[d]:
+                w.writerow([d.isoformat(), h_from, h_to, price, vol])
+    os.replace(tmp, path)
+
+
+def merge_month_csv(path: str, by_day: dict) -> dict:
+    """
+    Dopisuje dni do CSV miesiąca, zachowując dni już w nim zapisane; zwraca całość.
+
+    Jedyna droga zapisu CSV miesiąca w pobierz_dane.py - żaden tryb (offline,
+    przyrostowy, pełny) nie może uciąć pliku do dni z bieżącego przebiegu.
+    """
+    merged = read_month_csv(path)
+    merged.update(by_day)
+    write_month_csv(path, merged)
+    return merged
 
 
 def daterange(d1: date, d2: date):
@@ -83,41 +448,82 @@ def daterange(d1: date, d2: date):
         d += timedelta(days=1)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print(__doc__)
-        sys.exit(1)
-    
-    # Parsowanie argumentów
-    use_old_format = "--stary" in sys.argv
-    args = [a for a in sys.argv[1:] if not a.startswith("--")]
-    
+def get_option(name: str, default, cast=str):
+    """Zwraca wartość opcji w postaci --nazwa=wartość albo domyślną."""
+    prefix = f"--{name}="
+    for a in sys.argv[1:]:
+        if a.startswith(prefix):
+            return cast(a[len(prefix):])
+    return default
+
+
+def parse_range_args(args: list[str]) -> tuple[date, date]:
+    """<miesiąc> [rok] albo <od> <do> (YYYY-MM-DD) -> (pierwszy, ostatni dzień)."""
+    if "-" in args[0]:
+        start = date.fromisoformat(args[0])
+        end = date.fromisoformat(args[1]) if len(args) > 1 else start
+        if end < start:
+            raise ValueError(f"Koniec zakresu {end} jest przed początkiem {start}")
+        return start, end
     month = int(args[0])
     year = int(args[1]) if len(args) > 1 else 2025
-    
     if month < 1 or month > 12:
-        print("Miesiąc musi być liczbą od 1 do 12")
+        raise ValueError("Miesiąc musi być liczbą od 1 do 12")
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(__doc__)
         sys.exit(1)
-    
-    # Wybór URL
-    url_template = URL_OLD if use_old_format else URL_NEW
-    format_info = "stary" if use_old_format else "nowy"
-    print(f"Używam {format_info} format URL")
-    
-    last_day = calendar.monthrange(year, month)[1]
-    start = date(year, month, 1)
-    end = date(year, month, last_day)
-    
-    month_str = f"{year}-{month:02d}"
-
-    out_csv = f"tge_rdn_hourly_{month_str}.csv"
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["date", "hour_from", "hour_to", "price_pln_per_mwh", "volume_mwh"])
 
-        for d in daterange(start, end):
-            day_rows = fetch_day(d, url_template)
-            for h_from, h_to, price, vol in day_rows:
-                w.writerow([d.isoformat(), h_from, h_to, price, vol])
+    # Parsowanie argumentów
+    start_from_argv("pobierz_dane")
+    incremental = "--przyrostowo" in sys.argv
+    offline = "--offline" in sys.argv
+    use_cache = "--bez-cache" not in sys.argv
+    workers = get_option("watki", DEFAULT_WORKERS, int)
+    rate_limit = get_option("limit", DEFAULT_RATE_LIMIT, float)
+    retries = get_option("proby", DEFAULT_RETRIES, int)
+    try:
+        start, end = parse_range_args(args)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    # Wybór URL: wymuszony flagą albo osobno dla każdego dnia z jego daty
+    if "--stary" in sys.argv:
+        url_template, format_info = URL_OLD, "stary"
+    elif "--nowy" in sys.argv:
+        url_template, format_info = URL_NEW, "nowy"
+    else:
+        url_template, format_info = None, f"automatyczny (nowy od {NEW_FORMAT_FROM})"
+    print(f"Zakres: {start} - {end}, format URL: {format_info}")
 
-    print(f"Saved: {out_csv}")
+    if offline:
+        for year, month, first, last in month_spans(start, end):
+            out_csv = month_csv_path(year, month)
+            known = read_month_csv(out_csv) if incremental else {}
+            days = [d for d in daterange(first, last) if d not in known]
+            parsed = parse_cached_days(days, url_template)
+            if not parsed:
+                continue
+            with profile().stage("zapis_csv"):
+                merge_month_csv(out_csv, dict(parsed))
+            print(f"Saved: {out_csv}")
+        finish_profile()
+        return
+
+    failed = download_range(start, end, url_template, workers, rate_limit, use_cache, incremental, retries)
+    finish_profile()
+    if failed:
+        print(f"Nie udało się pobrać {len(failed)} dni:")
+        for d in sorted(failed):
+            print(f"  {d}: {failed[d]}")
+        print(f"Uruchom ponownie z tym samym zakresem, żeby wznowić (dziennik: {journal_path(start, end)})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
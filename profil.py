@@ -0,0 +1,205 @@
+"""
+Pomiar etapów skryptów (--profile): czas, CPU, bajty, wiersze i pamięć.
+
+Skrypt włącza profil raz na starcie, a kod w środku oznacza etapy:
+
+    from profil import current
+
+    with current().stage("parsowanie"):
+        rows = parse(...)
+    current().count("rows", len(rows))
+
+Bez --profile current() zwraca profil wyłączony, którego metody nic nie
+robią, więc pomiary nie kosztują nic w zwykłym uruchomieniu.
+
+Dla każdego etapu zapisywane są: liczba pomiarów, czas zegarowy, czas CPU
+(wątku, który wykonał etap, plus procesów potomnych z puli) i szczytowe RSS
+procesu na końcu etapu. Etapy z wielu wątków sumują się. timed_iter dzieli
+czas pętli po strumieniu na oczekiwanie na kolejny kawałek (np. sieć)
+i przetwarzanie między kawałkami (np. parsowanie).
+
+Opcje skryptów:
+    --profile               raport JSON do profil_<skrypt>_<czas>.json
+    --profile=PLIK.json     raport JSON do wskazanego pliku
+    --cprofile=ETAP         dodatkowo cProfile wybranego etapu do <raport>.<ETAP>.prof
+                            (python -m pstats <plik> albo snakeviz)
+"""
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> float | None:
+    """Szczytowe RSS procesu w MB (None, gdy system go nie udostępnia)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje kilobajty, macOS bajty
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _children_cpu() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+class Profile:
+    """Zbiera pomiary etapów; bezpieczny dla wątków."""
+
+    enabled = True
+
+    def __init__(self, script: str, report_path: str | None = None, cprofile_stage: str | None = None):
+        self.script = script
+        self.report_path = report_path or f"profil_{script}_{datetime.now():%Y%m%d_%H%M%S}.json"
+        self.cprofile_stage = cprofile_stage
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.started_children = _children_cpu()
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._cprofile = None
+
+    def _add(self, name: str, wall: float, cpu: float):
+        with self._lock:
+            stage = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0})
+            stage["calls"] += 1
+            stage["wall_s"] += wall
+            stage["cpu_s"] += cpu
+            stage["peak_rss_mb"] = peak_rss_mb()
+
+    @contextmanager
+    def stage(self, name: str):
+        profiler = None
+        if name == self.cprofile_stage and threading.current_thread() is threading.main_thread():
+            profiler = self._cprofile = self._cprofile or cProfile.Profile()
+            profiler.enable()
+        wall0, cpu0, children0 = time.perf_counter(), time.thread_time(), _children_cpu()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.thread_time() - cpu0 + _children_cpu() - children0
+            if profiler is not None:
+                profiler.disable()
+            self._add(name, wall, cpu)
+
+    def timed_iter(self, iterable, wait_stage: str, work_stage: str):
+        """Przekazuje elementy iterable, licząc czas next() do wait_stage, a resztę do work_stage."""
+        iterator = iter(iterable)
+        while True:
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._add(wait_stage, time.perf_counter() - wall0, time.thread_time() - cpu0)
+                return
+            self._add(wait_stage, time.perf_counter() - wall0, time.thread_time() - cpu0)
+            wall0, cpu0 = time.perf_counter(), time.thread_time()
+            try:
+                yield item
+            finally:
+                self._add(work_stage, time.perf_counter() - wall0, time.thread_time() - cpu0)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        return {
+            "script": self.script,
+            "argv": sys.argv[1:],
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "total_wall_s": time.perf_counter() - self.started,
+            "total_cpu_s": time.process_time() - self.started_cpu + _children_cpu() - self.started_children,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def write(self) -> str:
+        report = self.report()
+        if self._cprofile is not None:
+            prof_path = f"{os.path.splitext(self.report_path)[0]}.{self.cprofile_stage}.prof"
+            self._cprofile.dump_stats(prof_path)
+            report["cprofile"] = prof_path
+        tmp = f"{self.report_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.report_path)
+        return self.report_path
+
+    def summary(self) -> str:
+        report = self.report()
+        lines = [f"{'etap':<20} {'pomiarów':>8} {'czas [s]':>9} {'CPU [s]':>9} {'RSS [MB]':>9}"]
+        for name, s in self.stages.items():
+            rss = f"{s['peak_rss_mb']:.0f}" if s.get("peak_rss_mb") is not None else "-"
+            lines.append(f"{name:<20} {s['calls']:>8} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} {rss:>9}")
+        lines.append(f"{'razem':<20} {'':>8} {report['total_wall_s']:>9.3f} {report['total_cpu_s']:>9.3f}")
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+
+class NullProfile:
+    """Profil wyłączony - wszystkie pomiary są pomijane."""
+
+    enabled = False
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def timed_iter(self, iterable, wait_stage: str, work_stage: str):
+        return iterable
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+
+_current = NullProfile()
+
+
+def current():
+    """Aktywny profil (albo wyłączony, gdy skrypt nie dostał --profile)."""
+    return _current
+
+
+def start_from_argv(script: str, argv=None):
+    """Włącza profil, jeśli w argumentach jest --profile; zwraca aktywny profil."""
+    global _current
+    argv = sys.argv[1:] if argv is None else argv
+    report_path = None
+    enabled = False
+    cprofile_stage = None
+    for a in argv:
+        if a == "--profile":
+            enabled = True
+        elif a.startswith("--profile="):
+            enabled = True
+            report_path = a.split("=", 1)[1]
+        elif a.startswith("--cprofile="):
+            cprofile_stage = a.split("=", 1)[1]
+    if enabled:
+        _current = Profile(script, report_path, cprofile_stage)
+    return _current
+
+
+def finish():
+    """Zapisuje raport aktywnego profilu i wypisuje podsumowanie."""
+    if not _current.enabled:
+        return None
+    print(f"\n{_current.summary()}")
+    path = _current.write()
+    print(f"Raport profilu: {path}")
+    return path
@@ -0,0 +1,182 @@
+"""
+Przegląd cen TGE RDN z dowolnego zakresu dat jako jeden raster dni x godziny.
+
+Użycie:
+    python przeglad.py <od> <do> [--wysokosc=PX] [--szerokosc=PX] [--poziom=dzien|tydzien|miesiac]
+                       [--plik=PLIK.png] [--profile[=PLIK]]
+    python przeglad.py <YYYY> [YYYY]
+
+Przykłady:
+    python przeglad.py 2025                          # cały rok, wiersz = dzień
+    python przeglad.py 2021 2025                     # pięć lat - wiersz = tydzień
+    python przeglad.py 2015-01-01 2025-12-31 --wysokosc=400   # wiersz = miesiąc
+    python przeglad.py 2025 --poziom=tydzien
+
+W przeciwieństwie do zestawień rocznych (generuj_heatmap.py) obraz nie ma
+etykiet w komórkach ani osobnego panelu na miesiąc: to jeden obraz (imshow)
+o stałej wielkości w pikselach. Gdy dni jest więcej niż pikseli wysokości,
+wiersze są uśredniane do tygodni (od poniedziałku), a gdy i tygodni jest za
+dużo - do miesięcy. Średnie miesięczne pochodzą wprost z profili godzinowych
+magazynu (agregaty.py), a dni i tygodnie dodawane są partycja po partycji do
+macierzy wynikowej, więc pamięć zależy od liczby wierszy obrazu, a czas
+rysowania - od jego wielkości w pikselach, nie od liczby lat.
+"""
+import re
+import sys
+
+import numpy as np
+
+from agregaty import read_aggregates
+from magazyn import _as_date, list_partitions, read_grid, sync_from_csv
+from pobierz_dane import get_option
+from profil import current as profile, finish as finish_profile, start_from_argv
+from siatka import HOURS, clock_matrix
+
+DEFAULT_WIDTH = 1600
+DEFAULT_HEIGHT = 1000
+DPI = 100
+LEVELS = ("dzien", "tydzien", "miesiac")
+# Najwięcej podpisów osi Y - resztę pomijamy, żeby się nie nakładały
+MAX_TICKS = 40
+
+
+def bucket_starts(start, end, level: str) -> np.ndarray:
+    """Pierwsze dni kolejnych wierszy obrazu (datetime64[D]) dla poziomu szczegółowości."""
+    first, last = np.datetime64(start, "D"), np.datetime64(end, "D")
+    if level == "dzien":
+        return np.arange(first, last + 1)
+    if level == "tydzien":
+        # 1970-01-01 to czwartek - poniedziałek tygodnia dnia d to d - (d + 3) % 7
+        monday = first - (first.astype(np.int64) + 3) % 7
+        return np.arange(monday, last + 1, 7)
+    months = np.arange(first.astype("datetime64[M]"), last.astype("datetime64[M]") + 1)
+    return months.astype("datetime64[D]")
+
+
+def choose_level(start, end, rows: int) -> str:
+    """Najdokładniejszy poziom, którego liczba wierszy mieści się w budżecie pikseli."""
+    for level in LEVELS:
+        if len(bucket_starts(start, end, level)) <= rows:
+            return level
+    return LEVELS[-1]
+
+
+def bucket_matrix(start, end, level: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (pierwsze dni wierszy, średnie [wiersz, 24]) zakresu [start, end].
+
+    Partycje czytane są po kolei i od razu sumowane do wierszy obrazu; pełne
+    miesiące na poziomie "miesiac" biorą gotowy profil godzinowy z agregatów.
+    """
+    start, end = _as_date(start), _as_date(end)
+    starts = bucket_starts(start, end, level)
+    sums = np.zeros((len(starts), HOURS))
+    counts = np.zeros((len(starts), HOURS))
+    lo, hi = np.datetime64(start, "D"), np.datetime64(end, "D")
+    for year, month in list_partitions():
+        if not (start.year, start.month) <= (year, month) <= (end.year, end.month):
+            continue
+        first = np.datetime64(f"{year:04d}-{month:02d}-01")
+        if level == "miesiac" and first >= lo and (first.astype("datetime64[M]") + 1).astype("datetime64[D]") <= hi + 1:
+            row = np.searchsorted(starts, first, side="right") - 1
+            _, hour_profile = read_aggregates(year, month)
+            sums[row] += hour_profile[0]
+            counts[row] += hour_profile[1]
+            continue
+        clock = clock_matrix(np.asarray(read_grid(year, month)))
+        days = first + np.arange(len(clock))
+        keep = (days >= lo) & (days <= hi)
+        rows = np.searchsorted(starts, days[keep], side="right") - 1
+        values = clock[keep]
+        valid = ~np.isnan(values)
+        np.add.at(sums, rows, np.where(valid, values, 0))
+        np.add.at(counts, rows, valid)
+    matrix = np.full(sums.shape, np.nan)
+    np.divide(sums, counts, out=matrix, where=counts > 0)
+    return starts, matrix
+
+
+def tick_positions(starts: np.ndarray) -> tuple[np.ndarray, list[str]]:
+    """Podpisy osi Y na początkach miesięcy albo - przy długich zakresach - lat."""
+    months = starts.astype("datetime64[M]")
+    month_first = np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+    if len(month_first) <= MAX_TICKS:
+        return month_first, [str(months[i]) for i in month_first]
+    years = starts.astype("datetime64[Y]")
+    year_first = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+    step = max(1, -(-len(year_first) // MAX_TICKS))
+    year_first = year_first[::step]
+    return year_first, [str(years[i]) for i in year_first]
+
+
+def render_overview(start, end, out_file: str | None = None, width: int = DEFAULT_WIDTH,
+                    height: int = DEFAULT_HEIGHT, level: str | None = None, sync: bool = True) -> str:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    from wykres import VMAX, VMIN, make_cmap
+
+    start, end = _as_date(start), _as_date(end)
+    if sync:
+        sync_from_csv()
+    # Wiersze obrazu zajmują ok. 80% wysokości (reszta to tytuł i osie)
+    level = level or choose_level(start, end, int(height * 0.8))
+    with profile().stage("wczytanie"):
+        starts, matrix = bucket_matrix(start, end, level)
+    if np.isnan(matrix).all():
+        raise ValueError(f"Brak danych w magazynie dla {start} - {end}")
+
+    with profile().stage("uklad"):
+        fig, ax = plt.subplots(figsize=(width / DPI, height / DPI), dpi=DPI)
+        im = ax.imshow(matrix, aspect='auto', cmap=make_cmap(), vmin=VMIN, vmax=VMAX, interpolation='nearest')
+        ax.set_xticks(np.arange(HOURS))
+        ax.set_xticklabels([f'{h}' for h in range(HOURS)], fontsize=7)
+        positions, labels = tick_positions(starts)
+        ax.set_yticks(positions)
+        ax.set_yticklabels(labels, fontsize=7)
+        ax.set_xlabel('Hour')
+        row_name = {"dzien": "day", "tydzien": "week", "miesiac": "month"}[level]
+        ax.set_ylabel(f'One row = one {row_name}')
+        ax.set_title(f'TGE RDN Hourly Prices - {start} - {end} (PLN/MWh)')
+        cbar = fig.colorbar(im, ax=ax, fraction=0.03, pad=0.02)
+        cbar.set_label('Price (PLN/MWh)')
+        fig.tight_layout()
+
+    out_file = out_file or f"tge_rdn_przeglad_{start}_{end}.png"
+    with profile().stage("zapis_png"):
+        fig.savefig(out_file, dpi=DPI)
+    plt.close(fig)
+    print(f"Saved: {out_file} ({len(starts)} wierszy, poziom: {level})")
+    return out_file
+
+
+def parse_range(args: list[str]) -> tuple[str, str]:
+    """Rok, dwa lata albo dwie daty -> (od, do)."""
+    first = args[0]
+    last = args[1] if len(args) > 1 else first
+    if re.fullmatch(r"\d{4}", first):
+        first = f"{first}-01-01"
+    if re.fullmatch(r"\d{4}", last):
+        last = f"{last}-12-31"
+    return first, last
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    start_from_argv("przeglad")
+    level = get_option("poziom", None)
+    if level is not None and level not in LEVELS:
+        print(f"Poziom musi być jednym z: {', '.join(LEVELS)}")
+        sys.exit(1)
+    start, end = parse_range(args)
+    render_overview(start, end, get_option("plik", None), get_option("szerokosc", DEFAULT_WIDTH, int),
+                    get_option("wysokosc", DEFAULT_HEIGHT, int), level)
+    finish_profile()
+
+
+if __name__ == "__main__":
+    main()
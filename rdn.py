@@ -0,0 +1,84 @@
+"""
+Jedno polecenie do pracy z cenami TGE RDN.
+
+Użycie:
+    python rdn.py <polecenie> [argumenty...]
+    python rdn.py <polecenie> --pomoc
+
+Polecenia:
+    fetch     pobierz ceny godzinowe miesiąca z tge.pl       (pobierz_dane.py)
+    sync      dociągnij nowe raporty Excel do archiwum/       (synchronizuj_archiwum.py)
+    convert   przekonwertuj raporty Excel z archiwum na CSV   (konwertuj_excel.py)
+    render    narysuj heatmapę miesiąca albo roku             (generuj_heatmap.py)
+    overview  przegląd dowolnego zakresu jako jeden raster    (przeglad.py)
+    tiles     piramida kafelków z przeglądarką HTML           (kafelki.py)
+    stats     statystyki cen z magazynu                       (statystyki.py)
+    reconcile porównaj źródła cen i scal najlepsze            (uzgodnij_zrodla.py)
+    simulate  rozkład rocznego kosztu taryfy dynamicznej       (symulacja.py)
+
+Przykłady:
+    python rdn.py fetch 1 2026 --przyrostowo
+    python rdn.py sync --watki=8
+    python rdn.py convert 10 2025 --procesy=4
+    python rdn.py render 2025-10 --rozdzielczosc=15
+    python rdn.py overview 2021 2025
+    python rdn.py tiles --procesy=4
+    python rdn.py stats 2025
+    python rdn.py reconcile 2025 --prog=1 --zapisz
+    python rdn.py simulate --zuzycie=dom,pompa --stala=0.62
+
+Argumenty po nazwie polecenia trafiają bez zmian do skryptu polecenia.
+Moduł polecenia (i jego zależności: requests, lxml, numpy, pandas,
+matplotlib) importowany jest dopiero po wyborze polecenia, a pomoc czytana
+jest ze źródła bez importu - dzięki temu --pomoc i samo pobieranie (np. z
+crona) nie płacą za import bibliotek do wykresów.
+"""
+import ast
+import importlib
+import os
+import sys
+
+COMMANDS = {
+    "fetch": "pobierz_dane",
+    "sync": "synchronizuj_archiwum",
+    "convert": "konwertuj_excel",
+    "render": "generuj_heatmap",
+    "overview": "przeglad",
+    "tiles": "kafelki",
+    "stats": "statystyki",
+    "reconcile": "uzgodnij_zrodla",
+    "simulate": "symulacja",
+}
+HELP_FLAGS = ("--pomoc", "--help", "-h")
+
+
+def command_doc(module: str) -> str:
+    """Docstring modułu polecenia odczytany ze źródła, bez wykonywania importów."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{module}.py")
+    with open(path, encoding="utf-8") as f:
+        return ast.get_docstring(ast.parse(f.read())) or ""
+
+
+def run(command: str, args: list[str]):
+    """Uruchamia main() modułu polecenia tak, jakby wywołano go bezpośrednio z args."""
+    module = COMMANDS[command]
+    sys.argv = [f"{module}.py", *args]
+    importlib.import_module(module).main()
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] in HELP_FLAGS:
+        print(__doc__)
+        sys.exit(0 if len(sys.argv) > 1 else 1)
+    command, args = sys.argv[1], sys.argv[2:]
+    if command not in COMMANDS:
+        print(f"Nieznane polecenie: {command} (dostępne: {', '.join(COMMANDS)})")
+        sys.exit(1)
+    if any(a in HELP_FLAGS for a in args):
+        print(command_doc(COMMANDS[command]))
+        sys.exit(0)
+    run(command, args)
+
+
+if __name__ == "__main__":
+    main()
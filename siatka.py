@@ -0,0 +1,170 @@
+"""
+Kanoniczna siatka godzinowa cen TGE RDN z jawną obsługą zmiany czasu.
+
+Doba handlowa ma 24 godziny, ale w dniu zmiany czasu na letni jedna godzina
+nie istnieje (23 godziny), a przy zmianie na zimowy jedna się powtarza
+(25 godzin). Zamiast uśredniać to za każdym razem przez groupby + pivot,
+każdy dzień ma stałe SLOTS = 25 miejsc:
+
+    sloty 0-23      godziny zegarowe (slot = hour_from)
+    slot 24         drugie wystąpienie powtórzonej godziny (REPEAT_SLOT)
+
+Godzina, której w danym dniu nie ma, jest oznaczona w masce HourGrid.exists.
+TGE oznacza powtórzoną godzinę jako H02a, czyli w plikach CSV drugi wiersz
+z hour_from = REPEATED_HOUR.
+
+HourGrid wiąże sloty z czasem UTC: każda godzina UTC z zakresu siatki ma
+wyliczone z góry (wiersz, slot), więc zamiana znacznika czasu na miejsce
+w macierzy to jedno indeksowanie tablicy.
+
+Użycie:
+    python siatka.py <od> [do]
+
+Przykład:
+    python siatka.py 2025-10-25 2025-10-27
+
+Użycie jako moduł:
+    from siatka import HourGrid, clock_matrix
+    grid = HourGrid("2025-01-01", "2025-12-31")
+    rows, slots = grid.locate(np.array(["2025-10-26T01:00"], dtype="datetime64[h]"))
+"""
+import sys
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+TZ = ZoneInfo("Europe/Warsaw")
+HOURS = 24
+SLOTS = 25
+REPEAT_SLOT = 24
+# Godzina powtarzana przy zmianie na czas zimowy (TGE: H02a, przedział 1-2)
+REPEATED_HOUR = 1
+# Godzina pomijana przy zmianie na czas letni (02:00-03:00)
+SKIPPED_HOUR = 2
+
+
+def _as_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _utc_midnight_hours(d: date) -> int:
+    """Północ czasu lokalnego dnia d jako liczba godzin UTC od 1970-01-01."""
+    local = datetime.combine(d, time(0), tzinfo=TZ)
+    # timestamp() świadomego czasu nie zależy od strefy hosta (TZ procesu)
+    return int(local.timestamp() // 3600)
+
+
+class HourGrid:
+    """
+    Siatka dni x SLOTS dla ciągłego zakresu dni czasu lokalnego.
+
+    days       datetime64[D] kolejnych dni
+    hours      liczba godzin doby (23, 24 albo 25)
+    exists     maska [dzień, slot] - czy slot istnieje w danym dniu
+    utc_start  godzina UTC (od epoki) początku każdej doby, plus koniec ostatniej
+    """
+
+    def __init__(self, start, end):
+        start, end = _as_date(start), _as_date(end)
+        if end < start:
+            raise ValueError(f"Pusty zakres dni: {start} - {end}")
+        n_days = (end - start).days + 1
+        self.days = np.datetime64(start, "D") + np.arange(n_days)
+        self.utc_start = np.array(
+            [_utc_midnight_hours(start + timedelta(days=i)) for i in range(n_days + 1)], dtype=np.int64
+        )
+        self.hours = np.diff(self.utc_start)
+
+        # Dla każdej godziny UTC w zakresie: wiersz i slot (O(1) przy wyszukiwaniu)
+        rows = np.repeat(np.arange(n_days), self.hours)
+        position = np.arange(len(rows)) - np.repeat(self.utc_start[:-1] - self.utc_start[0], self.hours)
+        slots = position.copy()
+        short = self.hours[rows] < HOURS
+        slots[short & (position >= SKIPPED_HOUR)] += 1
+        long = self.hours[rows] > HOURS
+        slots[long & (position == REPEATED_HOUR + 1)] = REPEAT_SLOT
+        slots[long & (position > REPEATED_HOUR + 1)] -= 1
+        self._rows = rows
+        self._slots = slots.astype(np.int8)
+
+        self.exists = np.zeros((n_days, SLOTS), dtype=bool)
+        self.exists[rows, slots] = True
+
+    def row_of(self, day) -> int:
+        """Wiersz dnia w siatce (KeyError poza zakresem)."""
+        row = int((np.datetime64(_as_date(day), "D") - self.days[0]).astype(int))
+        if not 0 <= row < len(self.days):
+            raise KeyError(f"Dzień {day} poza siatką {self.days[0]} - {self.days[-1]}")
+        return row
+
+    def locate(self, utc) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (wiersze, sloty) dla znaczników czasu UTC (datetime64 albo godziny od epoki).
+
+        Znaczniki spoza zakresu dostają wiersz i slot -1.
+        """
+        utc = np.asarray(utc)
+        if np.issubdtype(utc.dtype, np.datetime64):
+            utc = utc.astype("datetime64[h]").astype(np.int64)
+        offset = utc - self.utc_start[0]
+        inside = (offset >= 0) & (offset < len(self._rows))
+        safe = np.where(inside, offset, 0)
+        return np.where(inside, self._rows[safe], -1), np.where(inside, self._slots[safe], -1)
+
+    def utc_hours(self) -> np.ndarray:
+        """Macierz [dzień, slot] godzin UTC od epoki; -1 dla slotów, których nie ma."""
+        out = np.full(self.exists.shape, -1, dtype=np.int64)
+        out[self._rows, self._slots] = self.utc_start[0] + np.arange(len(self._rows))
+        return out
+
+
+def slots_from_hours(dates: np.ndarray, hour_from: np.ndarray) -> np.ndarray:
+    """
+    Slot każdego wiersza (posortowanego chronologicznie): hour_from, a dla
+    drugiego wystąpienia tej samej godziny w dniu - REPEAT_SLOT.
+    """
+    slots = hour_from.astype(np.int8).copy()
+    if len(slots) > 1:
+        repeat = np.zeros(len(slots), dtype=bool)
+        repeat[1:] = (dates[1:] == dates[:-1]) & (hour_from[1:] <= hour_from[:-1])
+        slots[repeat] = REPEAT_SLOT
+    return slots
+
+
+def slot_matrix(day_index: np.ndarray, slots: np.ndarray, values: np.ndarray, n_days: int) -> np.ndarray:
+    """Rozkłada wartości wierszy do macierzy [dzień, SLOTS]; puste miejsca to NaN."""
+    matrix = np.full((n_days, SLOTS), np.nan)
+    matrix[day_index, slots] = values
+    return matrix
+
+
+def clock_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Macierz [dzień, SLOTS] -> [dzień, 24] godzin zegarowych.
+
+    Powtórzona godzina jest uśredniana z pierwszym wystąpieniem, jak na heatmapach.
+    """
+    out = matrix[:, :HOURS].copy()
+    repeat = ~np.isnan(matrix[:, REPEAT_SLOT])
+    if repeat.any():
+        pair = np.column_stack([out[repeat, REPEATED_HOUR], matrix[repeat, REPEAT_SLOT]])
+        out[repeat, REPEATED_HOUR] = np.nanmean(pair, axis=1)
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    grid = HourGrid(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else sys.argv[1])
+    utc = grid.utc_hours()
+    for i, day in enumerate(grid.days):
+        missing = [s for s in range(HOURS) if not grid.exists[i, s]]
+        extra = " + powtórzona godzina" if grid.exists[i, REPEAT_SLOT] else ""
+        note = f", brak godziny {missing[0]}" if missing else ""
+        first = np.datetime64(int(utc[i, 0]), "h")
+        print(f"{day}: {grid.hours[i]} h (początek {first} UTC){note}{extra}")
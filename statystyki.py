@@ -0,0 +1,79 @@
+"""
+Statystyki cen TGE RDN z magazynu (magazyn.py) w podziale na miesiące.
+
+Użycie:
+    python statystyki.py <YYYY | YYYY-MM | od> [do] [--rozdzielczosc=60|15]
+
+Przykłady:
+    python statystyki.py 2025                     # każdy miesiąc roku i cały rok
+    python statystyki.py 2025-10                  # jeden miesiąc
+    python statystyki.py 2025-03-01 2025-06-30    # dowolny zakres dat
+    python statystyki.py 2025-10 --rozdzielczosc=15
+
+Dla każdego miesiąca wypisywane są: liczba dni, min, max i średnia ceny,
+liczba godzin (kwadransów) z ceną ujemną oraz średnia dzienna rozpiętość
+cen (max - min w ciągu dnia). Ceny godzinowe czytane są z agregatów dni
+(agregaty.py), więc czas nie rośnie z długością historii; kwadranse liczone
+są z macierzy 15-minutowej. Nie potrzebuje pandas ani matplotlib.
+"""
+import calendar
+import re
+import sys
+
+import numpy as np
+
+from agregaty import COUNT, combine, day_aggregates, day_stats
+from magazyn import load_day_matrix
+from pobierz_dane import get_option
+
+
+def date_range(args: list[str]) -> tuple[str, str]:
+    """Zamienia argumenty (rok, miesiąc albo dwie daty) na zakres dat ISO."""
+    first = args[0]
+    if re.fullmatch(r"\d{4}", first):
+        return f"{first}-01-01", f"{first}-12-31"
+    if re.fullmatch(r"\d{4}-\d{2}", first):
+        year, month = map(int, first.split("-"))
+        return f"{first}-01", f"{first}-{calendar.monthrange(year, month)[1]:02d}"
+    return first, args[1] if len(args) > 1 else first
+
+
+def format_row(label: str, stats: dict) -> str:
+    return (f"{label:<10} {stats['days']:>4} {stats['min']:>9.2f} {stats['max']:>9.2f} "
+            f"{stats['mean']:>9.2f} {stats['negative']:>7} {stats['spread']:>10.2f}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    resolution = get_option("rozdzielczosc", 60, int)
+    start, end = date_range(args)
+
+    if resolution == 60:
+        days, aggregates = day_stats(start, end)
+    else:
+        days, matrix = load_day_matrix(start, end, resolution=resolution)
+        aggregates = day_aggregates(matrix)
+    if not (aggregates[:, COUNT] > 0).any():
+        print(f"Brak danych w magazynie dla {start} - {end}")
+        sys.exit(1)
+
+    unit = "godz." if resolution == 60 else "kw."
+    print(f"Ceny PLN/MWh, {start} - {end}, rozdzielczość {resolution} min")
+    print(f"{'miesiąc':<10} {'dni':>4} {'min':>9} {'max':>9} {'średnia':>9} {'<0 ' + unit:>7} {'rozpiętość':>10}")
+    months = days.astype("datetime64[M]")
+    unique_months = np.unique(months)
+    for month in unique_months:
+        stats = combine(aggregates[months == month])
+        if stats is not None:
+            print(format_row(str(month), stats))
+    if len(unique_months) > 1:
+        stats = combine(aggregates)
+        if stats is not None:
+            print(format_row("razem", stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""
+Symulacja Monte Carlo rocznego kosztu energii na taryfie dynamicznej vs stała cena.
+
+Jeden rok historii to jedna próbka. Symulacja składa tysiące "lat" z bloków
+historii cen (bootstrap): każdy miesiąc roku docelowego wypełniany jest
+losowymi blokami kolejnych dni z tego samego miesiąca kalendarzowego (w
+dowolnym roku historii) albo - przy --bloki=miesiac - jednym losowym
+miesiącem historii w całości. Na tak złożony rok nakładane są profile
+zużycia i liczony jest rozkład kosztu na tle taryfy o stałej cenie.
+
+Użycie:
+    python symulacja.py [od] [do] [--scenariusze=N] [--bloki=dzien|miesiac] [--dlugosc=DNI]
+                        [--zuzycie=dom,pompa,plik.csv] [--roczne=KWH] [--stala=PLN/KWH]
+                        [--marza=PLN/KWH] [--procesy=N] [--ziarno=N] [--zapisz=PLIK.npz]
+
+Przykłady:
+    python symulacja.py                                    # cała historia, profil dom, 100 tys. lat
+    python symulacja.py 2025-01-01 2025-12-31 --zuzycie=dom,pompa,auto --stala=0.62
+    python symulacja.py --bloki=dzien --dlugosc=7 --scenariusze=1000000 --procesy=8
+    python symulacja.py --zuzycie=zuzycie_godzinowe.csv    # profil z licznika (zuzycie.py)
+
+Opcje:
+    --scenariusze=N  Liczba symulowanych lat (domyślnie 100000)
+    --bloki=B        dzien - bloki --dlugosc kolejnych dni (domyślnie), miesiac - całe miesiące
+    --dlugosc=DNI    Długość bloku dni (domyślnie 1); dłuższe bloki zachowują serie drogich dni
+    --zuzycie=...    Profile zużycia: plaski, dom, pompa, auto albo plik CSV z zuzycie.py
+    --roczne=KWH     Roczne zużycie profili wbudowanych (domyślnie 2500 kWh)
+    --stala=PLN/KWH  Cena energii na taryfie stałej (domyślnie 0.50)
+    --marza=PLN/KWH  Opłata sprzedawcy doliczana do każdej kWh taryfy dynamicznej (domyślnie 0)
+    --procesy=N      Liczba procesów (domyślnie tyle, ile rdzeni)
+    --zapisz=PLIK    Zapisz koszty wszystkich scenariuszy do PLIK.npz
+
+Porównywana jest sama energia: opłaty dystrybucyjne są takie same na obu
+taryfach. Ceny dnia z brakującą godziną nie trafiają do losowania (godzina
+pominięta przy zmianie czasu na letni nie jest brakiem - według siatki
+HourGrid ten dzień ma 23 godziny, a pominięta kosztuje 0); miesiąc
+bez ani jednego pełnego wystąpienia w historii jest przy --bloki=miesiac
+losowany z pojedynczych dni.
+
+Koszt każdego dnia historii przy zużyciu każdego miesiąca i profilu liczony
+jest raz (macierz [profil, miesiąc, dzień]); scenariusz to wtedy tylko suma
+365 wylosowanych elementów tej macierzy. Scenariusze liczone są paczkami
+wektorowo w NumPy, paczki rozdzielane na procesy; każda paczka ma własne
+ziarno (SeedSequence.spawn), więc wynik nie zależy od liczby procesów.
+"""
+import calendar
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from magazyn import load_day_matrix
+from pobierz_dane import get_option
+from profil import current as profile, finish as finish_profile, start_from_argv
+from siatka import HOURS, HourGrid
+
+DEFAULT_SCENARIOS = 100_000
+DEFAULT_ANNUAL_KWH = 2500.0
+DEFAULT_FIXED_PRICE = 0.50
+BLOCK_MODES = ("dzien", "miesiac")
+WHOLE_MONTH = "miesiac"
+# Scenariuszy w jednej paczce - [paczka, 31 dni] indeksów to ok. 1 MB
+BATCH_SCENARIOS = 4096
+PERCENTILES = (1, 5, 50, 95, 99)
+WORST_SHARE = 0.01
+
+# Rok docelowy: 365 dni, miesiąc każdego dnia
+MONTH_DAYS = np.array([calendar.monthrange(2025, m)[1] for m in range(1, 13)])
+
+# Kształty dobowe (24 godziny) i wagi miesięcy profili wbudowanych - skalowane do --roczne
+PROFILE_SHAPES = {
+    "plaski": (np.ones(HOURS), np.ones(12)),
+    "dom": (
+        np.array([0.5, 0.4, 0.4, 0.4, 0.4, 0.5, 0.8, 1.2, 1.2, 0.9, 0.8, 0.8,
+                  0.9, 0.9, 0.8, 0.9, 1.1, 1.5, 1.8, 1.9, 1.8, 1.5, 1.1, 0.7]),
+        np.array([1.2, 1.15, 1.05, 0.95, 0.9, 0.85, 0.85, 0.85, 0.9, 1.0, 1.1, 1.2]),
+    ),
+    "pompa": (
+        np.array([1.1, 1.1, 1.1, 1.1, 1.2, 1.3, 1.4, 1.3, 1.0, 0.8, 0.7, 0.7,
+                  0.7, 0.7, 0.7, 0.8, 0.9, 1.0, 1.1, 1.1, 1.1, 1.1, 1.1, 1.1]),
+        np.array([2.2, 1.9, 1.5, 0.9, 0.4, 0.2, 0.2, 0.2, 0.4, 0.9, 1.5, 2.0]),
+    ),
+    "auto": (
+        np.array([1.8, 1.8, 1.8, 1.8, 1.6, 1.0, 0.5, 0.4, 0.3, 0.3, 0.3, 0.3,
+                  0.3, 0.3, 0.3, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 1.0, 1.6, 1.8]),
+        np.ones(12),
+    ),
+}
+
+
+def builtin_profile(name: str, annual_kwh: float = DEFAULT_ANNUAL_KWH) -> np.ndarray:
+    """Zużycie [miesiąc, godzina] w kWh na dzień, w sumie annual_kwh w roku docelowym."""
+    shape, month_weights = PROFILE_SHAPES[name]
+    matrix = np.outer(month_weights, shape)
+    return matrix * annual_kwh / (matrix.sum(axis=1) @ MONTH_DAYS)
+
+
+def file_profile(path: str) -> np.ndarray:
+    """
+    Średnie zużycie [miesiąc, godzina] na dzień z pliku wynikowego zuzycie.py.
+
+    Miesiące nieobecne w pliku dostają średnią pozostałych.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(path, usecols=["date", "hour_from", "consumption_kwh"])
+    month = pd.to_datetime(df["date"]).dt.month.to_numpy() - 1
+    sums = np.zeros((12, HOURS))
+    np.add.at(sums, (month, df["hour_from"].to_numpy(dtype=np.intp)), df["consumption_kwh"].to_numpy(dtype=float))
+    days = np.bincount(month[~df["date"].duplicated().to_numpy()], minlength=12)
+    known = days > 0
+    if not known.any():
+        raise ValueError(f"{path}: brak danych zużycia")
+    matrix = np.empty((12, HOURS))
+    matrix[known] = sums[known] / days[known, None]
+    matrix[~known] = matrix[known].mean(axis=0)
+    return matrix
+
+
+def load_profiles(spec: str, annual_kwh: float = DEFAULT_ANNUAL_KWH) -> dict:
+    """"dom,pompa,licznik.csv" -> {nazwa: zużycie [12, 24]}."""
+    profiles = {}
+    for name in spec.split(","):
+        if name.endswith(".csv"):
+            profiles[os.path.splitext(os.path.basename(name))[0]] = file_profile(name)
+        elif name in PROFILE_SHAPES:
+            profiles[name] = builtin_profile(name, annual_kwh)
+        else:
+            raise ValueError(f"Nieznany profil zużycia: {name} (dostępne: {', '.join(PROFILE_SHAPES)} albo plik .csv)")
+    return profiles
+
+
+def block_starts(days: np.ndarray, mode: str = "dzien", length: int = 1) -> list[np.ndarray]:
+    """
+    Dla każdego miesiąca kalendarzowego indeksy dni historii, od których może
+    zaczynać się blok: --dlugosc kolejnych dni bez przerwy w danych albo
+    (mode="miesiac") pierwszy dzień pełnego miesiąca.
+    """
+    months = days.astype("datetime64[M]").astype(np.int64) % 12
+    if mode == WHOLE_MONTH:
+        first = days.astype("datetime64[M]").astype("datetime64[D]")
+        last = (days.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+        idx = np.arange(len(days))
+        # Miesiąc jest pełny, gdy dzień ostatni leży dokładnie (liczba dni - 1) pozycji dalej
+        full = (days == first) & (idx + (last - first).astype(np.int64) < len(days))
+        full[full] &= days[idx[full] + (last - first)[full].astype(np.int64)] == last[full]
+        return [np.flatnonzero(full & (months == m)) for m in range(12)]
+    idx = np.arange(len(days) - length + 1)
+    contiguous = (days[idx + length - 1] - days[idx]).astype(np.int64) == length - 1
+    return [idx[contiguous & (months[idx] == m)] for m in range(12)]
+
+
+def complete_days(days: np.ndarray, prices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Dni z ceną w każdej godzinie, która w danym dniu istnieje (HourGrid.exists).
+
+    Godzina pominięta przy zmianie czasu na letni dostaje cenę 0 - w 23-godzinnej
+    dobie nie ma w niej zużycia.
+    """
+    if not len(days):
+        return days, prices
+    grid = HourGrid(str(days[0]), str(days[-1]))
+    exists = grid.exists[(days - grid.days[0]).astype(np.intp), :HOURS]
+    complete = (~np.isnan(prices) | ~exists).all(axis=1)
+    return days[complete], np.where(exists, prices, 0.0)[complete]
+
+
+def day_costs(prices: np.ndarray, consumption: np.ndarray) -> np.ndarray:
+    """Koszt [profil, miesiąc, dzień historii] w PLN: ceny PLN/MWh x zużycie kWh."""
+    return np.einsum("dh,pmh->pmd", prices, consumption) / 1000.0
+
+
+def month_blocks(days: np.ndarray, mode: str = "dzien", length: int = 1) -> list[tuple[np.ndarray, int]]:
+    """
+    (początki bloków, długość bloku) dla każdego miesiąca; długość 0 oznacza cały miesiąc.
+
+    Miesiąc kalendarzowy, którego historia nie ma ani jednego pełnego
+    wystąpienia (luka w danych), losowany jest przy --bloki=miesiac z
+    pojedynczych dni.
+    """
+    if length < 1:
+        raise ValueError(f"Długość bloku musi wynosić co najmniej 1 dzień (podano {length})")
+    if mode != WHOLE_MONTH:
+        return [(starts, length) for starts in block_starts(days, mode, length)]
+    whole, single = block_starts(days, WHOLE_MONTH), block_starts(days)
+    return [(w, 0) if len(w) else (d, 1) for w, d in zip(whole, single)]
+
+
+_worker = {}
+
+
+def _init_worker(costs: np.ndarray, blocks: list):
+    _worker.update(costs=costs, blocks=blocks)
+
+
+def _simulate_batch(task: tuple[int, np.random.SeedSequence]) -> np.ndarray:
+    """Koszty [profil, scenariusz] jednej paczki scenariuszy."""
+    n, seed = task
+    costs = _worker["costs"]
+    rng = np.random.default_rng(seed)
+    total = np.zeros((costs.shape[0], n))
+    for month, n_days in enumerate(MONTH_DAYS):
+        pool, length = _worker["blocks"][month]
+        if length == 0:
+            # Cały miesiąc historii; luty przestępny ucinany do 28 dni roku docelowego
+            idx = rng.choice(pool, size=(n, 1)) + np.arange(n_days)
+        else:
+            blocks = -(-n_days // length)
+            idx = (rng.choice(pool, size=(n, blocks))[:, :, None] + np.arange(length)).reshape(n, -1)[:, :n_days]
+        total += costs[:, month][:, idx].sum(axis=2)
+    return total
+
+
+def simulate(costs: np.ndarray, blocks: list, scenarios: int = DEFAULT_SCENARIOS,
+             processes: int | None = None, seed: int = 0) -> np.ndarray:
+    """Roczne koszty energii [profil, scenariusz] w PLN (bez marży); blocks z month_blocks."""
+    if scenarios < 1:
+        raise ValueError(f"Liczba scenariuszy musi wynosić co najmniej 1 (podano {scenarios})")
+    empty = [m + 1 for m in range(12) if len(blocks[m][0]) == 0]
+    if empty:
+        raise ValueError(f"Brak bloków historii dla miesięcy: {', '.join(map(str, empty))}")
+    sizes = [min(BATCH_SCENARIOS, scenarios - i) for i in range(0, scenarios, BATCH_SCENARIOS)]
+    tasks = list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) == 1:
+        _init_worker(costs, blocks)
+        results = [_simulate_batch(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                 initargs=(costs, blocks)) as pool:
+            results = list(pool.map(_simulate_batch, tasks))
+    return np.concatenate(results, axis=1)
+
+
+def summarize(annual: np.ndarray, fixed_cost: float) -> dict:
+    """Percentyle, najgorsze przypadki i szansa, że taryfa dynamiczna wyjdzie taniej."""
+    worst = np.sort(annual)[-max(1, int(len(annual) * WORST_SHARE)):]
+    return {
+        "percentiles": dict(zip(PERCENTILES, np.percentile(annual, PERCENTILES))),
+        "mean": float(annual.mean()),
+        "worst": float(annual.max()),
+        "worst_mean": float(worst.mean()),
+        "fixed": fixed_cost,
+        "cheaper": float((annual < fixed_cost).mean()),
+    }
+
+
+def main():
+    if "--pomoc" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    start_from_argv("symulacja")
+    start = args[0] if args else None
+    end = args[1] if len(args) > 1 else None
+    scenarios = get_option("scenariusze", DEFAULT_SCENARIOS, int)
+    mode = get_option("bloki", "dzien")
+    length = get_option("dlugosc", 1, int)
+    fixed_price = get_option("stala", DEFAULT_FIXED_PRICE, float)
+    margin = get_option("marza", 0.0, float)
+    if mode not in BLOCK_MODES:
+        print(f"Bloki muszą być jednym z: {', '.join(BLOCK_MODES)}")
+        sys.exit(1)
+    if scenarios < 1 or length < 1:
+        print(f"--scenariusze i --dlugosc muszą wynosić co najmniej 1 (podano {scenarios} i {length})")
+        sys.exit(1)
+    try:
+        profiles = load_profiles(get_option("zuzycie", "dom"), get_option("roczne", DEFAULT_ANNUAL_KWH, float))
+    except (ValueError, OSError) as e:
+        print(e)
+        sys.exit(1)
+
+    with profile().stage("wczytanie"):
+        days, prices = complete_days(*load_day_matrix(start, end))
+    if not len(days):
+        print("Brak pełnych dni w magazynie dla podanego zakresu")
+        sys.exit(1)
+    blocks = month_blocks(days, mode, length)
+    partial = [m + 1 for m, (_, block) in enumerate(blocks) if mode == WHOLE_MONTH and block != 0]
+    names = list(profiles)
+    consumption = np.stack([profiles[n] for n in names])
+    costs = day_costs(prices, consumption)
+
+    print(f"Historia: {days[0]} - {days[-1]} ({len(days)} pełnych dni), bloki: {mode}"
+          + (f" x {length} dni" if mode == "dzien" else "")
+          + f", scenariuszy: {scenarios}")
+    if partial:
+        print(f"Miesiące bez pełnej historii losowane z pojedynczych dni: {', '.join(map(str, partial))}")
+    t0 = time.perf_counter()
+    try:
+        with profile().stage("symulacja"):
+            energy = simulate(costs, blocks, scenarios, get_option("procesy", None, int), get_option("ziarno", 0, int))
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+    print(f"Symulacja: {elapsed:.2f} s ({scenarios * len(names) / elapsed:,.0f} profilo-lat/s)")
+
+    annual_kwh = consumption.sum(axis=2) @ MONTH_DAYS
+    annual = energy + margin * annual_kwh[:, None]
+    header = " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES)
+    print(f"\nRoczny koszt energii (PLN), stała cena {fixed_price:.2f} PLN/kWh, marża {margin:.2f} PLN/kWh")
+    print(f"{'profil':<12} {'kWh':>7} {'stała':>8} {header} {'najgorszy':>9} {'1% najg.':>9} {'taniej':>7}")
+    for i, name in enumerate(names):
+        s = summarize(annual[i], fixed_price * annual_kwh[i])
+        percentiles = " ".join(f"{v:>8.0f}" for v in s["percentiles"].values())
+        print(f"{name:<12} {annual_kwh[i]:>7.0f} {s['fixed']:>8.0f} {percentiles} "
+              f"{s['worst']:>9.0f} {s['worst_mean']:>9.0f} {s['cheaper']:>6.1%}")
+
+    out_file = get_option("zapisz", None)
+    if out_file:
+        np.savez(out_file, profiles=np.array(names), annual_pln=annual, annual_kwh=annual_kwh,
+                 fixed_pln=fixed_price * annual_kwh)
+        print(f"Saved: {out_file}")
+    finish_profile()
+
+
+if __name__ == "__main__":
+    main()
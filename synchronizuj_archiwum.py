@@ -0,0 +1,214 @@
+"""
+Synchronizacja archiwum raportów Excel TGE (RDN_instrumenty_15) z katalogiem archiwum/.
+
+Użycie:
+    python synchronizuj_archiwum.py [--katalog=archiwum] [--watki=N] [--limit=R] [--proby=N]
+                                    [--sprawdz] [--url=ADRES] [--profile[=PLIK]]
+
+Przykłady:
+    python synchronizuj_archiwum.py                  # dociągnij nowe i zmienione raporty
+    python synchronizuj_archiwum.py --watki=16 --limit=20
+    python synchronizuj_archiwum.py --sprawdz        # przelicz sumy kontrolne plików lokalnych
+    python synchronizuj_archiwum.py --url=http://127.0.0.1:8811/RDN_instrumenty_15 --katalog=/tmp/arch
+
+Opcje:
+    --katalog=K  Katalog archiwum (domyślnie archiwum)
+    --watki=N    Liczba równoległych pobrań (domyślnie 8)
+    --limit=R    Maksymalna liczba zapytań na sekundę (domyślnie 10)
+    --proby=N    Liczba ponowień po błędzie sieci/5xx (domyślnie 4)
+    --sprawdz    Porównaj SHA-256 plików lokalnych z manifestem; niezgodne pobierz bez warunku
+    --url=ADRES  Strona z listą raportów (domyślnie https://tge.pl/RDN_instrumenty_15)
+
+Stan archiwum trzymany jest w <katalog>/.manifest.json (ETag, Last-Modified,
+rozmiar i SHA-256 każdego pliku). Plik, który lokalnie ma rozmiar zgodny z
+manifestem, pobierany jest warunkowo (If-None-Match / If-Modified-Since) -
+niezmieniony kosztuje jedną odpowiedź 304 bez treści. Plik spoza manifestu,
+który już leży w katalogu, pytany jest z If-Modified-Since równym dacie
+modyfikacji pliku. Treść zapisywana jest strumieniowo do pliku tymczasowego
+i podmieniana atomowo, więc przerwane pobieranie nie zostawia uciętego xlsx.
+"""
+import email.utils
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote, urljoin, urlsplit
+
+from pobierz_dane import DEFAULT_RETRIES, HostRateLimiter, get_option, make_session, with_retries
+from profil import current as profile, finish as finish_profile, start_from_argv
+
+ARCHIVE_URL = "https://tge.pl/RDN_instrumenty_15"
+ARCHIVE_DIR = "archiwum"
+MANIFEST = ".manifest.json"
+EXTENSIONS = (".xlsx", ".xls")
+DEFAULT_WORKERS = 8
+DEFAULT_RATE_LIMIT = 10.0
+CHUNK_SIZE = 1 << 16
+
+
+def list_archive(session, url: str) -> dict:
+    """{nazwa pliku: pełny adres} wszystkich raportów Excel z listy archiwum."""
+    from lxml import html
+
+    r = session.get(url, timeout=30)
+    r.raise_for_status()
+    tree = html.fromstring(r.content)
+    links = {}
+    for href in tree.xpath("//a/@href"):
+        name = os.path.basename(unquote(urlsplit(href).path))
+        if name.lower().endswith(EXTENSIONS):
+            links[name] = urljoin(url, href)
+    return links
+
+
+def read_manifest(directory: str) -> dict:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(directory: str, manifest: dict):
+    path = os.path.join(directory, MANIFEST)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def conditional_headers(path: str, entry: dict | None, verify: bool = False) -> dict:
+    """Nagłówki warunkowe dla pliku - puste, gdy lokalnej kopii nie można ufać."""
+    if not os.path.exists(path):
+        return {}
+    if entry is None:
+        return {"If-Modified-Since": email.utils.formatdate(os.path.getmtime(path), usegmt=True)}
+    if os.path.getsize(path) != entry.get("size") or (verify and file_sha256(path) != entry.get("sha256")):
+        return {}
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def sync_file(session, limiter: HostRateLimiter, url: str, path: str,
+              entry: dict | None, verify: bool = False) -> tuple[bool, dict]:
+    """
+    Pobiera jeden plik, jeśli się zmienił. Zwraca (czy zapisano nowy plik, wpis manifestu).
+
+    Odpowiedź 200 z treścią identyczną jak lokalna kopia (serwer bez obsługi
+    nagłówków warunkowych) nie podmienia pliku.
+    """
+    headers = conditional_headers(path, entry, verify)
+    limiter.wait(url)
+    with session.get(url, headers=headers, stream=True, timeout=60) as r:
+        if r.status_code == 304:
+            profile().count("not_modified")
+            if entry is None:
+                entry = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+            # Walidatory z odpowiedzi 304 (RFC 9110 wymaga tam ETag, jeśli serwer go nadaje);
+            # bez nich zostaje wysłane If-Modified-Since, żeby następny przebieg też pytał warunkowo
+            validators = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+            if not any(validators.values()):
+                validators["last_modified"] = headers.get("If-Modified-Since")
+            return False, {**entry, **{k: v for k, v in validators.items() if v}, "url": url}
+        r.raise_for_status()
+        tmp = f"{path}.tmp{threading.get_ident()}"
+        digest, size = hashlib.sha256(), 0
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            new_entry = {"url": url, "size": size, "sha256": digest.hexdigest(),
+                         "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+            profile().count("bytes_downloaded", size)
+            if entry is not None and entry.get("sha256") == new_entry["sha256"] and os.path.exists(path) \
+                    and os.path.getsize(path) == size:
+                os.remove(tmp)
+                return False, new_entry
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    return True, new_entry
+
+
+def sync_archive(url: str = ARCHIVE_URL, directory: str = ARCHIVE_DIR, workers: int = DEFAULT_WORKERS,
+                 rate_limit: float = DEFAULT_RATE_LIMIT, retries: int = DEFAULT_RETRIES,
+                 verify: bool = False) -> tuple[list[str], list[str], dict]:
+    """
+    Synchronizuje katalog z listą archiwum. Zwraca (pobrane, bez zmian, {plik: błąd}).
+
+    Manifest zapisywany jest także po błędach, żeby kolejne uruchomienie
+    pytało warunkowo o wszystko, co udało się już pobrać.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest = read_manifest(directory)
+    limiter = HostRateLimiter(rate_limit)
+    downloaded, unchanged, failed = [], [], {}
+    with make_session(workers) as session:
+        with profile().stage("lista"):
+            links = with_retries(lambda: list_archive(session, url), url, retries)
+        print(f"Na liście {len(links)} plików, w manifeście {len(manifest)}")
+
+        def one(name):
+            path = os.path.join(directory, name)
+            return with_retries(lambda: sync_file(session, limiter, links[name], path, manifest.get(name), verify),
+                                name, retries)
+
+        try:
+            with profile().stage("pobieranie"), ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+                futures = {pool.submit(one, name): name for name in sorted(links)}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        changed, entry = future.result()
+                    except Exception as e:
+                        failed[name] = e
+                        print(f"  {name}: BŁĄD: {e}")
+                        continue
+                    manifest[name] = entry
+                    if changed:
+                        downloaded.append(name)
+                        print(f"  Pobrano: {name} ({entry['size']} bytes)")
+                    else:
+                        unchanged.append(name)
+        finally:
+            write_manifest(directory, manifest)
+    return sorted(downloaded), sorted(unchanged), failed
+
+
+def main():
+    if "--pomoc" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    start_from_argv("synchronizuj_archiwum")
+    t0 = time.perf_counter()
+    downloaded, unchanged, failed = sync_archive(
+        get_option("url", ARCHIVE_URL), get_option("katalog", ARCHIVE_DIR),
+        get_option("watki", DEFAULT_WORKERS, int), get_option("limit", DEFAULT_RATE_LIMIT, float),
+        get_option("proby", DEFAULT_RETRIES, int), "--sprawdz" in sys.argv)
+    elapsed = time.perf_counter() - t0
+    print(f"Pobrano: {len(downloaded)}, bez zmian: {len(unchanged)}, błędy: {len(failed)} ({elapsed:.1f} s)")
+    finish_profile()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Uzgadnianie cen godzinowych z kilku źródeł (API tge.pl, archiwum Excel, stare kopie).
+
+Źródłem jest przyrostek nazwy pliku miesiąca:
+    tge_rdn_hourly_2025-10.csv        api   (pobierz_dane.py)
+    tge_rdn_hourly_2025-10.xlsx.csv   xlsx  (konwertuj_excel.py)
+    tge_rdn_hourly_2025-12.org.csv    org   (dowolny inny przyrostek to osobne źródło)
+
+Użycie:
+    python uzgodnij_zrodla.py [YYYY | YYYY-MM | <od> <do>] [--prog=PLN] [--zrodla=A,B]
+                              [--priorytet=A,B,...] [--pokaz=N] [--zapisz[=KATALOG]]
+
+Przykłady:
+    python uzgodnij_zrodla.py                        # wszystkie miesiące, różnice > 0,01 PLN
+    python uzgodnij_zrodla.py 2025-10 --prog=1 --pokaz=50
+    python uzgodnij_zrodla.py 2025 --zrodla=api,xlsx
+    python uzgodnij_zrodla.py --zapisz               # scalone CSV do scalone/
+    python magazyn.py importuj scalone/tge_rdn_hourly_2025-10.csv
+
+Opcje:
+    --prog=PLN       Próg rozbieżności (różnica max - min cen jednej godziny), domyślnie 0,01
+    --zrodla=A,B     Tylko wybrane źródła
+    --priorytet=...  Kolejność źródeł przy scalaniu (domyślnie xlsx, api, pozostałe alfabetycznie)
+    --pokaz=N        Ile rozbieżnych godzin wypisać (domyślnie 20)
+    --zapisz[=K]     Zapisz scalone miesiące do katalogu K (domyślnie scalone)
+
+Każdy plik CSV wczytywany jest raz i zapisywany jako klucze godzin i ceny w
+magazyn/zrodla/<plik>.npz (odświeżany, gdy CSV jest nowszy). Kluczem godziny
+jest numer dnia * 25 + slot siatki (siatka.py), więc powtórzona godzina DST
+ma własny klucz. Wszystkie źródła łączone są jednym np.unique na sklejonych
+kluczach w macierz [godzina, źródło] - porównanie i scalenie to operacje na
+kolumnach tej macierzy, bez pętli po godzinach.
+"""
+import os
+import re
+import sys
+from datetime import date
+
+import numpy as np
+
+from magazyn import STORE_DIR
+from pobierz_dane import get_option, write_month_csv
+from siatka import REPEAT_SLOT, REPEATED_HOUR, SLOTS, slots_from_hours
+
+SOURCE_CSV_RE = re.compile(r"tge_rdn_hourly_(\d{4})-(\d{2})((?:\.[\w-]+)*)\.csv$")
+CACHE_DIR = os.path.join(STORE_DIR, "zrodla")
+DEFAULT_PRIORITY = ("xlsx", "api")
+DEFAULT_THRESHOLD = 0.01
+DEFAULT_SHOWN = 20
+MERGED_DIR = "scalone"
+
+
+def source_name(suffix: str) -> str:
+    """".xlsx" -> "xlsx", "" -> "api"."""
+    return suffix.lstrip(".") or "api"
+
+
+def discover_sources(data_dir: str = ".") -> dict:
+    """{źródło: [(rok, miesiąc, ścieżka), ...]} dla plików miesięcy w katalogu."""
+    sources = {}
+    for name in sorted(os.listdir(data_dir)):
+        match = SOURCE_CSV_RE.match(name)
+        if match:
+            year, month = int(match.group(1)), int(match.group(2))
+            sources.setdefault(source_name(match.group(3)), []).append((year, month, os.path.join(data_dir, name)))
+    return sources
+
+
+def parse_source_csv(path: str) -> dict:
+    """Wczytuje CSV miesiąca jako tablice key (dzień * SLOTS + slot), price i volume."""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    dates = pd.to_datetime(df["date"]).values.astype("datetime64[D]")
+    hour_from = df["hour_from"].to_numpy(dtype=np.int8)
+    order = np.argsort(dates, kind="stable")
+    dates, hour_from = dates[order], hour_from[order]
+    slots = slots_from_hours(dates, hour_from)
+    return {
+        "key": dates.astype(np.int64) * SLOTS + slots,
+        "price": pd.to_numeric(df["price_pln_per_mwh"], errors="coerce").to_numpy(dtype=np.float64)[order],
+        "volume": pd.to_numeric(df["volume_mwh"], errors="coerce").to_numpy(dtype=np.float64)[order],
+    }
+
+
+def load_source_csv(path: str) -> dict:
+    """parse_source_csv z cache .npz - tekst parsowany tylko po zmianie pliku."""
+    cache = os.path.join(CACHE_DIR, os.path.basename(path) + ".npz")
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        with np.load(cache) as data:
+            return {k: data[k] for k in data.files}
+    arrays = parse_source_csv(path)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = cache[:-len(".npz")] + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, cache)
+    return arrays
+
+
+def load_sources(sources: dict, start: date | None = None, end: date | None = None) -> dict:
+    """{źródło: tablice} - miesiące źródła sklejone i przycięte do [start, end]."""
+    lo = np.int64(np.datetime64(start, "D").astype(np.int64) * SLOTS) if start else None
+    hi = np.int64((np.datetime64(end, "D").astype(np.int64) + 1) * SLOTS) if end else None
+    loaded = {}
+    for name, files in sources.items():
+        parts = [load_source_csv(path) for year, month, path in files
+                 if (start is None or (year, month) >= (start.year, start.month))
+                 and (end is None or (year, month) <= (end.year, end.month))]
+        if not parts:
+            continue
+        arrays = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+        keep = np.ones(len(arrays["key"]), dtype=bool)
+        if lo is not None:
+            keep &= arrays["key"] >= lo
+        if hi is not None:
+            keep &= arrays["key"] < hi
+        loaded[name] = {k: v[keep] for k, v in arrays.items()}
+    return loaded
+
+
+def align(loaded: dict) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Łączy źródła na wspólnym indeksie godzin.
+
+    Zwraca (nazwy źródeł, klucze godzin, ceny [godzina, źródło], wolumeny
+    [godzina, źródło]); brak godziny w źródle to NaN.
+    """
+    names = list(loaded)
+    keys, inverse = np.unique(np.concatenate([loaded[n]["key"] for n in names]), return_inverse=True)
+    column = np.repeat(np.arange(len(names)), [len(loaded[n]["key"]) for n in names])
+    prices = np.full((len(keys), len(names)), np.nan)
+    volumes = np.full((len(keys), len(names)), np.nan)
+    prices[inverse, column] = np.concatenate([loaded[n]["price"] for n in names])
+    volumes[inverse, column] = np.concatenate([loaded[n]["volume"] for n in names])
+    return names, keys, prices, volumes
+
+
+def spread(prices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(liczba źródeł z ceną, max - min cen) każdej godziny; rozpiętość NaN przy < 2 źródłach."""
+    present = ~np.isnan(prices)
+    count = present.sum(axis=1)
+    high = np.where(present, prices, -np.inf).max(axis=1)
+    low = np.where(present, prices, np.inf).min(axis=1)
+    return count, np.where(count >= 2, high - low, np.nan)
+
+
+def discrepancies(prices: np.ndarray, threshold: float = DEFAULT_THRESHOLD) -> np.ndarray:
+    """Indeksy godzin, w których ceny źródeł różnią się o więcej niż próg."""
+    _, diff = spread(prices)
+    return np.flatnonzero(diff > threshold)
+
+
+def pair_summary(names: list[str], prices: np.ndarray, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Porównanie każdej pary źródeł na ich wspólnych godzinach."""
+    summary = []
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            both = ~np.isnan(prices[:, i]) & ~np.isnan(prices[:, j])
+            diff = np.abs(prices[both, i] - prices[both, j])
+            summary.append({
+                "pair": (names[i], names[j]),
+                "common": int(both.sum()),
+                "over": int((diff > threshold).sum()),
+                "max": float(diff.max()) if len(diff) else 0.0,
+                "mean": float(diff.mean()) if len(diff) else 0.0,
+            })
+    return summary
+
+
+def priority_order(names: list[str], priority: list[str] | None = None) -> list[int]:
+    """Kolumny źródeł w kolejności scalania: podane, potem domyślne, potem reszta alfabetycznie."""
+    ordered = [n for n in (priority or []) if n in names]
+    ordered += [n for n in DEFAULT_PRIORITY if n in names and n not in ordered]
+    ordered += sorted(n for n in names if n not in ordered)
+    return [names.index(n) for n in ordered]
+
+
+def best_merge(prices: np.ndarray, volumes: np.ndarray, order: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Scalenie "najlepsze źródło": każda godzina z pierwszego źródła w kolejności,
+    które ma jej cenę. Zwraca (ceny, wolumeny, kolumna wybranego źródła; -1 = brak).
+    """
+    chosen = np.full(len(prices), -1, dtype=np.int8)
+    for column in order:
+        take = (chosen < 0) & ~np.isnan(prices[:, column])
+        chosen[take] = column
+    rows = np.arange(len(prices))
+    safe = np.maximum(chosen, 0)
+    merged = np.where(chosen >= 0, prices[rows, safe], np.nan)
+    merged_volume = np.where(chosen >= 0, volumes[rows, safe], np.nan)
+    return merged, merged_volume, chosen
+
+
+def key_labels(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Klucze godzin -> (daty datetime64[D], hour_from)."""
+    days = (keys // SLOTS).astype("datetime64[D]")
+    slots = keys % SLOTS
+    return days, np.where(slots == REPEAT_SLOT, REPEATED_HOUR, slots).astype(np.int8)
+
+
+def write_merged(keys: np.ndarray, prices: np.ndarray, volumes: np.ndarray, out_dir: str = MERGED_DIR) -> list[str]:
+    """Zapisuje scalone ceny jako tge_rdn_hourly_YYYY-MM.csv (format pobierz_dane.py)."""
+    keep = ~np.isnan(prices)
+    keys, prices, volumes = keys[keep], prices[keep], volumes[keep]
+    # Kolejność chronologiczna: powtórzona godzina DST zaraz po pierwszym wystąpieniu
+    slots = keys % SLOTS
+    position = np.where(slots == REPEAT_SLOT, REPEATED_HOUR * 2 + 1, slots * 2)
+    order = np.lexsort((position, keys // SLOTS))
+    keys, prices, volumes = keys[order], prices[order], volumes[order]
+    days, hour_from = key_labels(keys)
+    months = days.astype("datetime64[M]")
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for month in np.unique(months):
+        by_day = {}
+        for i in np.flatnonzero(months == month):
+            volume = "" if np.isnan(volumes[i]) else f"{volumes[i]:.2f}"
+            by_day.setdefault(days[i].item(), []).append(
+                (int(hour_from[i]), int(hour_from[i]) + 1, f"{prices[i]:.2f}", volume))
+        path = os.path.join(out_dir, f"tge_rdn_hourly_{month}.csv")
+        write_month_csv(path, by_day)
+        written.append(path)
+    return written
+
+
+def main():
+    from statystyki import date_range
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--pomoc" in sys.argv:
+        print(__doc__)
+        sys.exit(0)
+    start, end = (date.fromisoformat(d) for d in date_range(args)) if args else (None, None)
+    threshold = get_option("prog", DEFAULT_THRESHOLD, float)
+    shown = get_option("pokaz", DEFAULT_SHOWN, int)
+    priority = get_option("priorytet", None)
+    priority = priority.split(",") if priority else None
+
+    sources = discover_sources()
+    selected = get_option("zrodla", None)
+    if selected:
+        sources = {n: files for n, files in sources.items() if n in selected.split(",")}
+    loaded = load_sources(sources, start, end)
+    if not loaded:
+        print("Brak plików źródeł w zakresie")
+        sys.exit(1)
+
+    names, keys, prices, volumes = align(loaded)
+    days, hour_from = key_labels(keys)
+    counts = ", ".join(f"{n} ({len(loaded[n]['key'])} godz.)" for n in names)
+    print(f"Źródła: {counts}, wspólny indeks: {len(keys)} godz. ({days[0]} - {days[-1]})")
+
+    print(f"\n{'para':<14} {'wspólne':>8} {'> ' + str(threshold):>8} {'max':>9} {'średnio':>9}")
+    for row in pair_summary(names, prices, threshold):
+        print(f"{'/'.join(row['pair']):<14} {row['common']:>8} {row['over']:>8} {row['max']:>9.2f} {row['mean']:>9.4f}")
+
+    count, diff = spread(prices)
+    bad = discrepancies(prices, threshold)
+    print(f"\nRozbieżne godziny (> {threshold} PLN/MWh): {len(bad)} z {int((count >= 2).sum())} porównywalnych")
+    if len(bad):
+        worst = bad[np.argsort(-diff[bad], kind="stable")][:shown]
+        print(f"{'dzień':<10} {'godz.':>5} " + " ".join(f"{n:>9}" for n in names) + f" {'różnica':>9}")
+        for i in worst:
+            repeat = "a" if keys[i] % SLOTS == REPEAT_SLOT else ""
+            values = " ".join(f"{'-':>9}" if np.isnan(v) else f"{v:>9.2f}" for v in prices[i])
+            print(f"{str(days[i]):<10} {hour_from[i]:>4}{repeat:<1} {values} {diff[i]:>9.2f}")
+
+    order = priority_order(names, priority)
+    merged, merged_volume, chosen = best_merge(prices, volumes, order)
+    used = np.bincount(chosen[chosen >= 0], minlength=len(names))
+    print(f"\nScalenie (priorytet: {', '.join(names[c] for c in order)}): "
+          + ", ".join(f"{names[c]} {used[c]} godz." for c in order))
+    out_dir = get_option("zapisz", MERGED_DIR) if any(a.startswith("--zapisz") for a in sys.argv) else None
+    if out_dir:
+        for path in write_merged(keys, merged, merged_volume, out_dir):
+            print(f"Saved: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Wspólne elementy wykresów cen TGE RDN: paleta kolorów i szybkie etykiety komórek.
+
+Dotychczas każda wartość w komórce heatmapy była osobnym obiektem ax.text
+(ok. 744 na miesiąc, prawie 9000 na zestawienie roczne), a czas układania
+i rasteryzacji wykresu zależał głównie od nich. draw_cell_labels w trybie
+"batch" rysuje wszystkie etykiety jedną kolekcją ścieżek (PathCollection):
+kształty cyfr liczone są raz dla każdego napisu, a pozycje komórek podawane
+jako przesunięcia w układzie danych - matplotlib rysuje to jednym wywołaniem.
+
+Użycie jako moduł:
+    from wykres import make_cmap, draw_cell_labels
+
+    im = ax.imshow(values, aspect='auto', cmap=make_cmap(), vmin=-100, vmax=800)
+    draw_cell_labels(ax, values, fontsize=6)
+"""
+from functools import lru_cache
+
+import numpy as np
+from matplotlib.collections import PathCollection
+from matplotlib.colors import LinearSegmentedColormap
+from matplotlib.font_manager import FontProperties
+from matplotlib.path import Path
+from matplotlib.textpath import TextPath
+from matplotlib.transforms import Affine2D
+
+# Zakres skali kolorów (PLN/MWh)
+VMIN = -100
+VMAX = 800
+
+# Niestandardowa paleta kolorów:
+# fioletowy (ujemne) -> zielony (0-400) -> żółty (400-600) -> czerwony (>600)
+CMAP_COLORS = [
+    (0.5, 0.0, 0.5),    # fioletowy dla ujemnych (-100)
+    (0.0, 0.5, 0.0),    # ciemnozielony (0)
+    (0.0, 0.8, 0.0),    # zielony (200)
+    (0.5, 1.0, 0.0),    # żółtozielony (400)
+    (1.0, 1.0, 0.0),    # żółty (500)
+    (1.0, 0.5, 0.0),    # pomarańczowy (600)
+    (1.0, 0.0, 0.0),    # czerwony (800)
+]
+# Pozycje kolorów w zakresie 0-1 (mapowane na -100 do 800)
+CMAP_POSITIONS = [0.0, 0.111, 0.333, 0.556, 0.667, 0.778, 1.0]
+
+LABEL_MODES = ("batch", "text")
+
+
+@lru_cache(maxsize=None)
+def make_cmap() -> LinearSegmentedColormap:
+    """Paleta custom_rdn - budowana raz na proces."""
+    return LinearSegmentedColormap.from_list('custom_rdn', list(zip(CMAP_POSITIONS, CMAP_COLORS)))
+
+
+def label_colors(values: np.ndarray, low: float = 0, high: float = 600) -> np.ndarray:
+    """
+    Kolor tekstu dla każdej komórki: biały na fioletowym (< low)
+    i pomarańczowo-czerwonym (> high) tle, czarny na pozostałych.
+    """
+    return np.where((values < low) | (values > high), 'white', 'black')
+
+
+@lru_cache(maxsize=4096)
+def _label_path(text: str, fontsize: float) -> Path:
+    """Ścieżka napisu w punktach, wyśrodkowana w (0, 0) jak ha/va='center'."""
+    path = TextPath((0, 0), text, size=fontsize, prop=FontProperties())
+    extents = path.get_extents()
+    cx = (extents.x0 + extents.x1) / 2
+    cy = (extents.y0 + extents.y1) / 2
+    return Path(path.vertices - (cx, cy), path.codes)
+
+
+def draw_cell_labels(ax, values: np.ndarray, fontsize: float, colors=None, mode: str = "batch"):
+    """
+    Wpisuje wartości (zaokrąglone do całości) w komórki macierzy narysowanej przez imshow.
+
+    values - macierz dni x godziny (NaN = brak etykiety)
+    colors - macierz kolorów tekstu; domyślnie label_colors(values)
+    mode   - "batch" (jedna kolekcja ścieżek) albo "text" (ax.text na komórkę)
+    """
+    if mode not in LABEL_MODES:
+        raise ValueError(f"Nieznany tryb etykiet: {mode} (dostępne: {', '.join(LABEL_MODES)})")
+    values = np.asarray(values, dtype=float)
+    if colors is None:
+        colors = label_colors(values)
+    rows, cols = np.nonzero(~np.isnan(values))
+
+    if mode == "text":
+        for i, j in zip(rows, cols):
+            ax.text(j, i, f'{values[i, j]:.0f}', ha='center', va='center',
+                    fontsize=fontsize, color=colors[i, j])
+        return None
+
+    paths = [_label_path(f'{values[i, j]:.0f}', fontsize) for i, j in zip(rows, cols)]
+    # Ścieżki w punktach (1/72 cala) -> piksele; pozycje komórek w układzie danych
+    points_to_pixels = Affine2D().scale(1 / 72) + ax.figure.dpi_scale_trans
+    collection = PathCollection(
+        paths,
+        offsets=np.column_stack([cols, rows]),
+        offset_transform=ax.transData,
+        transform=points_to_pixels,
+        facecolors=colors[rows, cols],
+        edgecolors='none',
+        linewidths=0,
+    )
+    ax.add_collection(collection, autolim=False)
+    return collection
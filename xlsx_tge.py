@@ -0,0 +1,125 @@
+"""
+Strumieniowy czytnik raportów TGE w formacie XLSX, bez pandas i openpyxl.
+
+Plik .xlsx to archiwum zip z arkuszami zapisanymi jako XML. Czytnik:
+  - odnajduje arkusz po nazwie (workbook.xml + relacje),
+  - wczytuje tablicę współdzielonych napisów (sharedStrings.xml) raz na plik,
+  - przechodzi XML arkusza przez iterparse wiersz po wierszu, zwalniając
+    przetworzone wiersze, i zwraca tylko wybrane kolumny.
+
+Użycie jako moduł:
+    from xlsx_tge import read_sheet_columns
+
+    for instrument, granulacja, cena in read_sheet_columns(path, "WYNIKI", ("B", "C", "D")):
+        ...
+
+Komórki puste zwracane są jako None, liczby jako float, napisy jako str.
+"""
+import posixpath
+import zipfile
+
+from lxml import etree
+
+NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+NS_PKG_REL = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_TAG = f"{{{NS_MAIN}}}row"
+CELL_TAG = f"{{{NS_MAIN}}}c"
+VALUE_TAG = f"{{{NS_MAIN}}}v"
+INLINE_TAG = f"{{{NS_MAIN}}}is"
+TEXT_TAG = f"{{{NS_MAIN}}}t"
+SI_TAG = f"{{{NS_MAIN}}}si"
+
+
+def column_index(ref: str) -> int:
+    """'B13' -> 1, 'AA7' -> 26 (indeks kolumny od zera)."""
+    index = 0
+    for ch in ref:
+        if ch.isdigit():
+            break
+        index = index * 26 + (ord(ch.upper()) - 64)
+    return index - 1
+
+
+def sheet_path(zf: zipfile.ZipFile, sheet_name: str) -> str:
+    """Zwraca ścieżkę XML arkusza o podanej nazwie wewnątrz archiwum."""
+    workbook = etree.fromstring(zf.read("xl/workbook.xml"))
+    rel_id = None
+    for sheet in workbook.iter(f"{{{NS_MAIN}}}sheet"):
+        if sheet.get("name") == sheet_name:
+            rel_id = sheet.get(f"{{{NS_REL}}}id")
+            break
+    if rel_id is None:
+        raise KeyError(f"Brak arkusza {sheet_name!r}")
+
+    rels = etree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{{{NS_PKG_REL}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            # Ścieżka bezwzględna ("/xl/...") albo względna wobec katalogu xl/
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(f"Brak relacji {rel_id} dla arkusza {sheet_name!r}")
+
+
+def read_shared_strings(zf: zipfile.ZipFile) -> list[str]:
+    """Wczytuje tablicę współdzielonych napisów (raz na plik)."""
+    try:
+        f = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    with f:
+        for _, si in etree.iterparse(f, events=("end",), tag=SI_TAG):
+            # Zwykły napis (<t>) albo tekst sformatowany złożony z kilku <r><t>
+            strings.append("".join(t.text or "" for t in si.iter(TEXT_TAG)))
+            si.clear()
+    return strings
+
+
+def _cell_value(cell, shared_strings):
+    cell_type = cell.get("t")
+    if cell_type == "inlineStr":
+        inline = cell.find(INLINE_TAG)
+        return "".join(t.text or "" for t in inline.iter(TEXT_TAG)) if inline is not None else None
+    v = cell.find(VALUE_TAG)
+    if v is None or v.text is None:
+        return None
+    if cell_type == "s":
+        return shared_strings[int(v.text)]
+    if cell_type in ("str", "e"):
+        return v.text
+    if cell_type == "b":
+        return v.text == "1"
+    return float(v.text)
+
+
+def read_sheet_columns(path: str, sheet_name: str, columns: tuple[str, ...]):
+    """
+    Generator zwracający dla każdego wiersza arkusza krotkę wartości wybranych kolumn.
+
+    Wiersze, w których wszystkie wybrane komórki są puste, są pomijane.
+    """
+    wanted = {column_index(c): i for i, c in enumerate(columns)}
+    with zipfile.ZipFile(path) as zf:
+        shared_strings = read_shared_strings(zf)
+        with zf.open(sheet_path(zf, sheet_name)) as f:
+            for _, row in etree.iterparse(f, events=("end",), tag=ROW_TAG):
+                values = [None] * len(columns)
+                found = False
+                col = -1
+                for cell in row.iter(CELL_TAG):
+                    ref = cell.get("r")
+                    col = column_index(ref) if ref else col + 1
+                    slot = wanted.get(col)
+                    if slot is not None:
+                        values[slot] = _cell_value(cell, shared_strings)
+                        found = found or values[slot] is not None
+                # Zwalniamy przetworzony wiersz i jego poprzedników - pamięć nie rośnie z rozmiarem arkusza
+                row.clear()
+                while row.getprevious() is not None:
+                    del row.getparent()[0]
+                if found:
+                    yield tuple(values)
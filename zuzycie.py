@@ -0,0 +1,248 @@
+"""
+Strumieniowy import danych z licznika (zużycie 15-minutowe) i złączenie z cenami RDN.
+
+Eksport z licznika (np. eLicznik) to plik CSV z kolumną czasu i kolumną energii
+w kWh, często obejmujący kilka lat. Plik czytany jest kawałkami (chunksize),
+każdy kawałek jest sumowany do godzin (albo kwadransów) czasu lokalnego,
+łączony z cenami z magazynu i od razu dopisywany do pliku wynikowego.
+Pamięć zależy od rozmiaru kawałka, nie od rozmiaru eksportu.
+
+Użycie:
+    python zuzycie.py <eksport.csv> [wynik.csv] [opcje]
+
+Opcje:
+    --czas=NAZWA         Kolumna z czasem (domyślnie pierwsza kolumna)
+    --energia=NAZWA      Kolumna z energią w kWh (domyślnie druga kolumna)
+    --sep=ZNAK           Separator pól (domyślnie ";")
+    --dziesietne=ZNAK    Separator dziesiętny (domyślnie ",")
+    --format=WZORZEC     Format czasu (strftime, np. "%d.%m.%Y %H:%M" albo ISO8601);
+                         domyślnie wykrywany raz z pierwszego kawałka: ISO, a gdy nie
+                         pasuje - formaty z dniem na początku (TIME_FORMATS)
+    --koniec-okresu      Czas w eksporcie oznacza koniec okresu (np. 00:15 = 00:00-00:15)
+    --rozdzielczosc=M    60 (godziny, domyślnie) albo 15 (kwadranse, ceny 15-minutowe
+                         z magazynu, a gdy ich brak - cena godziny)
+    --wiersze=N          Rozmiar kawałka w wierszach (domyślnie 100000)
+
+Przykład:
+    python zuzycie.py licznik_2024_2025.csv zuzycie_godzinowe.csv --koniec-okresu
+
+Plik wynikowy ma kolumny:
+    date, hour_from, minute_from, consumption_kwh, price_pln_per_mwh, cost_pln
+"""
+import calendar
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from magazyn import load_day_matrix, sync_from_csv
+from pobierz_dane import get_option
+
+DEFAULT_CHUNK_ROWS = 100_000
+OUTPUT_COLUMNS = ["date", "hour_from", "minute_from", "consumption_kwh", "price_pln_per_mwh", "cost_pln"]
+# Formaty czasu sprawdzane po kolei przy wykrywaniu - ISO, potem dzień na początku (eLicznik)
+TIME_FORMATS = ["ISO8601", "%d.%m.%Y %H:%M", "%d.%m.%Y %H:%M:%S", "%d-%m-%Y %H:%M", "%d-%m-%Y %H:%M:%S",
+                "%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S"]
+
+
+@lru_cache(maxsize=4)
+def month_price_matrix(year: int, month: int) -> np.ndarray:
+    """
+    Ceny miesiąca jako macierz [dzień-1, godzina] (NaN = brak ceny).
+
+    Gotowa siatka z magazynu - powtórzona godzina przy zmianie czasu jest uśredniana,
+    tak jak na heatmapach. Trzymamy tylko kilka ostatnich miesięcy - dane licznika
+    są chronologiczne.
+    """
+    matrix = np.full((31, 24), np.nan)
+    last_day = calendar.monthrange(year, month)[1]
+    days, prices = load_day_matrix(f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day}", sync=False)
+    matrix[(days - np.datetime64(f"{year:04d}-{month:02d}-01")).astype(int)] = prices
+    return matrix
+
+
+@lru_cache(maxsize=4)
+def month_quarter_matrix(year: int, month: int) -> np.ndarray:
+    """
+    Ceny 15-minutowe miesiąca jako macierz [dzień-1, kwadrans 0-95].
+
+    Kwadranse bez natywnej ceny dostają cenę swojej godziny.
+    """
+    matrix = np.repeat(month_price_matrix(year, month), 4, axis=1)
+    last_day = calendar.monthrange(year, month)[1]
+    days, quarters = load_day_matrix(f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day}",
+                                     sync=False, resolution=15)
+    if len(days):
+        rows = (days - np.datetime64(f"{year:04d}-{month:02d}-01")).astype(int)
+        native = ~np.isnan(quarters)
+        block = matrix[rows]
+        block[native] = quarters[native]
+        matrix[rows] = block
+    return matrix
+
+
+def lookup_prices(timestamps: pd.Series, resolution: int = 60) -> np.ndarray:
+    """Cena PLN/MWh dla każdego (lokalnego) znacznika czasu - wektorowo, miesiąc po miesiącu."""
+    prices = np.full(len(timestamps), np.nan)
+    years = timestamps.dt.year.to_numpy()
+    months = timestamps.dt.month.to_numpy()
+    days = timestamps.dt.day.to_numpy() - 1
+    slots = timestamps.dt.hour.to_numpy()
+    month_matrix = month_price_matrix
+    if resolution == 15:
+        slots = slots * 4 + timestamps.dt.minute.to_numpy() // 15
+        month_matrix = month_quarter_matrix
+    keys = years * 12 + months - 1
+    for key in np.unique(keys):
+        mask = keys == key
+        matrix = month_matrix(int(key // 12), int(key % 12 + 1))
+        prices[mask] = matrix[days[mask], slots[mask]]
+    return prices
+
+
+def detect_time_format(values: pd.Series) -> str:
+    """
+    Pierwszy format z TIME_FORMATS, w którym parsują się wszystkie niepuste wartości.
+
+    Wykrywany raz dla całego pliku - gdyby każdy kawałek zgadywał sam, ten sam
+    eksport mógłby być czytany raz jako dzień-miesiąc, raz jako miesiąc-dzień.
+    """
+    sample = values.dropna().astype(str)
+    for fmt in TIME_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        return fmt
+    raise ValueError(f"Nierozpoznany format czasu (np. {sample.iloc[0] if len(sample) else 'brak wartości'!r}) "
+                     f"- podaj --format=")
+
+
+def iter_meter_intervals(path: str, time_col=None, energy_col=None, sep: str = ";", decimal: str = ",",
+                         interval_end: bool = False, resolution: int = 60,
+                         chunk_rows: int = DEFAULT_CHUNK_ROWS, time_format: str | None = None):
+    """
+    Generator kolejnych DataFrame'ów (start, consumption_kwh) zsumowanych do okresów
+    o długości `resolution` minut.
+
+    Okresy ostatniej godziny kawałka są wstrzymywane i łączone z początkiem
+    następnego kawałka, więc każdy okres pojawia się w wyniku dokładnie raz -
+    także powtórzona godzina przy zmianie czasu na zimowy, której oba
+    przebiegi (czas lokalny bez strefy) sumują się w te same okresy, jak
+    wewnątrz kawałka. Eksport musi być posortowany chronologicznie; kolejność
+    sprawdzana jest z dokładnością do godziny, bo przy --rozdzielczosc=15
+    drugi przebieg godziny zaczyna się od kwadransa wcześniejszego niż
+    ostatni kwadrans pierwszego.
+
+    Wszystkie kawałki parsowane są jednym formatem czasu: time_format albo
+    wykrytym z pierwszego kawałka (detect_time_format); wartość, która do
+    niego nie pasuje, przerywa import błędem.
+    """
+    if resolution not in (15, 60):
+        raise ValueError("Rozdzielczość musi wynosić 15 albo 60 minut")
+    freq = f"{resolution}min"
+    pending = None
+    last_start = None
+
+    reader = pd.read_csv(path, sep=sep, decimal=decimal, chunksize=chunk_rows)
+    for chunk in reader:
+        t_col = time_col or chunk.columns[0]
+        e_col = energy_col or chunk.columns[1]
+        if time_format is None:
+            time_format = detect_time_format(chunk[t_col])
+        try:
+            ts = pd.to_datetime(chunk[t_col], format=time_format)
+        except ValueError as e:
+            raise ValueError(f"{path}: czas niezgodny z formatem {time_format!r}: {e}") from e
+        if interval_end:
+            # 00:15 oznacza okres 00:00-00:15 - przypisujemy go do początku okresu
+            ts = ts - pd.Timedelta(minutes=15)
+        energy = pd.to_numeric(chunk[e_col], errors="coerce")
+
+        buckets = pd.DataFrame({"start": ts.dt.floor(freq), "consumption_kwh": energy})
+        if last_start is not None and len(buckets) and buckets["start"].iloc[0].floor("h") < last_start:
+            raise ValueError(f"{path}: dane nie są posortowane chronologicznie ({buckets['start'].iloc[0]})")
+        summed = buckets.groupby("start", sort=True, as_index=False)["consumption_kwh"].sum(min_count=1)
+
+        if pending is not None:
+            summed = pd.concat([pending, summed]).groupby("start", as_index=False)["consumption_kwh"].sum(min_count=1)
+        if summed.empty:
+            continue
+        # Ostatnia godzina może być kontynuowana w kolejnym kawałku (też jako powtórzona godzina DST)
+        last_start = summed["start"].iloc[-1].floor("h")
+        held = (summed["start"] >= last_start).to_numpy()
+        pending = summed[held]
+        if not held.all():
+            yield summed[~held].reset_index(drop=True)
+
+    if pending is not None:
+        yield pending.reset_index(drop=True)
+
+
+def price_intervals(intervals: pd.DataFrame, resolution: int = 60) -> pd.DataFrame:
+    """Dołącza ceny do okresów i liczy koszt energii (bez opłat dystrybucyjnych)."""
+    start = intervals["start"]
+    price = lookup_prices(start, resolution)
+    return pd.DataFrame({
+        "date": start.dt.strftime("%Y-%m-%d"),
+        "hour_from": start.dt.hour,
+        "minute_from": start.dt.minute,
+        "consumption_kwh": intervals["consumption_kwh"].round(4),
+        "price_pln_per_mwh": price,
+        "cost_pln": (intervals["consumption_kwh"] * price / 1000).round(4),
+    })
+
+
+def ingest_meter_csv(path: str, out_path: str, resolution: int = 60, **reader_options) -> dict:
+    """
+    Przetwarza eksport licznika kawałkami i zapisuje wynik strumieniowo.
+
+    Zwraca podsumowanie: liczbę okresów, zużycie, koszt i liczbę okresów bez ceny.
+    """
+    sync_from_csv()
+    summary = {"intervals": 0, "consumption_kwh": 0.0, "cost_pln": 0.0, "missing_price": 0}
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(OUTPUT_COLUMNS) + "\n")
+        for intervals in iter_meter_intervals(path, resolution=resolution, **reader_options):
+            priced = price_intervals(intervals, resolution)
+            priced.to_csv(f, header=False, index=False)
+            summary["intervals"] += len(priced)
+            summary["consumption_kwh"] += float(priced["consumption_kwh"].sum())
+            summary["cost_pln"] += float(priced["cost_pln"].sum())
+            summary["missing_price"] += int(priced["price_pln_per_mwh"].isna().sum())
+    os.replace(tmp, out_path)
+    return summary
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) < 1:
+        print(__doc__)
+        sys.exit(1)
+
+    in_path = args[0]
+    resolution = get_option("rozdzielczosc", 60, int)
+    out_path = args[1] if len(args) > 1 else f"zuzycie_{resolution}min.csv"
+
+    summary = ingest_meter_csv(
+        in_path,
+        out_path,
+        resolution=resolution,
+        time_col=get_option("czas", None),
+        energy_col=get_option("energia", None),
+        sep=get_option("sep", ";"),
+        decimal=get_option("dziesietne", ","),
+        interval_end="--koniec-okresu" in sys.argv,
+        chunk_rows=get_option("wiersze", DEFAULT_CHUNK_ROWS, int),
+        time_format=get_option("format", None),
+    )
+
+    print(f"Zapisano {summary['intervals']} okresów do {out_path}")
+    print(f"Zużycie: {summary['consumption_kwh']:.1f} kWh, koszt energii (RDN): {summary['cost_pln']:.2f} PLN")
+    if summary["consumption_kwh"] > 0:
+        print(f"Średnia cena ważona zużyciem: {summary['cost_pln'] / summary['consumption_kwh'] * 1000:.2f} PLN/MWh")
+    if summary["missing_price"]:
+        print(f"UWAGA: {summary['missing_price']} okresów bez ceny w magazynie (koszt pominięty)")